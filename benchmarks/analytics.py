@@ -0,0 +1,69 @@
+"""Fill price estimates for many order sizes, walking levels vs BookArrays.
+
+The baseline walks the /order_book levels in pure Python once per candidate
+size, as consumers did before. BookArrays answers all sizes at once with
+NumPy, including the time to build the arrays from the snapshot.
+
+Usage: python -m benchmarks.analytics [--levels N] [--sizes N] [--repeat N]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import timeit
+
+import numpy as np
+
+from benchmarks import payloads
+from quadriga.analytics import BookArrays
+
+
+def baseline_fill_prices(snapshot, sizes):
+    prices = []
+    for size in sizes:
+        remaining = size
+        notional = 0.0
+        for price, amount in snapshot['asks']:
+            price, amount = float(price), float(amount)
+            taken = min(remaining, amount)
+            notional += taken * price
+            remaining -= taken
+            if remaining <= 0:
+                break
+        prices.append(notional / size if remaining <= 0 else float('nan'))
+    return prices
+
+
+def vectorized_fill_prices(snapshot, sizes):
+    return BookArrays.from_snapshot(snapshot).fill_price('buy', sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=int, default=5000)
+    parser.add_argument('--sizes', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    snapshot = payloads.order_book(args.levels)
+    sizes = np.linspace(0.1, args.levels, args.sizes)
+    expected = baseline_fill_prices(snapshot, sizes)
+    assert np.allclose(
+        vectorized_fill_prices(snapshot, sizes), expected, equal_nan=True
+    )
+
+    print('{} sizes against {} ask levels'.format(args.sizes, args.levels))
+    reference = None
+    for name, func in [('pure Python walk', baseline_fill_prices),
+                       ('BookArrays.fill_price', vectorized_fill_prices)]:
+        elapsed = min(timeit.repeat(
+            lambda: func(snapshot, sizes), number=1, repeat=args.repeat
+        ))
+        reference = reference or elapsed
+        print('  {:<24} {:>9.2f} ms {:>8.1f}x'.format(
+            name, elapsed * 1000, reference / elapsed
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Decoding time of large response bodies with and without JSONDecoder.
+
+The baseline mimics what each consumer did before: ``requests.Response.json``
+(bytes to text, then stdlib json), followed by its own ``Decimal`` calls. With
+JSONDecoder, the conversion is done once when the response is decoded.
+
+Usage: python -m benchmarks.decoding [--levels N] [--trades N] [--repeat N]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import json
+import timeit
+from decimal import Decimal
+
+from benchmarks import payloads
+from quadriga.decoding import JSONDecoder, fastest_loads
+
+
+def baseline_order_book(content):
+    body = json.loads(content.decode('utf-8'))
+    for side in ('bids', 'asks'):
+        body[side] = [[Decimal(p), Decimal(a)] for p, a in body[side]]
+    return body
+
+
+def baseline_user_trades(content):
+    body = json.loads(content.decode('utf-8'))
+    for trade in body:
+        for key in ('btc', 'cad', 'rate', 'fee'):
+            trade[key] = Decimal(trade[key])
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=int, default=5000)
+    parser.add_argument('--trades', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fast_loads = fastest_loads()
+    cases = [
+        ('/order_book ({} levels per side)'.format(args.levels),
+         payloads.encode(payloads.order_book(args.levels)),
+         baseline_order_book),
+        ('/user_transactions ({} rows)'.format(args.trades),
+         payloads.encode(payloads.user_trades(args.trades)),
+         baseline_user_trades),
+    ]
+    decoders = [
+        ('resp.json() + Decimal()', None),
+        ('JSONDecoder(json, Decimal)', JSONDecoder(json.loads, Decimal)),
+        ('JSONDecoder({}, Decimal)'.format(fast_loads.__module__),
+         JSONDecoder(fast_loads, Decimal)),
+        ('JSONDecoder({})'.format(fast_loads.__module__),
+         JSONDecoder(fast_loads)),
+    ]
+    for title, content, baseline in cases:
+        print('{} - {:.0f} KiB'.format(title, len(content) / 1024))
+        reference = None
+        for name, decoder in decoders:
+            func = baseline if decoder is None else decoder.decode
+            elapsed = min(timeit.repeat(
+                lambda: func(content), number=1, repeat=args.repeat
+            ))
+            reference = reference or elapsed
+            print('  {:<32} {:>8.2f} ms {:>7.2f}x'.format(
+                name, elapsed * 1000, reference / elapsed
+            ))
+
+
+if __name__ == '__main__':
+    main()
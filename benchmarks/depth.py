@@ -0,0 +1,68 @@
+"""Parse time and peak memory of /order_book bodies, full vs depth-limited.
+
+The full parse decodes every price level with the standard library's json
+module, as ``get_public_orders()`` does. The depth-limited parse uses
+OrderBookParser, as ``get_public_orders(depth=N)`` does, and should stay flat
+as the order book gets deeper.
+
+Usage: python -m benchmarks.depth [--depth N] [--levels N [N ...]] [--repeat N]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import json
+import timeit
+import tracemalloc
+
+from benchmarks import payloads
+from quadriga.decoding import OrderBookParser
+
+
+def full_parse(content):
+    return json.loads(content.decode('utf-8'))
+
+
+def peak_memory(func, content):
+    """Return the peak memory allocated while parsing, in bytes."""
+    tracemalloc.start()
+    try:
+        func(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=20)
+    parser.add_argument(
+        '--levels', type=int, nargs='+', default=[1000, 5000, 20000]
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    parsers = [
+        ('json.loads (all levels)', full_parse),
+        ('OrderBookParser({})'.format(args.depth),
+         OrderBookParser(args.depth)),
+    ]
+    for levels in args.levels:
+        content = payloads.encode(payloads.order_book(levels))
+        print('/order_book ({} levels per side) - {:.0f} KiB'.format(
+            levels, len(content) / 1024
+        ))
+        reference = None
+        for name, func in parsers:
+            elapsed = min(timeit.repeat(
+                lambda: func(content), number=1, repeat=args.repeat
+            ))
+            reference = reference or elapsed
+            print('  {:<28} {:>8.3f} ms {:>8.1f}x {:>9.0f} KiB peak'.format(
+                name, elapsed * 1000, reference / elapsed,
+                peak_memory(func, content) / 1024
+            ))
+
+
+if __name__ == '__main__':
+    main()
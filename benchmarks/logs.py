@@ -0,0 +1,93 @@
+"""Per-call overhead of debug logging, with debug logging off and on.
+
+The baseline mimics what each API method did before: the message is built
+with ``str.format`` and passed to ``logger.debug``, which only then checks the
+level. Lazy logging checks the level first, and formats nothing while debug
+logging is off. The full call measures ``OrderBook.buy_limit_order`` against
+an in-memory transport. The benchmark suite (benchmarks.suite) also
+measures it over HTTP, in its "buy_limit_order_debug_off" and
+"buy_limit_order_debug_on" scenarios, so it is saved and compared with other
+versions.
+
+Usage: python -m benchmarks.logs [--number N]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import logging
+import timeit
+
+from quadriga import QuadrigaClient
+from quadriga.transport import Response, Transport
+
+
+class MemoryTransport(Transport):
+    """Transport returning the same response body without any I/O."""
+
+    content = b'{"id": "a", "amount": "10", "price": "5"}'
+
+    def _response(self, url):
+        return Response(url, 200, 'OK', {}, self.content)
+
+    def get(self, url, params, timeout):
+        return self._response(url)
+
+    def post(self, url, json, timeout):
+        return self._response(url)
+
+
+def eager_log(logger, book, amount, price):
+    message = 'buy {} {} at limit price of {} {}'.format(
+        amount, book.major, price, book.minor
+    )
+    logger.debug('{}: {}'.format(book.name, message))
+
+
+def lazy_log(logger, book, amount, price):
+    book._log(
+        'buy %s %s at limit price of %s %s',
+        amount, book.major, price, book.minor
+    )
+
+
+def per_call(func, number):
+    """Return the best time per call out of 5 runs, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('quadriga.benchmark')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    client = QuadrigaClient(
+        api_key='key',
+        api_secret='secret',
+        client_id='id',
+        transport=MemoryTransport(),
+        logger=logger
+    )
+    book = client.book('btc_cad')
+
+    print('{:<28} {:>12} {:>12}'.format('', 'debug off', 'debug on'))
+    for name, func, number in [
+        ('eager log message',
+         lambda: eager_log(logger, book, '10', '5'), args.number),
+        ('lazy log message',
+         lambda: lazy_log(logger, book, '10', '5'), args.number),
+        ('buy_limit_order (in memory)',
+         lambda: book.buy_limit_order('10', '5'), args.number // 10),
+    ]:
+        timings = []
+        for level in (logging.INFO, logging.DEBUG):
+            logger.setLevel(level)
+            timings.append(per_call(func, number))
+        print('{:<28} {:>9.2f} us {:>9.2f} us'.format(name, *timings))
+
+
+if __name__ == '__main__':
+    main()
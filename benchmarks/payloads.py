@@ -0,0 +1,73 @@
+"""Synthetic QuadrigaCX response bodies used by the benchmarks."""
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import random
+
+
+def order_book(levels=5000, seed=0):
+    """Return an /order_book response body with the given depth per side."""
+    rng = random.Random(seed)
+    mid = 10000.0
+    bids = [['{:.2f}'.format(mid - 0.01 * (i + 1)),
+             '{:.8f}'.format(rng.uniform(0.001, 5))] for i in range(levels)]
+    asks = [['{:.2f}'.format(mid + 0.01 * (i + 1)),
+             '{:.8f}'.format(rng.uniform(0.001, 5))] for i in range(levels)]
+    return {'timestamp': '1512345678', 'bids': bids, 'asks': asks}
+
+
+def user_trades(count=2000, seed=0):
+    """Return a /user_transactions response body with the given length."""
+    rng = random.Random(seed)
+    trades = []
+    for i in range(count):
+        amount = rng.uniform(0.001, 2)
+        rate = rng.uniform(9000, 11000)
+        trades.append({
+            'id': count - i,
+            'datetime': '2017-12-01 00:00:00',
+            'type': 2,
+            'method': 'btc_cad',
+            'btc': '{:.8f}'.format(amount),
+            'cad': '{:.2f}'.format(-amount * rate),
+            'rate': '{:.2f}'.format(rate),
+            'fee': '{:.8f}'.format(amount * 0.005),
+            'order_id': '{:064x}'.format(i),
+        })
+    return trades
+
+
+def public_trades(count=500, seed=0):
+    """Return a /transactions response body with the given length."""
+    rng = random.Random(seed)
+    return [
+        {
+            'date': str(1512345678 - i),
+            'tid': count - i,
+            'price': '{:.2f}'.format(rng.uniform(9000, 11000)),
+            'amount': '{:.8f}'.format(rng.uniform(0.001, 2)),
+            'side': 'buy' if i % 2 else 'sell',
+        }
+        for i in range(count)
+    ]
+
+
+def open_orders(count=20, seed=0):
+    """Return an /open_orders response body with the given length."""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': '{:064x}'.format(i),
+            'datetime': '2017-12-01 00:00:00',
+            'type': i % 2,
+            'price': '{:.2f}'.format(rng.uniform(9000, 11000)),
+            'amount': '{:.8f}'.format(rng.uniform(0.001, 2)),
+            'status': 0,
+        }
+        for i in range(count)
+    ]
+
+
+def encode(body):
+    """Return the given response body encoded as JSON bytes."""
+    return json.dumps(body).encode('utf-8')
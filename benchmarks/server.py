@@ -0,0 +1,222 @@
+"""Local stub of the QuadrigaCX API used by the benchmarks."""
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import multiprocessing
+import threading
+import time
+
+from benchmarks import payloads
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler answering every API call with a canned response."""
+
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one segment to avoid delayed ACK stalls.
+    wbufsize = -1
+    # Bodies larger than the write buffer are sent separately from headers.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body):
+        self.send_body(json.dumps(body).encode('utf-8'))
+
+    def send_body(self, body):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.reply({'last': '1.00', 'bid': '0.99', 'ask': '1.01'})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.reply({'id': '0' * 64})
+
+
+class ExchangeHandler(StubHandler):
+    """Request handler answering API calls with endpoint-specific bodies.
+
+    Bodies are encoded once per server, so the stub adds little CPU time of
+    its own to the measurements.
+    """
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        body = self.server.bodies.get(path)
+        if body is None:
+            self.send_error(404)
+        else:
+            self.send_body(body)
+
+    def do_POST(self):
+        payload = json.loads(
+            self.rfile.read(int(self.headers['Content-Length']))
+        )
+        body = self.server.bodies.get(self.path)
+        if self.path == '/lookup_order':
+            ids = payload['id']
+            if not isinstance(ids, list):
+                ids = [ids]
+            self.reply([
+                {'id': order_id, 'book': 'btc_cad', 'status': '2'}
+                for order_id in ids
+            ])
+        elif body is None:
+            self.send_error(404)
+        else:
+            self.send_body(body)
+
+
+def exchange_bodies(levels=100, trades=100, orders=20):
+    """Return encoded response bodies keyed by endpoint.
+
+    :param levels: Number of price levels per side of /order_book.
+    :type levels: int
+    :param trades: Number of trades returned by /transactions and
+        /user_transactions.
+    :type trades: int
+    :param orders: Number of orders returned by /open_orders.
+    :type orders: int
+    :rtype: dict
+    """
+    order = {
+        'id': 'f' * 64,
+        'datetime': '2017-12-01 00:00:00',
+        'type': 0,
+        'price': '10000.00',
+        'amount': '0.01000000',
+    }
+    bodies = {
+        '/ticker': {
+            'high': '10500.00', 'last': '10000.00', 'timestamp': '1512345678',
+            'volume': '123.45678900', 'vwap': '10012.34', 'low': '9500.00',
+            'ask': '10000.01', 'bid': '9999.99',
+        },
+        '/order_book': payloads.order_book(levels),
+        '/transactions': payloads.public_trades(trades),
+        '/user_transactions': payloads.user_trades(trades),
+        '/open_orders': payloads.open_orders(orders),
+        '/buy': order,
+        '/sell': dict(order, type=1),
+        '/cancel_order': 'true',
+        '/balance': {
+            'btc_available': '1.00000000', 'btc_reserved': '0.00000000',
+            'btc_balance': '1.00000000', 'cad_available': '10000.00',
+            'cad_reserved': '0.00', 'cad_balance': '10000.00', 'fee': '0.5',
+        },
+        '/bitcoin_deposit_address': '1BvBMSEYstWetqTFn5Au4m4GFg7xJaNVN2',
+    }
+    return {
+        endpoint: payloads.encode(body) for endpoint, body in bodies.items()
+    }
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    """Threaded stub server counting connections and requests.
+
+    :param port: Port to listen on (default: random free port).
+    :type port: int
+    :param latency: Number of seconds to wait before each response.
+    :type latency: float
+    :param handler: Request handler class (default: canned responses).
+    :type handler: type
+    :param bodies: Encoded response bodies keyed by endpoint, used by
+        :class:`ExchangeHandler` (default: :func:`exchange_bodies`).
+    :type bodies: dict
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0, handler=StubHandler, bodies=None):
+        HTTPServer.__init__(self, ('127.0.0.1', port), handler)
+        self.latency = latency
+        self.bodies = exchange_bodies() if bodies is None else bodies
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.url = 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def __enter__(self):
+        thread = threading.Thread(
+            target=self.serve_forever,
+            kwargs={'poll_interval': 0.01}
+        )
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def reset(self):
+        """Reset the connection and request counters."""
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+
+
+def _serve(queue, latency, bodies):
+    """Run an exchange stub server until the process is terminated."""
+    server = StubServer(latency=latency, handler=ExchangeHandler,
+                        bodies=bodies)
+    queue.put(server.url)
+    server.serve_forever(poll_interval=0.01)
+
+
+class ServerProcess(object):
+    """Exchange stub server running in a child process.
+
+    Running the server in its own process keeps its CPU time out of the
+    client's measurements.
+
+    :param latency: Number of seconds to wait before each response.
+    :type latency: float
+    :param bodies: Encoded response bodies keyed by endpoint (default:
+        :func:`exchange_bodies`).
+    :type bodies: dict
+    """
+
+    def __init__(self, latency=0, bodies=None):
+        self.latency = latency
+        self.bodies = exchange_bodies() if bodies is None else bodies
+        self.url = None
+        self._process = None
+
+    def __enter__(self):
+        queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_serve, args=(queue, self.latency, self.bodies)
+        )
+        self._process.daemon = True
+        self._process.start()
+        self.url = queue.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        self._process.join()
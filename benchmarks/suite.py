@@ -0,0 +1,271 @@
+"""Throughput, tail latency, CPU and memory of the client stack.
+
+Each scenario calls a QuadrigaClient or OrderBook method against a local stub
+exchange, from one thread (sync) or from a pool of threads (concurrent). The
+stub runs in a child process, so CPU time is the client's own. Results are
+saved per version (by default to benchmarks/results/<version>.json), and can
+be compared with those of another version to spot regressions.
+
+Usage: python -m benchmarks.suite [--calls N] [--threads N]
+                                  [--latency SECONDS] [--levels N]
+                                  [--trades N] [--scenarios NAME [NAME ...]]
+                                  [--label LABEL] [--save PATH]
+                                  [--compare PATH] [--threshold PERCENT]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import json
+import logging
+import os
+import platform
+import threading
+import time
+import timeit
+
+from benchmarks.server import ServerProcess, exchange_bodies
+from quadriga import QuadrigaClient
+from quadriga.version import __version__
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+try:
+    from time import process_time
+except ImportError:  # pragma: no cover
+    # Python 2 has no process-wide CPU clock in the time module.
+    from time import clock as process_time
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+#: Scenario names, numbers of requests per call, and functions returning the
+#: callable to measure for a client.
+SCENARIOS = [
+    ('ticker', 1,
+     lambda client: client.book('btc_cad').get_ticker),
+    ('order_book', 1,
+     lambda client: client.book('btc_cad').get_public_orders),
+    ('order_book_depth_20', 1,
+     lambda client: lambda: client.book('btc_cad').get_public_orders(
+         depth=20
+     )),
+    ('public_trades', 1,
+     lambda client: client.book('btc_cad').get_public_trades),
+    ('user_trades', 1,
+     lambda client: client.book('btc_cad').get_user_trades),
+    ('open_orders', 1,
+     lambda client: client.book('btc_cad').get_user_orders),
+    ('buy_limit_order', 1,
+     lambda client: lambda: client.book('btc_cad').buy_limit_order(
+         '0.01', '10000'
+     )),
+    ('balance', 1,
+     lambda client: client.get_balance),
+    ('tickers_fan_out', len(QuadrigaClient.order_books),
+     lambda client: client.get_tickers),
+    ('buy_limit_order_debug_off', 1,
+     lambda client: lambda: client.book('btc_cad').buy_limit_order(
+         '0.01', '10000'
+     )),
+    ('buy_limit_order_debug_on', 1,
+     lambda client: lambda: client.book('btc_cad').buy_limit_order(
+         '0.01', '10000'
+     )),
+]
+
+
+def discarding_logger(level):
+    """Return a logger set to a level, which discards its records."""
+    logger = logging.getLogger(
+        'quadriga.benchmark.{}'.format(logging.getLevelName(level).lower())
+    )
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+#: Functions returning extra client arguments, keyed by scenario name. The
+#: debug logging scenarios measure the per-call overhead of logging, with
+#: records formatted but discarded.
+CLIENT_KWARGS = {
+    'buy_limit_order_debug_off':
+        lambda: {'logger': discarding_logger(logging.INFO)},
+    'buy_limit_order_debug_on':
+        lambda: {'logger': discarding_logger(logging.DEBUG)},
+}
+
+
+def percentile(sorted_values, percent):
+    """Return a percentile of sorted values (nearest rank)."""
+    index = int(round(percent / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def measure(func, calls, threads):
+    """Call a function from a number of threads and return the timings."""
+    latencies = []
+    per_thread = max(1, calls // threads)
+
+    def worker():
+        timer = timeit.default_timer
+        timings = []
+        for _ in range(per_thread):
+            start = timer()
+            func()
+            timings.append(timer() - start)
+        latencies.extend(timings)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    cpu = process_time()
+    start = timeit.default_timer()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = timeit.default_timer() - start
+    return latencies, elapsed, process_time() - cpu
+
+
+def peak_memory(func, calls):
+    """Return the peak memory allocated while calling a function, in KiB."""
+    if tracemalloc is None:  # pragma: no cover
+        return None
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenario(client, make_func, requests_per_call, calls, threads):
+    """Run a scenario and return its results."""
+    func = make_func(client)
+    func()  # Warm up the connection pool and caches.
+    latencies, elapsed, cpu = measure(func, calls, threads)
+    latencies.sort()
+    requests = len(latencies) * requests_per_call
+    return {
+        'calls': len(latencies),
+        'requests': requests,
+        'rps': requests / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+        'cpu_us': cpu / requests * 1e6,
+        'peak_kib': peak_memory(func, max(1, min(calls, 100) // threads)),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print the change of each result relative to a baseline."""
+    print('\nCompared with {} (Python {}):'.format(
+        baseline['label'], baseline['python']
+    ))
+    print('{:<36} {:>10} {:>10} {:>10}'.format(
+        'scenario', 'req/s', 'p99', 'cpu/req'
+    ))
+    regressions = 0
+    for key in sorted(results):
+        old = baseline['results'].get(key)
+        if old is None:
+            continue
+        new = results[key]
+        cells = []
+        # Higher is better for throughput, lower for latency and CPU.
+        for metric, sign in (('rps', 1), ('p99_ms', -1), ('cpu_us', -1)):
+            change = (new[metric] - old[metric]) / old[metric] * 100
+            worse = sign * change < -threshold
+            regressions += worse
+            cells.append('{:+.1f}%{}'.format(change, '!' if worse else ' '))
+        print('{:<36} {:>10} {:>10} {:>10}'.format(key, *cells))
+    print('{} regression(s) beyond {}% (marked with !)'.format(
+        regressions, threshold
+    ))
+    return regressions
+
+
+def main():
+    names = [name for name, _, _ in SCENARIOS]
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--levels', type=int, default=100)
+    parser.add_argument('--trades', type=int, default=100)
+    parser.add_argument('--scenarios', nargs='+', choices=names,
+                        default=names)
+    parser.add_argument('--label', default=__version__)
+    parser.add_argument('--save', default=None)
+    parser.add_argument('--compare', default=None)
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+
+    bodies = exchange_bodies(levels=args.levels, trades=args.trades)
+    results = {}
+    print('{} calls per scenario, {} threads, {:.0f} ms server latency'
+          .format(args.calls, args.threads, args.latency * 1000))
+    print('{:<36} {:>10} {:>9} {:>9} {:>9} {:>10}'.format(
+        'scenario', 'req/s', 'p50 ms', 'p99 ms', 'cpu us', 'peak KiB'
+    ))
+    with ServerProcess(latency=args.latency, bodies=bodies) as server:
+        for mode, threads in (('sync', 1), ('concurrent', args.threads)):
+            for name, requests_per_call, make_func in SCENARIOS:
+                if name not in args.scenarios:
+                    continue
+                client = QuadrigaClient(
+                    api_key='key',
+                    api_secret='secret',
+                    client_id='id',
+                    max_workers=args.threads,
+                    url=server.url,
+                    **CLIENT_KWARGS.get(name, dict)()
+                )
+                key = '{}/{}'.format(mode, name)
+                result = run_scenario(
+                    client, make_func, requests_per_call, args.calls, threads
+                )
+                client.close()
+                results[key] = result
+                print('{:<36} {:>10.0f} {:>9.2f} {:>9.2f} {:>9.1f} {:>10}'
+                      .format(key, result['rps'], result['p50_ms'],
+                              result['p99_ms'], result['cpu_us'],
+                              '-' if result['peak_kib'] is None
+                              else '{:.1f}'.format(result['peak_kib'])))
+
+    report = {
+        'label': args.label,
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': int(time.time()),
+        'config': {
+            'calls': args.calls,
+            'threads': args.threads,
+            'latency': args.latency,
+            'levels': args.levels,
+            'trades': args.trades,
+        },
+        'results': results,
+    }
+    path = args.save or os.path.join(RESULTS_DIR, args.label + '.json')
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as fp:
+        json.dump(report, fp, indent=2, sort_keys=True)
+    print('\nResults saved to {}'.format(path))
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp), args.threshold)
+
+
+if __name__ == '__main__':
+    main()
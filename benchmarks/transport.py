@@ -0,0 +1,80 @@
+"""Connection reuse of HTTP transports under concurrent load.
+
+Usage: python -m benchmarks.transport [--threads N] [--requests N]
+                                      [--latency SECONDS]
+"""
+from __future__ import absolute_import, unicode_literals, division, \
+    print_function
+
+import argparse
+import logging
+import threading
+import timeit
+
+import requests
+
+from benchmarks.server import StubServer
+from quadriga import QuadrigaClient
+from quadriga.transport import RequestsTransport, Urllib3Transport
+
+
+def run(server, client, threads, requests_per_thread):
+    """Send requests from many threads and return the measurements."""
+    server.reset()
+    book = client.book('btc_cad')
+
+    def worker():
+        for _ in range(requests_per_thread):
+            book.get_ticker()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = timeit.default_timer()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = timeit.default_timer() - start
+    return {
+        'requests': server.requests,
+        'connections': server.connections,
+        'reuse': 1 - server.connections / server.requests,
+        'rps': server.requests / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+    # Silence "connection pool is full" warnings, which are counted instead.
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+
+    transports = [
+        ('requests.Session() (pool of 10)',
+         lambda: RequestsTransport(session=requests.Session())),
+        ('RequestsTransport (pool of {})'.format(args.threads),
+         lambda: RequestsTransport(pool_maxsize=args.threads)),
+        ('Urllib3Transport (pool of {})'.format(args.threads),
+         lambda: Urllib3Transport(pool_maxsize=args.threads)),
+    ]
+    print('{} threads x {} requests, {:.0f} ms server latency'.format(
+        args.threads, args.requests, args.latency * 1000
+    ))
+    print('{:<36} {:>12} {:>10} {:>10}'.format(
+        'transport', 'connections', 'reuse', 'req/s'
+    ))
+    with StubServer(latency=args.latency) as server:
+        for name, make_transport in transports:
+            transport = make_transport()
+            client = QuadrigaClient(transport=transport, url=server.url)
+            result = run(server, client, args.threads, args.requests)
+            transport.close()
+            print('{:<36} {:>12} {:>9.1%} {:>10.0f}'.format(
+                name, result['connections'], result['reuse'], result['rps']
+            ))
+
+
+if __name__ == '__main__':
+    main()
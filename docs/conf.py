@@ -159,3 +159,6 @@ texinfo_documents = [
 ]
 
 autodoc_member_order = 'bysource'
+
+# Optional dependencies, which may not be installed when building the docs.
+autodoc_mock_imports = ['aiohttp']
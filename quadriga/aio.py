@@ -0,0 +1,511 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import asyncio
+import logging
+import threading
+
+import aiohttp
+
+from quadriga.book import OrderBook, _RecentIds
+from quadriga.client import QuadrigaClient
+from quadriga.replica import OrderBookReplica
+from quadriga.rest import RestClient
+from quadriga.transport import Response
+from quadriga.version import __version__
+
+
+try:
+    _get_running_loop = asyncio.get_running_loop
+except AttributeError:  # pragma: no cover
+    # Python 3.6 has no get_running_loop, and get_event_loop returns the
+    # running loop when called from a coroutine.
+    _get_running_loop = asyncio.get_event_loop
+
+
+class AsyncResponse(Response):
+    """Fully-read aiohttp response exposing the requests.Response attributes
+    used by :class:`quadriga.exceptions.RequestError`.
+
+    :param response: Released aiohttp response.
+    :type response: aiohttp.ClientResponse
+    :param content: Raw response body.
+    :type content: bytes
+    """
+
+    def __init__(self, response, content):
+        super(AsyncResponse, self).__init__(
+            url=str(response.url),
+            status_code=response.status,
+            reason=response.reason,
+            headers=response.headers,
+            content=content,
+            encoding=response.get_encoding()
+        )
+
+
+class AsyncRestClient(RestClient):
+    """Asyncio REST client using HMAC SHA256 authentication.
+
+    Rate limiting, request metrics, lifecycle hooks and request logging work
+    as they do for :class:`quadriga.rest.RestClient`. Response caching is not
+    supported.
+
+    :param url: QuadrigaCX URL.
+    :type url: str | unicode
+    :param api_key: QuadrigaCX API key.
+    :type api_key: str | unicode
+    :param api_secret: QuadrigaCX API secret.
+    :type api_secret: str | unicode
+    :param client_id: QuadrigaCX client ID (number used for user login).
+    :type client_id: str | unicode | int
+    :param timeout: Number of seconds to wait for QuadrigaCX to respond to an
+        API request.
+    :type timeout: int | float
+    :param session: User-defined aiohttp.ClientSession object. If not set, a
+        session is created on the first request.
+    :type session: aiohttp.ClientSession
+    :param max_connections: Maximum number of pooled connections used by the
+        session created on the first request.
+    :type max_connections: int
+    :param decoder: Decoder for response bodies.
+    :type decoder: quadriga.decoding.JSONDecoder
+    :param nonce_generator: Generator of nonces for signed requests.
+    :type nonce_generator: quadriga.nonce.NonceGenerator
+    :param rate_limiter: Rate limiter which requests must pass through before
+        they are sent. Requests wait for it in the event loop's default
+        executor, so the event loop is not blocked.
+    :type rate_limiter: quadriga.ratelimit.RateLimiter
+    :param metrics: Request metrics to record each request in.
+    :type metrics: quadriga.metrics.RequestMetrics
+    :param hooks: Request lifecycle hooks.
+    :type hooks: quadriga.tracing.Hooks
+    :param logger: Logger to record the outcome and latency of each request
+        with, at debug level.
+    :type logger: logging.Logger
+    """
+
+    def __init__(self,
+                 url,
+                 api_key,
+                 api_secret,
+                 client_id,
+                 timeout,
+                 session=None,
+                 max_connections=100,
+                 decoder=None,
+                 nonce_generator=None,
+                 rate_limiter=None,
+                 metrics=None,
+                 hooks=None,
+                 logger=None):
+        super(AsyncRestClient, self).__init__(
+            url=url,
+            api_key=api_key,
+            api_secret=api_secret,
+            client_id=client_id,
+            timeout=timeout,
+            transport=None,
+            nonce_generator=nonce_generator,
+            rate_limiter=rate_limiter,
+            decoder=decoder,
+            metrics=metrics,
+            hooks=hooks,
+            logger=logger
+        )
+        self._session = session
+        self._owns_session = session is None
+        self._max_connections = max_connections
+        self._client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    def _get_session(self):
+        """Return the HTTP session, creating it if necessary.
+
+        The session must be created while the event loop is running.
+
+        :return: HTTP session.
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_connections,
+                    limit_per_host=self._max_connections
+                )
+            )
+        return self._session
+
+    async def _acquire(self, method, endpoint):
+        """Wait for the rate limiter, if any, without blocking the event loop.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        """
+        if self._rate_limiter is not None:
+            await _get_running_loop().run_in_executor(
+                None, self._rate_limiter.acquire, method, endpoint
+            )
+
+    async def _fetch(self, method, endpoint, data):
+        """Send an HTTP request to QuadrigaCX and read the response.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param data: URL parameters for GET requests, signed payload for POST
+            requests.
+        :type data: dict
+        :return: Fully-read response.
+        :rtype: quadriga.aio.AsyncResponse
+        """
+        if method == 'GET':
+            kwargs = {'params': data}
+        else:
+            kwargs = {'json': data}
+        async with self._get_session().request(
+            method=method,
+            url=self._url + endpoint,
+            timeout=self._client_timeout,
+            **kwargs
+        ) as resp:
+            content = await resp.read()
+        return AsyncResponse(resp, content)
+
+    async def _request(self, method, endpoint, data=None, parser=None):
+        """Send an HTTP request to QuadrigaCX and handle the response.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param data: URL parameters for GET requests, payload (not yet signed)
+            for POST requests.
+        :type data: dict
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        if self._is_instrumented():
+            return await self._send(method, endpoint, data, parser)
+        await self._acquire(method, endpoint)
+        if method == 'POST':
+            data = self._sign(data)
+        response = await self._fetch(method, endpoint, data)
+        return self._handle_response(response, parser)
+
+    async def _send(self, method, endpoint, data, parser=None):
+        """Send an HTTP request to QuadrigaCX, timing each phase.
+
+        Hooks are called along the way, and metrics are recorded at the end.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param data: URL parameters for GET requests, payload (not yet signed)
+            for POST requests.
+        :type data: dict
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        span = self._start_span(method, endpoint, data)
+        if self._rate_limiter is not None:
+            await self._acquire(method, endpoint)
+            span.mark('rate_limit')
+        metrics = self._prepare_span(span, data)
+        try:
+            self.hooks.run('pre_send', span)
+            span.response = await self._fetch(method, endpoint, span.data)
+            return self._finish_span(span, parser)
+        except Exception as err:
+            self._fail_span(span, err)
+            raise
+        finally:
+            self._complete(span, metrics)
+
+    async def get(self, endpoint, params=None, parser=None):
+        """Send an HTTP GET request to QuadrigaCX.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param params: URL parameters.
+        :type params: dict
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        return await self._request('GET', endpoint, params, parser)
+
+    async def post(self, endpoint, payload=None):
+        """Send an HTTP POST request to QuadrigaCX.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param payload: Request payload.
+        :type payload: dict
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        return await self._request('POST', endpoint, payload)
+
+    async def close(self):
+        """Close the HTTP session if it was created by this client."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncOrderBook(OrderBook):
+    """Asyncio API wrapper for an order book on QuadrigaCX.
+
+    Methods are the same as those of :class:`quadriga.book.OrderBook` but
+    return coroutines. This class is not meant to be imported or instantiated
+    directly. Use method :func:`quadriga.aio.AsyncQuadrigaClient.book` instead.
+    """
+
+    def __repr__(self):
+        return '<AsyncOrderBook \'{}\'>'.format(self.name)
+
+    async def _get(self, endpoint, params, callback=None, parser=None):
+        body = await self._rest_client.get(
+            endpoint=endpoint,
+            params=params,
+            parser=parser
+        )
+        return body if callback is None else callback(body)
+
+    async def _post(self, endpoint, payload, callback=None):
+        body = await self._rest_client.post(endpoint=endpoint, payload=payload)
+        return body if callback is None else callback(body)
+
+    async def iter_user_trades(self, page_size=100, sort='desc', typed=False,
+                               window=1000):
+        """Iterate over user's entire trade history, one page at a time.
+
+        This is an asynchronous generator with the same behaviour as
+        :func:`quadriga.book.OrderBook.iter_user_trades`.
+        """
+        self._log('iterate user trades')
+        next_page = asyncio.ensure_future(
+            self.get_user_trades(page_size, 0, sort)
+        )
+        offset = 0
+        seen = _RecentIds(window)
+        try:
+            while next_page is not None:
+                page = await next_page
+                offset += len(page)
+                next_page = None
+                if len(page) >= page_size:
+                    next_page = asyncio.ensure_future(
+                        self.get_user_trades(page_size, offset, sort)
+                    )
+                for row in self._new_user_trades(page, seen, typed):
+                    yield row
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+
+class AsyncOrderBookReplica(OrderBookReplica):
+    """Local replica of an order book, refreshed asynchronously.
+
+    Queries are the same as those of :class:`quadriga.replica.OrderBookReplica`
+    and do not block. Only :func:`refresh` returns a coroutine. This class is
+    not meant to be imported or instantiated directly. Use method
+    :func:`quadriga.aio.AsyncQuadrigaClient.replica` instead.
+    """
+
+    def __init__(self, book):
+        super(AsyncOrderBookReplica, self).__init__(book)
+        self._lock = None
+
+    async def refresh(self, max_age=None):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        refreshes = self._refreshes
+        async with self._lock:
+            if self._refreshes != refreshes:
+                return False
+            age = self.age
+            if max_age is not None and age is not None and age <= max_age:
+                return False
+            self.load(await self._book.get_public_orders(group=True))
+            self._refreshes += 1
+            return True
+
+
+class AsyncQuadrigaClient(QuadrigaClient):
+    """Asyncio Python client for QuadrigaCX's `REST API v2`_.
+
+    Methods are the same as those of :class:`quadriga.client.QuadrigaClient`
+    but return coroutines. Requests share a pooled aiohttp session, so a single
+    event loop can keep many of them in flight (e.g. with ``asyncio.gather``).
+
+    :param api_key: QuadrigaCX API key.
+    :type api_key: str | unicode
+    :param api_secret: QuadrigaCX API secret.
+    :type api_secret: str | unicode
+    :param client_id: QuadrigaCX client ID (number used for user login).
+    :type client_id: str | unicode | int
+    :param timeout: Number of seconds to wait for QuadrigaCX to respond to an
+        API request.
+    :type timeout: int | float
+    :param session: User-defined aiohttp.ClientSession object. If not set, a
+        session with a pool of **max_connections** connections is created on
+        the first request and closed by :func:`close`.
+    :type session: aiohttp.ClientSession
+    :param logger: Logger to record debug messages with. If not set,
+        ``logging.getLogger('quadriga')`` is used by default.
+    :type logger: logging.Logger
+    :param max_connections: Maximum number of pooled connections (default:
+        100), also used to bound the concurrency of bulk methods such as
+        :func:`get_tickers`. The pool size is ignored if **session** is given.
+    :type max_connections: int
+    :param decoder: Decoder for response bodies. See :doc:`decoding` for
+        details.
+    :type decoder: quadriga.decoding.JSONDecoder
+    :param nonce_generator: Generator of nonces for signed (private) API
+        calls. If not set, an in-memory
+        :class:`quadriga.nonce.NonceGenerator` is used by default.
+    :type nonce_generator: quadriga.nonce.NonceGenerator
+    :param rate_limiter: Client-side rate limiter. Requests wait for it in the
+        event loop's default executor, so they do not block the event loop.
+        See :doc:`ratelimit` for details.
+    :type rate_limiter: quadriga.ratelimit.RateLimiter
+    :param metrics: Request metrics. See :doc:`metrics` for details.
+    :type metrics: quadriga.metrics.RequestMetrics
+    :param hooks: Request lifecycle hooks, called from the event loop. See
+        :doc:`tracing` for details.
+    :type hooks: quadriga.tracing.Hooks
+    :param url: QuadrigaCX API base URL. If not set, :attr:`url` is used.
+    :type url: str | unicode
+
+    .. note::
+        This class requires Python 3.6+ and aiohttp_.
+
+    .. note::
+        Response caching (**cache**) is not supported, as
+        :class:`quadriga.cache.ResponseCache` blocks callers waiting for the
+        same response.
+
+    .. _REST API v2: https://www.quadrigacx.com/api_info
+    .. _aiohttp: https://github.com/aio-libs/aiohttp
+    """
+
+    def __init__(self,
+                 api_key=None,
+                 api_secret=None,
+                 client_id=None,
+                 timeout=None,
+                 session=None,
+                 logger=None,
+                 max_connections=100,
+                 decoder=None,
+                 nonce_generator=None,
+                 rate_limiter=None,
+                 metrics=None,
+                 hooks=None,
+                 url=None):
+        self._logger = logger or logging.getLogger('quadriga')
+        self._rest_client = AsyncRestClient(
+            url=url or self.url,
+            api_key=api_key,
+            api_secret=api_secret,
+            client_id=client_id,
+            timeout=timeout,
+            session=session,
+            max_connections=max_connections,
+            decoder=decoder,
+            nonce_generator=nonce_generator,
+            rate_limiter=rate_limiter,
+            metrics=metrics,
+            hooks=hooks,
+            logger=self._child_logger('rest')
+        )
+        self._max_workers = max_connections
+        self._replicas = {}
+        self._replicas_lock = threading.Lock()
+
+    _replica_class = AsyncOrderBookReplica
+
+    def __repr__(self):
+        return '<AsyncQuadrigaClient v{}>'.format(__version__)
+
+    def __enter__(self):
+        raise TypeError('Use "async with" with AsyncQuadrigaClient')
+
+    def __exit__(self, *exc_info):  # pragma: no cover
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _post(self, endpoint, payload=None, callback=None):
+        body = await self._rest_client.post(endpoint=endpoint, payload=payload)
+        return body if callback is None else callback(body)
+
+    async def fan_out(self, books, method, **kwargs):
+        books = sorted(self.order_books if books is None else set(books))
+        for book in books:
+            self._validate_order_book(book)
+        results = await self._run_concurrently(
+            lambda book: getattr(self.book(book), method)(**kwargs),
+            books
+        )
+        return dict(zip(books, results))
+
+    async def _run_concurrently(self, func, items):
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def call(item):
+            async with semaphore:
+                return await func(item)
+
+        return list(await asyncio.gather(
+            *[call(item) for item in items],
+            return_exceptions=True
+        ))
+
+    async def lookup_orders(self, order_ids, chunk_size=100):
+        chunks = self._chunk_ids(order_ids, chunk_size)
+        self._log('look up orders in %d chunks', len(chunks))
+        results = await self._run_concurrently(self.lookup_order, chunks)
+        return self._merge_lookups(chunks, results)
+
+    async def cancel_all(self, book=None):
+        open_orders = await self.fan_out(
+            None if book is None else [book], 'get_user_orders'
+        )
+        order_ids = self._open_order_ids(open_orders)
+        results = dict(zip(order_ids, await self.cancel_orders(order_ids)))
+        return self._cancel_results(open_orders, results)
+
+    async def close(self):
+        """Close the HTTP session if it was created by this client."""
+        await self._rest_client.close()
+
+    def book(self, name):
+        """Return an asyncio API wrapper for the given order book.
+
+        :param name: Order book name (e.g. "btc_cad").
+        :type name: str | unicode
+        :return: Order book API wrapper.
+        :rtype: quadriga.aio.AsyncOrderBook
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        self._validate_order_book(name)
+        return AsyncOrderBook(name, self._rest_client, self._logger)
@@ -0,0 +1,273 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import numpy as np
+
+
+def _levels(levels):
+    """Convert price levels to a contiguous (n, 2) float64 array.
+
+    :param levels: Price levels as [price, amount] pairs.
+    :type levels: list
+    :rtype: numpy.ndarray
+    """
+    if len(levels) == 0:
+        return np.empty((0, 2))
+    return np.array(levels, dtype=np.float64).reshape(-1, 2)
+
+
+class _SideArrays(object):
+    """Price levels of one side of an order book as arrays, best price first.
+
+    :param levels: Price levels as an (n, 2) array, in any order.
+    :type levels: numpy.ndarray
+    :param descending: If set to True, higher prices are better (bids).
+    :type descending: bool
+    """
+
+    __slots__ = ('descending', 'prices', 'amounts', 'depths', 'notionals')
+
+    def __init__(self, levels, descending):
+        keys = -levels[:, 0] if descending else levels[:, 0]
+        levels = levels[np.argsort(keys, kind='mergesort')]
+        self.descending = descending
+        self.prices = np.ascontiguousarray(levels[:, 0])
+        self.amounts = np.ascontiguousarray(levels[:, 1])
+        self.depths = np.cumsum(self.amounts)
+        self.notionals = np.cumsum(self.prices * self.amounts)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def count_within(self, bounds):
+        """Return the number of levels at each bound price or better."""
+        if self.descending:
+            return np.searchsorted(-self.prices, -bounds, side='right')
+        return np.searchsorted(self.prices, bounds, side='right')
+
+    def depth_at(self, counts):
+        """Return the cumulative amounts of the first **counts** levels."""
+        depths = np.concatenate(([0.0], self.depths))
+        return depths[counts]
+
+
+class BookArrays(object):
+    """Order book snapshot as contiguous NumPy arrays, for batched analytics.
+
+    Queries take arrays (or scalars) of sizes or distances, and answer them
+    all in a few vectorized operations instead of walking the price levels
+    once per query. Prices and amounts are float64 values: results are
+    estimates, not exact decimal amounts.
+
+    Sides are given as "buy" or "sell" for market order estimates (a buy
+    order fills against asks, and a sell order against bids), and as "bids" or
+    "asks" for depth queries.
+
+    :param bids: Bids as [price, amount] pairs, in any order.
+    :type bids: list | numpy.ndarray
+    :param asks: Asks as [price, amount] pairs, in any order.
+    :type asks: list | numpy.ndarray
+    :param timestamp: Timestamp of the snapshot.
+    :type timestamp: str | unicode
+    """
+
+    def __init__(self, bids, asks, timestamp=None):
+        self.timestamp = timestamp
+        self._bids = _SideArrays(_levels(bids), descending=True)
+        self._asks = _SideArrays(_levels(asks), descending=False)
+
+    def __repr__(self):
+        return '<BookArrays bids={} asks={}>'.format(
+            len(self._bids), len(self._asks)
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Create arrays from an /order_book response body.
+
+        :param snapshot: Response body of
+            :func:`quadriga.book.OrderBook.get_public_orders` (grouped or not).
+        :type snapshot: dict
+        :rtype: quadriga.analytics.BookArrays
+        """
+        return cls(
+            snapshot['bids'], snapshot['asks'], snapshot.get('timestamp')
+        )
+
+    @classmethod
+    def from_replica(cls, replica):
+        """Create arrays from the current content of an order book replica.
+
+        :param replica: Order book replica.
+        :type replica: quadriga.replica.OrderBookReplica
+        :rtype: quadriga.analytics.BookArrays
+        """
+        return cls(
+            replica.levels('bids'), replica.levels('asks'), replica.timestamp
+        )
+
+    def _side(self, side):
+        """Return the arrays of the side a query runs against.
+
+        :param side: "buy" or "asks" for asks, "sell" or "bids" for bids.
+        :type side: str | unicode
+        :rtype: quadriga.analytics._SideArrays
+        :raise ValueError: If an invalid side is given.
+        """
+        if side in ('buy', 'asks'):
+            return self._asks
+        if side in ('sell', 'bids'):
+            return self._bids
+        raise ValueError('Invalid order book side: {}'.format(side))
+
+    @property
+    def best_bid(self):
+        """Return the highest bid price, or NaN if there are no bids.
+
+        :rtype: float
+        """
+        return self._bids.prices[0] if len(self._bids) else np.nan
+
+    @property
+    def best_ask(self):
+        """Return the lowest ask price, or NaN if there are no asks.
+
+        :rtype: float
+        """
+        return self._asks.prices[0] if len(self._asks) else np.nan
+
+    @property
+    def mid_price(self):
+        """Return the average of the best bid and ask prices.
+
+        :rtype: float
+        """
+        return (self.best_bid + self.best_ask) / 2
+
+    @property
+    def spread(self):
+        """Return the difference between the best ask and bid prices.
+
+        :rtype: float
+        """
+        return self.best_ask - self.best_bid
+
+    def depth_curve(self, side):
+        """Return the cumulative depth curve of a side of the order book.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :return: Prices (best first) and the cumulative amounts offered at
+            each price or better.
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        return levels.prices, levels.depths
+
+    def fill_price(self, side, sizes):
+        """Return the expected average fill prices of market orders.
+
+        :param side: Order side ("buy" or "sell").
+        :type side: str | unicode
+        :param sizes: Order sizes in major currency.
+        :type sizes: float | array_like
+        :return: Average fill prices. Sizes larger than the order book's
+            depth get NaN. Zero sizes get the best price.
+        :rtype: float | numpy.ndarray
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        if not len(levels):
+            return np.full(sizes.shape, np.nan)[()]
+        # Index of the level at which each order is completely filled.
+        index = np.searchsorted(levels.depths, sizes, side='left')
+        filled = index < len(levels)
+        index = np.minimum(index, len(levels) - 1)
+        previous = index - 1
+        has_previous = previous >= 0
+        depth_before = np.where(has_previous, levels.depths[previous], 0.0)
+        notional_before = np.where(
+            has_previous, levels.notionals[previous], 0.0
+        )
+        notional = (
+            notional_before + (sizes - depth_before) * levels.prices[index]
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            prices = np.where(sizes > 0, notional / sizes, levels.prices[0])
+        return np.where(filled, prices, np.nan)[()]
+
+    def slippage(self, side, sizes):
+        """Return the expected slippage of market orders in basis points.
+
+        Slippage is the difference between the average fill price and the
+        best price, in the direction which costs the order (i.e. positive).
+
+        :param side: Order side ("buy" or "sell").
+        :type side: str | unicode
+        :param sizes: Order sizes in major currency.
+        :type sizes: float | array_like
+        :return: Slippage in basis points. Sizes larger than the order book's
+            depth get NaN.
+        :rtype: float | numpy.ndarray
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        prices = self.fill_price(side, sizes)
+        if not len(levels):
+            return prices
+        best = levels.prices[0]
+        sign = -1 if levels.descending else 1
+        return sign * (prices - best) / best * 10000
+
+    def size_within(self, side, bps):
+        """Return the amounts offered within distances of the best price.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :param bps: Distances from the best price in basis points.
+        :type bps: float | array_like
+        :return: Cumulative amounts.
+        :rtype: float | numpy.ndarray
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        bps = np.asarray(bps, dtype=np.float64)
+        if not len(levels):
+            return np.zeros(bps.shape)[()]
+        ratio = bps / 10000
+        best = levels.prices[0]
+        bounds = best * (1 - ratio if levels.descending else 1 + ratio)
+        return levels.depth_at(levels.count_within(bounds))[()]
+
+    def imbalance(self, bps=None, levels=None):
+        """Return the order book imbalance.
+
+        Imbalance is (bid depth - ask depth) / (bid depth + ask depth), from
+        -1 (asks only) to 1 (bids only). By default, the whole order book is
+        used.
+
+        :param bps: Distances from the best prices in basis points. If set,
+            imbalances are computed over the depth within each distance.
+        :type bps: float | array_like
+        :param levels: Numbers of price levels from the top of each side. If
+            set, imbalances are computed over the depth of those levels.
+        :type levels: int | array_like
+        :return: Imbalances. NaN where both sides are empty.
+        :rtype: float | numpy.ndarray
+        """
+        bids, asks = self._bids, self._asks
+        if bps is not None:
+            bid_depth = self.size_within('bids', bps)
+            ask_depth = self.size_within('asks', bps)
+        elif levels is not None:
+            levels = np.asarray(levels)
+            bid_depth = bids.depth_at(np.minimum(levels, len(bids)))
+            ask_depth = asks.depth_at(np.minimum(levels, len(asks)))
+        else:
+            bid_depth = bids.depths[-1] if len(bids) else 0.0
+            ask_depth = asks.depths[-1] if len(asks) else 0.0
+        bid_depth = np.asarray(bid_depth, dtype=np.float64)
+        total = bid_depth + ask_depth
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ((bid_depth - ask_depth) / total)[()]
@@ -0,0 +1,243 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from array import array
+from bisect import bisect_left
+
+
+class Bars(object):
+    """OHLCV bars of a single resolution, stored in typed arrays.
+
+    Each field is kept in its own ``array.array`` column, so a bar costs a few
+    dozen bytes instead of a dict or object. Bars are only created for
+    intervals in which at least one trade took place.
+
+    :param resolution: Bar length in seconds.
+    :type resolution: int
+    :param maxlen: Maximum number of bars kept. If set, the oldest bars are
+        dropped first. If not set, all bars are kept.
+    :type maxlen: int
+    """
+
+    fields = (
+        'start', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'trades'
+    )
+
+    def __init__(self, resolution, maxlen=None):
+        self.resolution = resolution
+        self.maxlen = maxlen
+        self.start = array(str('d'))
+        self.open = array(str('d'))
+        self.high = array(str('d'))
+        self.low = array(str('d'))
+        self.close = array(str('d'))
+        self.volume = array(str('d'))
+        self.notional = array(str('d'))
+        self.trades = array(str('l'))
+
+    def __repr__(self):
+        return '<Bars resolution={} bars={}>'.format(
+            self.resolution, len(self)
+        )
+
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, index):
+        """Return a bar as a dict.
+
+        :param index: Bar index (negative indexes count from the latest bar).
+        :type index: int
+        :rtype: dict
+        """
+        return dict(zip(self.fields, (
+            self.start[index], self.open[index], self.high[index],
+            self.low[index], self.close[index], self.volume[index],
+            self.vwap(index), self.trades[index]
+        )))
+
+    def _columns(self):
+        return (
+            self.start, self.open, self.high, self.low, self.close,
+            self.volume, self.notional, self.trades
+        )
+
+    def vwap(self, index):
+        """Return the volume-weighted average price of a bar.
+
+        :param index: Bar index.
+        :type index: int
+        :rtype: float
+        """
+        volume = self.volume[index]
+        return self.notional[index] / volume if volume else self.close[index]
+
+    def _insert(self, index, start, price, amount):
+        """Insert a bar holding a single trade, and drop the oldest bars.
+
+        :param index: Position of the new bar.
+        :type index: int
+        :param start: Bar start time.
+        :type start: float
+        :param price: Trade price.
+        :type price: float
+        :param amount: Traded amount.
+        :type amount: float
+        """
+        for column, value in zip(self._columns(), (
+            start, price, price, price, price, amount, price * amount, 1
+        )):
+            column.insert(index, value)
+        if self.maxlen is not None and len(self.start) > self.maxlen:
+            excess = len(self.start) - self.maxlen
+            for column in self._columns():
+                del column[:excess]
+
+    def add(self, timestamp, price, amount):
+        """Add a trade to the bar covering its timestamp.
+
+        Trades older than the latest bar (e.g. received late) are added to the
+        bar covering them, which is created if needed. They do not change the
+        open and close prices of existing bars.
+
+        :param timestamp: Trade time as a Unix timestamp.
+        :type timestamp: int | float
+        :param price: Trade price.
+        :type price: float
+        :param amount: Traded amount.
+        :type amount: float
+        """
+        start = timestamp - timestamp % self.resolution
+        starts = self.start
+        if not len(starts) or start > starts[-1]:
+            return self._insert(len(starts), start, price, amount)
+        if start == starts[-1]:
+            index = len(starts) - 1
+            self.close[index] = price
+        else:
+            index = bisect_left(starts, start)
+            if starts[index] != start:
+                return self._insert(index, start, price, amount)
+        if price > self.high[index]:
+            self.high[index] = price
+        if price < self.low[index]:
+            self.low[index] = price
+        self.volume[index] += amount
+        self.notional[index] += price * amount
+        self.trades[index] += 1
+
+    @classmethod
+    def from_arrays(cls, resolution, timestamps, prices, amounts):
+        """Build bars from arrays of recorded trades in one vectorized pass.
+
+        This method requires NumPy.
+
+        :param resolution: Bar length in seconds.
+        :type resolution: int
+        :param timestamps: Trade times as Unix timestamps, in any order.
+        :type timestamps: array_like
+        :param prices: Trade prices.
+        :type prices: array_like
+        :param amounts: Traded amounts.
+        :type amounts: array_like
+        :rtype: quadriga.bars.Bars
+        """
+        # NumPy is optional, and only needed for batch mode.
+        import numpy as np
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        order = np.argsort(timestamps, kind='mergesort')
+        timestamps = timestamps[order]
+        prices = np.asarray(prices, dtype=np.float64)[order]
+        amounts = np.asarray(amounts, dtype=np.float64)[order]
+
+        bars = cls(resolution)
+        if not len(timestamps):
+            return bars
+        starts = timestamps - timestamps % resolution
+        first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+        last = np.concatenate((first[1:], [len(starts)])) - 1
+        for column, values in zip(bars._columns(), (
+            starts[first],
+            prices[first],
+            np.maximum.reduceat(prices, first),
+            np.minimum.reduceat(prices, first),
+            prices[last],
+            np.add.reduceat(amounts, first),
+            np.add.reduceat(prices * amounts, first),
+            last - first + 1,
+        )):
+            column.extend(values.tolist())
+        return bars
+
+
+class BarAggregator(object):
+    """Incremental aggregation of trades into bars of several resolutions.
+
+    Each trade is consumed once and updates the current bar of every
+    resolution, so bars never need to be rebuilt from the full trade history.
+    Trades can be fed straight from a :class:`quadriga.tape.TradeTape`:
+
+    .. code-block:: python
+
+        tape.subscribe(aggregator.add_trades)
+
+    :param resolutions: Bar lengths in seconds (default: 1 second, 1 minute
+        and 5 minutes).
+    :type resolutions: [int]
+    :param maxlen: Maximum number of bars kept per resolution. If not set,
+        all bars are kept.
+    :type maxlen: int
+    """
+
+    def __init__(self, resolutions=(1, 60, 300), maxlen=None):
+        self._bars = [Bars(resolution, maxlen) for resolution in resolutions]
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<BarAggregator resolutions={}>'.format(
+            [bars.resolution for bars in self._bars]
+        )
+
+    def add(self, timestamp, price, amount):
+        """Add a trade to the bars of every resolution.
+
+        :param timestamp: Trade time as a Unix timestamp.
+        :type timestamp: int | float | str | unicode
+        :param price: Trade price.
+        :type price: float | str | unicode | decimal.Decimal
+        :param amount: Traded amount.
+        :type amount: float | str | unicode | decimal.Decimal
+        """
+        timestamp = float(timestamp)
+        price, amount = float(price), float(amount)
+        with self._lock:
+            for bars in self._bars:
+                bars.add(timestamp, price, amount)
+
+    def add_trades(self, trades):
+        """Add public trades to the bars of every resolution.
+
+        :param trades: Trades as returned by
+            :func:`quadriga.book.OrderBook.get_public_trades` (dicts or
+            :class:`quadriga.models.Trade` objects), oldest first.
+        :type trades: collections.Iterable[dict | quadriga.models.Trade]
+        """
+        for trade in trades:
+            if isinstance(trade, dict):
+                self.add(trade['date'], trade['price'], trade['amount'])
+            else:
+                self.add(trade.date, trade.price, trade.amount)
+
+    def bars(self, resolution):
+        """Return the bars of a resolution.
+
+        :param resolution: Bar length in seconds.
+        :type resolution: int
+        :rtype: quadriga.bars.Bars
+        :raise KeyError: If the resolution is not aggregated.
+        """
+        for bars in self._bars:
+            if bars.resolution == resolution:
+                return bars
+        raise KeyError(resolution)
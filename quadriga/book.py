@@ -1,5 +1,42 @@
 from __future__ import absolute_import, unicode_literals, division
 
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from quadriga.decoding import OrderBookParser
+from quadriga.models import BookLevel, Order, Ticker, Trade, UserTrade
+
+
+class _RecentIds(object):
+    """Bounded set of the most recently added IDs.
+
+    :param size: Maximum number of IDs remembered.
+    :type size: int
+    """
+
+    __slots__ = ('_ids', '_order', '_size')
+
+    def __init__(self, size):
+        self._ids = set()
+        self._order = deque()
+        self._size = size
+
+    def add(self, item):
+        """Remember an ID, forgetting the oldest one if the set is full.
+
+        :param item: ID to remember.
+        :return: True if the ID was not remembered already, False otherwise.
+        :rtype: bool
+        """
+        if item in self._ids:
+            return False
+        self._ids.add(item)
+        self._order.append(item)
+        if len(self._order) > self._size:
+            self._ids.discard(self._order.popleft())
+        return True
+
 
 class OrderBook(object):
     """API wrapper for an order book on QuadrigaCX.
@@ -26,70 +63,144 @@ class OrderBook(object):
     def __repr__(self):
         return '<OrderBook \'{}\'>'.format(self.name)
 
-    def _log(self, message):
+    def _log(self, message, *args):
         """Log a debug message prefixed with order book name.
 
-        :param message: Debug message.
+        Nothing is formatted unless debug logging is enabled. Records carry
+        the order book name as the ``book`` attribute.
+
+        :param message: Debug message, with %-style placeholders for **args**.
         :type message: str | unicode
+        :param args: Values for the placeholders in the message.
+        """
+        logger = self._logger
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                '%s: ' + message, self.name, *args,
+                extra={'book': self.name}
+            )
+
+    def _get(self, endpoint, params, callback=None, parser=None):
+        """Send an HTTP GET request and post-process the response body.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param params: URL parameters.
+        :type params: dict
+        :param callback: Function applied to the response body, if given.
+        :type callback: callable
+        :param parser: Function parsing the raw response body, if given.
+        :type parser: callable
+        :return: Response body, optionally post-processed.
         """
-        self._logger.debug("{}: {}".format(self.name, message))
+        body = self._rest_client.get(
+            endpoint=endpoint,
+            params=params,
+            parser=parser
+        )
+        return body if callback is None else callback(body)
+
+    def _post(self, endpoint, payload, callback=None):
+        """Send an HTTP POST request and post-process the response body.
 
-    def get_ticker(self):
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param payload: Request payload.
+        :type payload: dict
+        :param callback: Function applied to the response body, if given.
+        :type callback: callable
+        :return: Response body, optionally post-processed.
+        """
+        body = self._rest_client.post(endpoint=endpoint, payload=payload)
+        return body if callback is None else callback(body)
+
+    def get_ticker(self, typed=False):
         """Return the latest ticker information.
 
+        :param typed: If set to True (default: False), a compact
+            :class:`quadriga.models.Ticker` object is returned instead of a
+            dict.
+        :type typed: bool
         :return: Latest ticker information.
-        :rtype: dict
+        :rtype: dict | quadriga.models.Ticker
         """
         self._log('get ticker')
-        return self._rest_client.get(
+        return self._get(
             endpoint='/ticker',
-            params={'book': self.name}
+            params={'book': self.name},
+            callback=Ticker.from_dict if typed else None
         )
 
-    def get_public_orders(self, group=False):
+    def get_public_orders(self, group=False, typed=False, depth=None):
         """Return public orders that are currently open.
 
         :param group: If set to True (default: False), orders with the same
             price are grouped.
         :type group: bool
+        :param typed: If set to True (default: False), bids and asks are
+            returned as lists of compact :class:`quadriga.models.BookLevel`
+            objects instead of lists of [price, amount] lists.
+        :type typed: bool
+        :param depth: If set, only the best **depth** bids and asks are
+            returned. The rest of the response body is skipped without being
+            decoded (see :class:`quadriga.decoding.OrderBookParser`).
+        :type depth: int
         :return: Public orders currently open.
         :rtype: dict
         """
         self._log('get public orders')
-        return self._rest_client.get(
+        return self._get(
             endpoint='/order_book',
-            params={'book': self.name, 'group': int(group)}
+            params={'book': self.name, 'group': int(group)},
+            callback=BookLevel.from_book if typed else None,
+            parser=None if depth is None else OrderBookParser(depth)
         )
 
-    def get_public_trades(self, time_frame='hour'):
+    def get_public_trades(self, time_frame='hour', typed=False):
         """Return public trades that were completed recently.
 
         :param time_frame: Time frame. Allowed values are "minute" for trades
             in the last minute, or "hour" for trades in the last hour (default:
             "hour").
         :type time_frame: str | unicode
+        :param typed: If set to True (default: False), compact
+            :class:`quadriga.models.Trade` objects are returned instead of
+            dicts.
+        :type typed: bool
         :return: Public trades completed recently.
-        :rtype: [dict]
+        :rtype: [dict] | [quadriga.models.Trade]
         """
         self._log('get public trades')
-        return self._rest_client.get(
+        return self._get(
             endpoint='/transactions',
-            params={'book': self.name, 'time': time_frame}
+            params={'book': self.name, 'time': time_frame},
+            callback=(
+                (lambda res: [Trade.from_dict(row) for row in res])
+                if typed else None
+            )
         )
 
-    def get_user_orders(self):
+    def get_user_orders(self, typed=False):
         """Return user's orders that are currently open.
 
+        :param typed: If set to True (default: False), compact
+            :class:`quadriga.models.Order` objects are returned instead of
+            dicts.
+        :type typed: bool
         :return: User's orders currently open.
-        :rtype: [dict]
+        :rtype: [dict] | [quadriga.models.Order]
         """
         self._log('get user orders')
-        return self._rest_client.post(
+        return self._post(
             endpoint='/open_orders',
-            payload={'book': self.name}
+            payload={'book': self.name},
+            callback=(
+                (lambda res: [Order.from_dict(row) for row in res])
+                if typed else None
+            )
         )
 
-    def get_user_trades(self, limit=0, offset=0, sort='desc'):
+    def get_user_trades(self, limit=0, offset=0, sort='desc', typed=False):
         """Return user's trade history.
 
         :param limit: Maximum number of trades to return. If set to 0 or lower,
@@ -101,21 +212,114 @@ class OrderBook(object):
             values are "desc" for descending order, and "asc" for ascending
             order (default: "desc").
         :type sort: str | unicode
+        :param typed: If set to True (default: False), compact
+            :class:`quadriga.models.UserTrade` objects are returned instead of
+            dicts.
+        :type typed: bool
         :return: User's trade history.
-        :rtype: [dict]
+        :rtype: [dict] | [quadriga.models.UserTrade]
         """
         self._log('get user trades')
-        res = self._rest_client.post(
+        return self._post(
             endpoint='/user_transactions',
             payload={
                 'book': self.name,
                 'limit': limit,
                 'offset': offset,
                 'sort': sort
-            }
+            },
+            callback=lambda res: self._user_trades(res, limit, typed)
         )
+
+    def _user_trades(self, res, limit, typed):
+        """Post-process user's trade history.
+
+        :param res: Response body from QuadrigaCX.
+        :type res: [dict]
+        :param limit: Maximum number of trades to return.
+        :type limit: int
+        :param typed: If set to True, return compact objects.
+        :type typed: bool
+        :return: User's trade history.
+        :rtype: [dict] | [quadriga.models.UserTrade]
+        """
         # TODO Workaround for the broken limit param in QuadrigaCX API
-        return res[:limit] if len(res) > limit > 0 else res
+        if len(res) > limit > 0:
+            res = res[:limit]
+        if typed:
+            res = [UserTrade.from_dict(row, self.major, self.minor)
+                   for row in res]
+        return res
+
+    def iter_user_trades(self, page_size=100, sort='desc', typed=False,
+                         window=1000):
+        """Iterate over user's entire trade history, one page at a time.
+
+        While the caller processes a page, the next one is fetched in the
+        background. At most two pages are held in memory at once.
+
+        Trades made during the scan shift the offsets of later pages, so rows
+        already yielded may be served again. Rows whose ID is among the last
+        **window** IDs yielded are skipped, without assuming anything about
+        the order of IDs. If more trades than that are made during the scan,
+        some rows may be yielded twice, but none are dropped. Trades made
+        during the scan may also be yielded.
+
+        :param page_size: Number of trades fetched per request (default: 100).
+        :type page_size: int
+        :param sort: Method used to sort the results by date and time. Allowed
+            values are "desc" for descending order, and "asc" for ascending
+            order (default: "desc").
+        :type sort: str | unicode
+        :param typed: If set to True (default: False), compact
+            :class:`quadriga.models.UserTrade` objects are yielded instead of
+            dicts.
+        :type typed: bool
+        :param window: Number of trade IDs remembered to skip repeated rows
+            (default: 1000).
+        :type window: int
+        :return: Generator of user's trades.
+        :rtype: collections.Iterator[dict | quadriga.models.UserTrade]
+        """
+        self._log('iterate user trades')
+        seen = _RecentIds(window)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            next_page = pool.submit(
+                self.get_user_trades, page_size, 0, sort
+            )
+            offset = 0
+            while next_page is not None:
+                page = next_page.result()
+                offset += len(page)
+                next_page = None
+                if len(page) >= page_size:
+                    next_page = pool.submit(
+                        self.get_user_trades, page_size, offset, sort
+                    )
+                for row in self._new_user_trades(page, seen, typed):
+                    yield row
+
+    def _new_user_trades(self, page, seen, typed):
+        """Drop rows of a trade history page which were already yielded.
+
+        :param page: Page of user's trade history.
+        :type page: [dict]
+        :param seen: IDs of the trades yielded so far, updated in place.
+        :type seen: quadriga.book._RecentIds
+        :param typed: If set to True, return compact objects.
+        :type typed: bool
+        :return: New trades.
+        :rtype: [dict] | [quadriga.models.UserTrade]
+        """
+        rows = []
+        for row in page:
+            row_id = row.get('id')
+            if row_id is not None and not seen.add(row_id):
+                continue
+            if typed:
+                row = UserTrade.from_dict(row, self.major, self.minor)
+            rows.append(row)
+        return rows
 
     def buy_market_order(self, amount):
         """Place a buy order at market price.
@@ -126,8 +330,8 @@ class OrderBook(object):
         :rtype: dict
         """
         amount = str(amount)
-        self._log("buy {} {} at market price".format(amount, self.major))
-        return self._rest_client.post(
+        self._log('buy %s %s at market price', amount, self.major)
+        return self._post(
             endpoint='/buy',
             payload={'book': self.name, 'amount': amount}
         )
@@ -144,10 +348,11 @@ class OrderBook(object):
         """
         amount = str(amount)
         price = str(price)
-        self._log("buy {} {} at limit price of {} {}".format(
+        self._log(
+            'buy %s %s at limit price of %s %s',
             amount, self.major, price, self.minor
-        ))
-        return self._rest_client.post(
+        )
+        return self._post(
             endpoint='/buy',
             payload={'book': self.name, 'amount': amount, 'price': price}
         )
@@ -161,8 +366,8 @@ class OrderBook(object):
         :rtype: dict
         """
         amount = str(amount)
-        self._log("sell {} {} at market price".format(amount, self.major))
-        return self._rest_client.post(
+        self._log('sell %s %s at market price', amount, self.major)
+        return self._post(
             endpoint='/sell',
             payload={'book': self.name, 'amount': amount}
         )
@@ -179,10 +384,11 @@ class OrderBook(object):
         """
         amount = str(amount)
         price = str(price)
-        self._log("sell {} {} at limit price of {} {}".format(
+        self._log(
+            'sell %s %s at limit price of %s %s',
             amount, self.major, price, self.minor
-        ))
-        return self._rest_client.post(
+        )
+        return self._post(
             endpoint='/sell',
             payload={'book': self.name, 'amount': amount, 'price': price}
         )
@@ -0,0 +1,133 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from collections import OrderedDict
+
+from quadriga.utils import monotonic
+
+
+class _Call(object):
+    """In-flight request shared by concurrent callers."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache(object):
+    """Thread-safe TTL cache for responses to public (HTTP GET) API calls.
+
+    Responses are keyed on endpoint and URL parameters, and evicted in least
+    recently used order once **maxsize** is reached. Concurrent requests for
+    the same key share a single HTTP call (single-flight): one thread sends
+    the request while the others wait for its result. Failed requests are
+    never cached.
+
+    :param ttl: Default number of seconds responses are cached for (default:
+        1).
+    :type ttl: int | float
+    :param endpoint_ttl: Per-endpoint TTLs overriding **ttl** (e.g.
+        ``{'/ticker': 0.2, '/transactions': 5}``). Set the TTL of an endpoint
+        to 0 to disable caching for it.
+    :type endpoint_ttl: dict
+    :param maxsize: Maximum number of cached responses (default: 256).
+    :type maxsize: int
+
+    :ivar hits: Number of calls answered from the cache, including those which
+        waited on an identical in-flight request.
+    :vartype hits: int
+    :ivar misses: Number of calls which sent an HTTP request.
+    :vartype misses: int
+
+    .. note::
+        Cached response bodies are shared between callers and must not be
+        modified in place.
+    """
+
+    def __init__(self, ttl=1, endpoint_ttl=None, maxsize=256):
+        self._ttl = ttl
+        self._endpoint_ttl = endpoint_ttl or {}
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._calls = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return '<ResponseCache size={} hits={} misses={}>'.format(
+            len(self), self.hits, self.misses
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all cached responses and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get(self, endpoint, params, fetch, variant=None):
+        """Return the cached response, or fetch and cache it.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param params: URL parameters.
+        :type params: dict
+        :param fetch: Function which sends the request given the endpoint and
+            URL parameters, and returns the response body.
+        :type fetch: callable
+        :param variant: Hashable value distinguishing responses to the same
+            request which are parsed differently (e.g. a depth-limited
+            :class:`quadriga.decoding.OrderBookParser`).
+        :return: Response body.
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        ttl = self._endpoint_ttl.get(endpoint, self._ttl)
+        if not ttl or ttl <= 0:
+            return fetch(endpoint, params)
+
+        key = (
+            endpoint,
+            tuple(sorted(params.items())) if params else (),
+            variant
+        )
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > monotonic():
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fetch(endpoint, params)
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._entries[key] = (monotonic() + ttl, call.result)
+                    while len(self._entries) > self._maxsize:
+                        self._entries.popitem(last=False)
+            call.done.set()
+        return call.result
@@ -1,15 +1,18 @@
 from __future__ import absolute_import, unicode_literals, division
 
 import logging
-
-import requests
+import threading
 
 from quadriga.exceptions import (
     InvalidCurrencyError,
-    InvalidOrderBookError
+    InvalidOrderBookError,
+    InvalidOrderError
 )
 from quadriga.book import OrderBook
+from quadriga.replica import OrderBookReplica
 from quadriga.rest import RestClient
+from quadriga.transport import RequestsTransport
+from quadriga.utils import WorkerPool
 from quadriga.version import __version__
 
 
@@ -28,9 +31,53 @@ class QuadrigaClient(object):
     :param session: User-defined requests.Session object. If not set,
         ``requests.Session()`` is used by default.
     :type session: requests.Session
+    :param transport: HTTP transport (e.g.
+        :class:`quadriga.transport.Urllib3Transport`). If set, **session** is
+        ignored. If not set, :class:`quadriga.transport.RequestsTransport` is
+        used by default, with a connection pool large enough for
+        **max_workers** threads. See :doc:`transport` for details.
+    :type transport: quadriga.transport.Transport
+    :param decoder: Decoder for response bodies, e.g. to use a faster JSON
+        backend or convert prices and amounts to ``decimal.Decimal``. If not
+        set, ``requests.Response.json`` is used. See :doc:`decoding` for
+        details.
+    :type decoder: quadriga.decoding.JSONDecoder
     :param logger: Logger to record debug messages with. If not set,
         ``logging.getLogger('quadriga')`` is used by default.
     :type logger: logging.Logger
+    :param max_workers: Maximum number of concurrent requests sent by bulk
+        methods such as :func:`get_tickers` (default: 10). Bulk methods share
+        a pool of up to **max_workers** threads, started on first use and
+        stopped by :func:`close`.
+    :type max_workers: int
+    :param cache: Cache for public API responses. If not set, every call sends
+        an HTTP request. See :doc:`cache` for details.
+    :type cache: quadriga.cache.ResponseCache
+    :param nonce_generator: Generator of nonces for signed (private) API
+        calls. If not set, an in-memory
+        :class:`quadriga.nonce.NonceGenerator` is used by default. Nonces are
+        unique and strictly increasing across threads, so private API calls
+        can be sent in parallel.
+    :type nonce_generator: quadriga.nonce.NonceGenerator
+    :param rate_limiter: Client-side rate limiter. If set, requests are queued
+        by priority once the request budget is used up. See :doc:`ratelimit`
+        for details.
+    :type rate_limiter: quadriga.ratelimit.RateLimiter
+    :param metrics: Request metrics, recording latency histograms, bytes
+        sent and received, decode times and status codes per endpoint and
+        order book. If not set, requests are not instrumented. See
+        :doc:`metrics` for details.
+    :type metrics: quadriga.metrics.RequestMetrics
+    :param hooks: Request lifecycle hooks. If not set, an empty
+        :class:`quadriga.tracing.Hooks` is used, which hooks can be added to
+        later via :attr:`hooks`. See :doc:`tracing` for details.
+    :type hooks: quadriga.tracing.Hooks
+    :param serialize_signed: If set to True (default: False), signed (private)
+        API calls are sent one at a time, so they reach QuadrigaCX in nonce
+        order. See :doc:`nonce` for details.
+    :type serialize_signed: bool
+    :param url: QuadrigaCX API base URL. If not set, :attr:`url` is used.
+    :type url: str | unicode
 
     :cvar version: Client version.
     :vartype version: str | unicode
@@ -50,6 +97,8 @@ class QuadrigaClient(object):
 
     version = __version__
 
+    _replica_class = OrderBookReplica
+
     url = 'https://api.quadrigacx.com/v2'
 
     order_books = {
@@ -79,27 +128,114 @@ class QuadrigaClient(object):
                  client_id=None,
                  timeout=None,
                  session=None,
-                 logger=None):
+                 logger=None,
+                 max_workers=10,
+                 cache=None,
+                 nonce_generator=None,
+                 rate_limiter=None,
+                 transport=None,
+                 decoder=None,
+                 metrics=None,
+                 hooks=None,
+                 serialize_signed=False,
+                 url=None):
+        self._logger = logger or logging.getLogger('quadriga')
+        # Transports and sessions given by the caller are not closed.
+        self._own_transport = None
+        if transport is None:
+            transport = RequestsTransport(
+                session=session,
+                pool_maxsize=max(max_workers, 10)
+            )
+            if session is None:
+                self._own_transport = transport
         self._rest_client = RestClient(
-            url=self.url,
+            url=url or self.url,
             api_key=api_key,
             api_secret=api_secret,
             client_id=client_id,
             timeout=timeout,
-            session=session or requests.Session()
+            transport=transport,
+            decoder=decoder,
+            cache=cache,
+            nonce_generator=nonce_generator,
+            rate_limiter=rate_limiter,
+            metrics=metrics,
+            hooks=hooks,
+            logger=self._child_logger('rest'),
+            serialize_signed=serialize_signed
         )
-        self._logger = logger or logging.getLogger('quadriga')
+        self._max_workers = max_workers
+        self._workers = WorkerPool(max_workers)
+        self._replicas = {}
+        self._replicas_lock = threading.Lock()
 
     def __repr__(self):
         return '<QuadrigaClient v{}>'.format(__version__)
 
-    def _log(self, message):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the worker threads of bulk methods, and close the pooled
+        connections if the client created its own transport.
+
+        The client can still be used afterwards.
+        """
+        self._workers.close()
+        if self._own_transport is not None:
+            self._own_transport.close()
+
+    @property
+    def hooks(self):
+        """Return the request lifecycle hooks.
+
+        :rtype: quadriga.tracing.Hooks
+        """
+        return self._rest_client.hooks
+
+    def _child_logger(self, name):
+        """Return a child of the client's logger.
+
+        Logger-like objects without children (e.g. ``logging.LoggerAdapter``)
+        are returned as is.
+
+        :param name: Child logger name.
+        :type name: str | unicode
+        :rtype: logging.Logger
+        """
+        get_child = getattr(self._logger, 'getChild', None)
+        return self._logger if get_child is None else get_child(name)
+
+    def _log(self, message, *args):
         """Log a debug message.
 
-        :param message: Debug message.
+        Nothing is formatted unless debug logging is enabled.
+
+        :param message: Debug message, with %-style placeholders for **args**.
         :type message: str | unicode
+        :param args: Values for the placeholders in the message.
+        """
+        logger = self._logger
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(message, *args)
+
+    def _post(self, endpoint, payload=None, callback=None):
+        """Send an HTTP POST request and post-process the response body.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param payload: Request payload.
+        :type payload: dict
+        :param callback: Function applied to the response body, if given.
+        :type callback: callable
+        :return: Response body, optionally post-processed.
         """
-        self._logger.debug(message)
+        body = self._rest_client.post(endpoint=endpoint, payload=payload)
+        return body if callback is None else callback(body)
 
     def _validate_order_book(self, book):
         """Check if the given order book is valid.
@@ -127,6 +263,137 @@ class QuadrigaClient(object):
                 .format(currency, tuple(self.major_currencies))
             )
 
+    def _run_concurrently(self, func, items):
+        """Call a function on each item with at most **max_workers** calls
+        in flight, on the client's pool of worker threads.
+
+        :param func: Function to call with each item.
+        :type func: callable
+        :param items: Items to call the function with.
+        :type items: list
+        :return: Results (or exceptions raised) in the same order as **items**.
+        :rtype: list
+        """
+        return self._workers.map(func, items)
+
+    def _validate_order(self, order):
+        """Check if the given order is valid.
+
+        :param order: Order to place.
+        :type order: dict
+        :raise InvalidOrderError: If an invalid order is given.
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        if order.get('side') not in ('buy', 'sell') or 'amount' not in order:
+            raise InvalidOrderError(
+                'Invalid order {}. Orders need a side ("buy" or "sell") and '
+                'an amount.'.format(order)
+            )
+        self._validate_order_book(order.get('book'))
+
+    def _place_order(self, order):
+        """Place a limit order, or a market order if no price is given.
+
+        :param order: Order to place.
+        :type order: dict
+        :return: Order details.
+        :rtype: dict
+        """
+        book = self.book(order['book'])
+        if order.get('price') is None:
+            return getattr(book, order['side'] + '_market_order')(
+                order['amount']
+            )
+        return getattr(book, order['side'] + '_limit_order')(
+            order['amount'], order['price']
+        )
+
+    @staticmethod
+    def _chunk_ids(order_ids, chunk_size):
+        """Split order IDs into chunks, dropping duplicates.
+
+        :param order_ids: Order IDs.
+        :type order_ids: [str | unicode]
+        :param chunk_size: Maximum number of IDs per chunk.
+        :type chunk_size: int
+        :return: Chunks of unique order IDs, in order of first appearance.
+        :rtype: [[str | unicode]]
+        :raise ValueError: If **chunk_size** is lower than 1.
+        """
+        if chunk_size < 1:
+            raise ValueError(
+                'Invalid chunk size {}. Chunks need at least one order '
+                'ID.'.format(chunk_size)
+            )
+        seen = set()
+        unique_ids = []
+        for order_id in order_ids:
+            if order_id not in seen:
+                seen.add(order_id)
+                unique_ids.append(order_id)
+        return [
+            unique_ids[start:start + chunk_size]
+            for start in range(0, len(unique_ids), chunk_size)
+        ]
+
+    @staticmethod
+    def _merge_lookups(chunks, results):
+        """Merge the results of order lookups sent in chunks.
+
+        :param chunks: Chunks of order IDs looked up.
+        :type chunks: [[str | unicode]]
+        :param results: Order details (or exception raised) for each chunk.
+        :type results: list
+        :return: Order details keyed by order ID.
+        :rtype: dict
+        """
+        orders = {}
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                orders.update((order_id, result) for order_id in chunk)
+                continue
+            orders.update((order_id, None) for order_id in chunk)
+            for order in result:
+                orders[order['id']] = order
+        return orders
+
+    @staticmethod
+    def _open_order_ids(open_orders):
+        """Return the IDs of open orders listed for many order books.
+
+        :param open_orders: Open orders (or exceptions raised while listing
+            them) keyed by order book name.
+        :type open_orders: dict
+        :return: Order IDs.
+        :rtype: [str | unicode]
+        """
+        return [
+            order['id']
+            for book in sorted(open_orders)
+            if not isinstance(open_orders[book], BaseException)
+            for order in open_orders[book]
+        ]
+
+    @staticmethod
+    def _cancel_results(open_orders, results):
+        """Group the results of cancelling open orders by order book.
+
+        :param open_orders: Open orders (or exceptions raised while listing
+            them) keyed by order book name.
+        :type open_orders: dict
+        :param results: Cancellation results keyed by order ID.
+        :type results: dict
+        :return: Cancellation results keyed by order book name, then by
+            order ID.
+        :rtype: dict
+        """
+        return {
+            book: orders if isinstance(orders, BaseException) else {
+                order['id']: results[order['id']] for order in orders
+            }
+            for book, orders in open_orders.items()
+        }
+
     def book(self, name):
         """Return an API wrapper for the given order book.
 
@@ -150,6 +417,109 @@ class QuadrigaClient(object):
         self._validate_order_book(name)
         return OrderBook(name, self._rest_client, self._logger)
 
+    def replica(self, name):
+        """Return the local replica of the given order book.
+
+        The same replica is returned on every call, so that all its users share
+        the cost of refreshing it. See :doc:`replica` for details.
+
+        :param name: Order book name (e.g. "btc_cad").
+        :type name: str | unicode
+        :return: Order book replica.
+        :rtype: quadriga.replica.OrderBookReplica
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        self._validate_order_book(name)
+        with self._replicas_lock:
+            replica = self._replicas.get(name)
+            if replica is None:
+                replica = self._replica_class(self.book(name))
+                self._replicas[name] = replica
+            return replica
+
+    def fan_out(self, books, method, **kwargs):
+        """Call an order book method on many order books concurrently.
+
+        Bulk methods such as :func:`get_tickers` are built on this method,
+        which works with any :class:`quadriga.book.OrderBook` method (e.g.
+        ``client.fan_out(['btc_cad', 'eth_cad'], 'get_user_orders')``).
+
+        :param books: Order book names. If not set, all supported order books
+            are used.
+        :type books: [str | unicode]
+        :param method: Name of the :class:`quadriga.book.OrderBook` method.
+        :type method: str | unicode
+        :param kwargs: Keyword arguments passed to the method.
+        :return: Results (or exceptions raised) keyed by order book name.
+        :rtype: dict
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        books = sorted(self.order_books if books is None else set(books))
+        for book in books:
+            self._validate_order_book(book)
+        results = self._run_concurrently(
+            lambda book: getattr(self.book(book), method)(**kwargs),
+            books
+        )
+        return dict(zip(books, results))
+
+    def get_tickers(self, books=None):
+        """Return the latest ticker information for many order books.
+
+        Requests are sent concurrently. If the request for an order book fails,
+        the exception raised is returned in place of its ticker information.
+
+        :param books: Order book names. If not set, all supported order books
+            are used.
+        :type books: [str | unicode]
+        :return: Latest ticker information keyed by order book name.
+        :rtype: dict
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        return self.fan_out(books, 'get_ticker')
+
+    def get_public_orders_many(self, books=None, group=False, depth=None):
+        """Return public orders currently open for many order books.
+
+        Requests are sent concurrently. If the request for an order book fails,
+        the exception raised is returned in place of its public orders.
+
+        :param books: Order book names. If not set, all supported order books
+            are used.
+        :type books: [str | unicode]
+        :param group: If set to True (default: False), orders with the same
+            price are grouped.
+        :type group: bool
+        :param depth: If set, only the best **depth** bids and asks of each
+            order book are returned.
+        :type depth: int
+        :return: Public orders currently open keyed by order book name.
+        :rtype: dict
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        return self.fan_out(
+            books, 'get_public_orders', group=group, depth=depth
+        )
+
+    def get_public_trades_many(self, books=None, time_frame='hour'):
+        """Return public trades completed recently for many order books.
+
+        Requests are sent concurrently. If the request for an order book fails,
+        the exception raised is returned in place of its public trades.
+
+        :param books: Order book names. If not set, all supported order books
+            are used.
+        :type books: [str | unicode]
+        :param time_frame: Time frame. Allowed values are "minute" for trades
+            in the last minute, or "hour" for trades in the last hour (default:
+            "hour").
+        :type time_frame: str | unicode
+        :return: Public trades completed recently keyed by order book name.
+        :rtype: dict
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        return self.fan_out(books, 'get_public_trades', time_frame=time_frame)
+
     def get_balance(self):
         """Return user's account balance.
 
@@ -157,7 +527,7 @@ class QuadrigaClient(object):
         :rtype: dict
         """
         self._log("get account balance")
-        return self._rest_client.post(endpoint='/balance')
+        return self._post(endpoint='/balance')
 
     def lookup_order(self, order_id):
         """Look up one or more orders by ID (64 hexadecmial characters).
@@ -167,12 +537,34 @@ class QuadrigaClient(object):
         :return: Order details.
         :rtype: [dict]
         """
-        self._log('look up order(s) {}'.format(order_id))
-        return self._rest_client.post(
+        self._log('look up order(s) %s', order_id)
+        return self._post(
             endpoint='/lookup_order',
             payload={'id': order_id}
         )
 
+    def lookup_orders(self, order_ids, chunk_size=100):
+        """Look up many orders by ID, in concurrent chunks.
+
+        Duplicate IDs are dropped, and the rest are split into chunks of at
+        most **chunk_size** IDs, each looked up with one request. At most
+        **max_workers** requests are sent at once.
+
+        :param order_ids: Order IDs.
+        :type order_ids: [str | unicode]
+        :param chunk_size: Maximum number of IDs per request (default: 100).
+        :type chunk_size: int
+        :return: Order details keyed by order ID. If the request for a chunk
+            fails, the exception raised is returned for each of its IDs. IDs
+            not found are mapped to None.
+        :rtype: dict
+        :raise ValueError: If **chunk_size** is lower than 1.
+        """
+        chunks = self._chunk_ids(order_ids, chunk_size)
+        self._log('look up orders in %d chunks', len(chunks))
+        results = self._run_concurrently(self.lookup_order, chunks)
+        return self._merge_lookups(chunks, results)
+
     def cancel_order(self, order_id):
         """Cancel an open order by ID (64 hexadecmial characters).
 
@@ -181,12 +573,85 @@ class QuadrigaClient(object):
         :return: True if the order was cancelled successfully.
         :rtype: bool
         """
-        self._log('cancel order {}'.format(order_id))
-        result = self._rest_client.post(
+        self._log('cancel order %s', order_id)
+        return self._post(
             endpoint='/cancel_order',
-            payload={'id': order_id}
+            payload={'id': order_id},
+            callback=lambda result: result == 'true'
+        )
+
+    def place_orders(self, orders):
+        """Place many orders concurrently.
+
+        Each order is a dict with the order book name ("book"), the side
+        ("buy" or "sell"), the amount of major currency ("amount") and,
+        for limit orders, the limit price ("price"). Orders without a price
+        are placed at market price.
+
+        At most **max_workers** orders are sent at once. Each request is
+        signed with its own nonce right before it is sent, so nonces are
+        unique and increase in the order requests are signed. Concurrent
+        requests may still reach QuadrigaCX out of nonce order, unless the
+        client was created with **serialize_signed** set to True, in which case
+        orders are placed one at a time. If an order fails, the exception
+        raised is returned in place of its details.
+
+        :param orders: Orders to place.
+        :type orders: [dict]
+        :return: Order details (or exceptions raised) in the same order as
+            **orders**.
+        :rtype: [dict | Exception]
+        :raise InvalidOrderError: If an invalid order is given. No orders are
+            placed in that case.
+        :raise InvalidOrderBookError: If an invalid order book is given. No
+            orders are placed in that case.
+        """
+        orders = list(orders)
+        for order in orders:
+            self._validate_order(order)
+        self._log('place %d orders', len(orders))
+        return self._run_concurrently(self._place_order, orders)
+
+    def cancel_orders(self, order_ids):
+        """Cancel many open orders by ID concurrently.
+
+        At most **max_workers** cancellations are sent at once. If a
+        cancellation fails, the exception raised is returned in place of its
+        result.
+
+        :param order_ids: Order IDs.
+        :type order_ids: [str | unicode]
+        :return: True for each order cancelled successfully (or the exception
+            raised), in the same order as **order_ids**.
+        :rtype: [bool | Exception]
+        """
+        order_ids = list(order_ids)
+        self._log('cancel %d orders', len(order_ids))
+        return self._run_concurrently(self.cancel_order, order_ids)
+
+    def cancel_all(self, book=None):
+        """Cancel all user's open orders.
+
+        Open orders are listed with
+        :func:`quadriga.book.OrderBook.get_user_orders` (concurrently, for
+        each order book), then cancelled concurrently with
+        :func:`cancel_orders`.
+
+        :param book: Order book name. If not set, open orders of all order
+            books are cancelled.
+        :type book: str | unicode
+        :return: Cancellation results keyed by order book name, then by order
+            ID. If open orders of an order book could not be listed, the
+            exception raised is returned in place of its results.
+        :rtype: dict
+        :raise InvalidOrderBookError: If an invalid order book is given.
+        """
+        open_orders = self.fan_out(
+            None if book is None else [book], 'get_user_orders'
         )
-        return result == 'true'
+        order_ids = self._open_order_ids(open_orders)
+        results = dict(zip(order_ids, self.cancel_orders(order_ids)))
+        return self._cancel_results(open_orders, results)
 
     def get_deposit_address(self, currency):
         """Return the deposit address for the given major currency.
@@ -197,9 +662,9 @@ class QuadrigaClient(object):
         :rtype: str | unicode
         """
         self._validate_currency(currency)
-        self._log('get deposit address for {}'.format(currency))
+        self._log('get deposit address for %s', currency)
         coin_name = self.major_currencies[currency]
-        return self._rest_client.post(
+        return self._post(
             endpoint='/{}_deposit_address'.format(coin_name)
         )
 
@@ -219,8 +684,8 @@ class QuadrigaClient(object):
             method!
         """
         self._validate_currency(currency)
-        self._log('withdraw {} {} to {}'.format(amount, currency, address))
+        self._log('withdraw %s %s to %s', amount, currency, address)
         coin_name = self.major_currencies[currency]
-        return self._rest_client.post(
+        return self._post(
             endpoint='/{}_withdrawal'.format(coin_name)
         )
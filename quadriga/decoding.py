@@ -0,0 +1,297 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import re
+
+try:
+    string_types = (str, unicode)  # noqa: F821
+except NameError:  # pragma: no cover
+    string_types = (str,)
+
+
+def fastest_loads():
+    """Return the fastest installed function for decoding JSON from bytes.
+
+    Backends are tried in this order: orjson_, ujson_, simplejson_ and the
+    standard library's json module.
+
+    .. _orjson: https://github.com/ijl/orjson
+    .. _ujson: https://github.com/ultrajson/ultrajson
+    .. _simplejson: https://github.com/simplejson/simplejson
+
+    :return: JSON decoding function.
+    :rtype: callable
+    """
+    for module_name in ('orjson', 'ujson', 'simplejson'):
+        try:
+            module = __import__(module_name)
+        except ImportError:
+            continue
+        return module.loads
+    return json.loads
+
+
+class JSONDecoder(object):
+    """Decoder for QuadrigaCX response bodies.
+
+    Response bodies are decoded straight from bytes (skipping the intermediate
+    text decoding done by ``requests.Response.json``), using the fastest JSON
+    backend installed unless **loads** is given. Numeric fields, which
+    QuadrigaCX sends as strings (e.g. prices, amounts, fees and balances), can
+    be converted once during decoding so that consumers do not need to.
+
+    :param loads: Function decoding JSON from bytes. If not set, the fastest
+        backend installed is used (see :func:`fastest_loads`).
+    :type loads: callable
+    :param number_type: Function converting numeric strings, such as
+        ``decimal.Decimal`` or a fixed-point type constructor. If not set,
+        numeric fields are left as strings.
+    :type number_type: callable
+    """
+
+    numeric_fields = frozenset([
+        # Tickers, orders and trades
+        'amount', 'ask', 'bid', 'high', 'last', 'low', 'price', 'volume',
+        'vwap', 'fee', 'rate',
+        # User trade amounts by currency
+        'bch', 'btc', 'btg', 'cad', 'eth', 'ltc', 'usd',
+    ])
+
+    numeric_suffixes = ('_available', '_balance', '_reserved')
+
+    level_fields = frozenset(['asks', 'bids'])
+
+    def __init__(self, loads=None, number_type=None):
+        self._loads = loads or fastest_loads()
+        self._number_type = number_type
+        self._plans = {}
+
+    def __repr__(self):
+        return '<JSONDecoder loads={}.{}>'.format(
+            self._loads.__module__, self._loads.__name__
+        )
+
+    def decode(self, content):
+        """Decode a response body.
+
+        :param content: Raw response body.
+        :type content: bytes
+        :return: Decoded response body.
+        :rtype: dict | list | str | unicode
+        :raise ValueError: If the response body is not valid JSON.
+        """
+        return self.convert(self._loads(content))
+
+    def convert(self, body):
+        """Convert numeric fields of a decoded response body in place.
+
+        :param body: Decoded response body.
+        :type body: dict | list | str | unicode
+        :return: Response body with numeric fields converted, or as is if no
+            number type is configured.
+        :rtype: dict | list | str | unicode
+        """
+        if self._number_type is None:
+            return body
+        return self._convert(body)
+
+    def _is_numeric(self, key):
+        """Return True if the given field holds a number.
+
+        :param key: Field name.
+        :type key: str | unicode
+        :rtype: bool
+        """
+        return (
+            key in self.numeric_fields or
+            key.endswith(self.numeric_suffixes)
+        )
+
+    def _number(self, value):
+        """Convert a numeric value with the configured number type.
+
+        Values which cannot be converted (e.g. empty strings) are returned as
+        is.
+
+        :param value: Numeric string or JSON number.
+        :return: Converted value.
+        """
+        if isinstance(value, float):
+            value = repr(value)
+        elif not isinstance(value, string_types):
+            return value
+        try:
+            return self._number_type(value)
+        except (ValueError, ArithmeticError):
+            return value
+
+    def _convert_levels(self, levels):
+        """Convert price levels (e.g. [["10.0", "1.5"], ...]).
+
+        :param levels: Price levels.
+        :type levels: list
+        :return: Price levels with prices and amounts converted.
+        :rtype: list
+        """
+        number_type = self._number_type
+        try:
+            return [[number_type(price), number_type(amount)]
+                    for price, amount in levels]
+        except (TypeError, ValueError, ArithmeticError):
+            number = self._number
+            return [[number(field) for field in level] for level in levels]
+
+    def _convert(self, value):
+        """Convert numeric fields in a decoded response body in place.
+
+        :param value: Decoded JSON value.
+        :return: Value with numeric fields converted.
+        """
+        if isinstance(value, list):
+            for index, item in enumerate(value):
+                if isinstance(item, (dict, list)):
+                    value[index] = self._convert(item)
+            return value
+        if not isinstance(value, dict):
+            return value
+
+        # Rows of the same response share the same fields, so which fields to
+        # convert or descend into is worked out once per set of field names.
+        fields = tuple(value)
+        plan = self._plans.get(fields)
+        if plan is None:
+            plan = self._plans[fields] = self._plan(value)
+        numeric_fields, nested_fields = plan
+
+        number_type = self._number_type
+        for key in numeric_fields:
+            item = value[key]
+            if isinstance(item, string_types):
+                try:
+                    value[key] = number_type(item)
+                except (ValueError, ArithmeticError):
+                    pass
+            else:
+                value[key] = self._number(item)
+        for key in nested_fields:
+            item = value[key]
+            if isinstance(item, list) and key in self.level_fields:
+                value[key] = self._convert_levels(item)
+            elif isinstance(item, (dict, list)):
+                value[key] = self._convert(item)
+        return value
+
+    def _plan(self, value):
+        """Return the fields of a JSON object to convert and to descend into.
+
+        :param value: Decoded JSON object.
+        :type value: dict
+        :return: Numeric fields, and fields which may hold JSON objects or
+            arrays (i.e. are not scalars in the given object).
+        :rtype: (tuple, tuple)
+        """
+        scalar_types = string_types + (bool, int, float)
+        numeric_fields = []
+        nested_fields = []
+        for key, item in value.items():
+            if self._is_numeric(key):
+                numeric_fields.append(key)
+            elif not isinstance(item, scalar_types):
+                nested_fields.append(key)
+        return tuple(numeric_fields), tuple(nested_fields)
+
+
+class OrderBookParser(object):
+    """Depth-limited parser for /order_book response bodies.
+
+    The raw response body is scanned with regular expressions, and only the
+    first **depth** price levels of each side are turned into Python objects.
+    The remaining levels are skipped without being decoded, so parse time and
+    memory use no longer grow with the depth of the order book.
+
+    Response bodies which are not order books (e.g. errors) are decoded in
+    full with the standard library's json module.
+
+    Parsers with the same depth compare equal, so that responses parsed with
+    them can be cached together.
+
+    :param depth: Maximum number of price levels kept per side.
+    :type depth: int
+    """
+
+    _side = re.compile(br'"(bids|asks)"\s*:\s*\[')
+    _level = re.compile(
+        br'\s*,?\s*\[\s*("?)([^",\]\s]+)\1\s*,\s*("?)([^",\]\s]+)\3\s*\]'
+    )
+    _array_end = re.compile(br'\s*\]')
+    _skip_levels = re.compile(br'\]\s*\]')
+    _timestamp = re.compile(br'"timestamp"\s*:\s*"?([^",}\s]*)')
+
+    def __init__(self, depth):
+        self.depth = depth
+
+    def __repr__(self):
+        return '<OrderBookParser depth={}>'.format(self.depth)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.depth == other.depth
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self.depth))
+
+    def _parse_levels(self, content, pos):
+        """Parse the first levels of a price level array.
+
+        :param content: Raw response body.
+        :type content: bytes
+        :param pos: Position right after the opening bracket of the array.
+        :type pos: int
+        :return: Price levels, and the position after the closing bracket.
+        :rtype: (list, int)
+        :raise ValueError: If the array is malformed.
+        """
+        levels = []
+        match_level = self._level.match
+        while len(levels) < self.depth:
+            match = match_level(content, pos)
+            if match is None:
+                break
+            levels.append([
+                match.group(2).decode('ascii'),
+                match.group(4).decode('ascii')
+            ])
+            pos = match.end()
+        end = self._array_end.match(content, pos)
+        if end is None:
+            end = self._skip_levels.search(content, pos)
+        if end is None:
+            raise ValueError('Unterminated price level array')
+        return levels, end.end()
+
+    def __call__(self, content):
+        """Parse a response body.
+
+        :param content: Raw response body.
+        :type content: bytes
+        :return: Order book with at most **depth** bids and asks, or the
+            response body decoded in full if it is not an order book.
+        :rtype: dict
+        :raise ValueError: If the response body is not valid JSON.
+        """
+        body = {}
+        pos = 0
+        while True:
+            match = self._side.search(content, pos)
+            if match is None:
+                break
+            side = match.group(1).decode('ascii')
+            body[side], pos = self._parse_levels(content, match.end())
+        if 'bids' not in body or 'asks' not in body:
+            return json.loads(content.decode('utf-8'))
+        match = self._timestamp.search(content)
+        if match is not None:
+            body['timestamp'] = match.group(1).decode('ascii')
+        return body
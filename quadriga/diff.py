@@ -0,0 +1,186 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+
+import numpy as np
+
+from quadriga.analytics import _levels
+
+
+def _aggregate(levels):
+    """Return sorted unique prices and the total amount at each price.
+
+    :param levels: Price levels as [price, amount] pairs, in any order.
+    :type levels: list | numpy.ndarray
+    :return: Prices in ascending order and amounts.
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    levels = _levels(levels)
+    prices, index = np.unique(levels[:, 0], return_inverse=True)
+    amounts = np.bincount(
+        index.ravel(), weights=levels[:, 1], minlength=len(prices)
+    )
+    return prices, amounts
+
+
+def _diff_side(previous, current, tolerance):
+    """Diff the price levels of one side of two snapshots.
+
+    Both price arrays are sorted, so they are merged in a few vectorized
+    operations rather than compared level by level. Amounts are summed as
+    floats, so they are compared within a tolerance rather than exactly.
+
+    :param previous: Previous prices and amounts.
+    :type previous: (numpy.ndarray, numpy.ndarray)
+    :param current: Current prices and amounts.
+    :type current: (numpy.ndarray, numpy.ndarray)
+    :param tolerance: Largest change of amount ignored.
+    :type tolerance: float
+    :return: Prices of the changed levels in ascending order, and their
+        previous and current amounts.
+    :rtype: numpy.ndarray
+    """
+    (old_prices, old_amounts), (new_prices, new_amounts) = previous, current
+    prices = np.union1d(old_prices, new_prices)
+    old = np.zeros(len(prices))
+    new = np.zeros(len(prices))
+    old[np.searchsorted(prices, old_prices)] = old_amounts
+    new[np.searchsorted(prices, new_prices)] = new_amounts
+    changed = ~np.isclose(old, new, rtol=0, atol=tolerance)
+    return np.column_stack((prices[changed], old[changed], new[changed]))
+
+
+class BookDelta(object):
+    """Level-by-level changes to an order book between two snapshots.
+
+    Changes of each side are stored as an (n, 3) array of price, previous
+    amount and current amount rows, sorted by price. A previous amount of 0
+    means the level was added, and a current amount of 0 that it was removed.
+
+    :param book: Order book name.
+    :type book: str | unicode
+    :param timestamp: Timestamp of the current snapshot.
+    :type timestamp: str | unicode
+    :param bids: Changed bid levels.
+    :type bids: numpy.ndarray
+    :param asks: Changed ask levels.
+    :type asks: numpy.ndarray
+    """
+
+    __slots__ = ('book', 'timestamp', 'bids', 'asks')
+
+    def __init__(self, book, timestamp, bids, asks):
+        self.book = book
+        self.timestamp = timestamp
+        self.bids = bids
+        self.asks = asks
+
+    def __repr__(self):
+        return '<BookDelta \'{}\' bids={} asks={}>'.format(
+            self.book, len(self.bids), len(self.asks)
+        )
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def events(self):
+        """Return the changes as a list of events.
+
+        :return: Side ("bids" or "asks"), price, previous amount and current
+            amount of each changed level.
+        :rtype: [(str | unicode, float, float, float)]
+        """
+        return [
+            (side, price, old, new)
+            for side, changes in (('bids', self.bids), ('asks', self.asks))
+            for price, old, new in changes.tolist()
+        ]
+
+
+class BookDiffer(object):
+    """Turn successive order book snapshots into deltas for subscribers.
+
+    Each snapshot passed to :func:`update` is diffed against the previous one,
+    and the resulting :class:`quadriga.diff.BookDelta` is passed to every
+    subscriber if anything changed. The first snapshot is diffed against an
+    empty order book, so subscribers receive all its levels as added.
+
+    Deltas are computed and passed to subscribers one snapshot at a time, in
+    the order the snapshots were given, even if :func:`update` is called from
+    many threads. Subscribers must therefore not call :func:`update`.
+
+    :param book: Order book API wrapper. Required by :func:`poll` only.
+    :type book: quadriga.book.OrderBook
+    :param name: Order book name. If not set, the name of **book** is used.
+    :type name: str | unicode
+    :param tolerance: Largest change of amount at a price level which is not
+        reported (default: 1e-9, a tenth of the smallest change of an amount
+        with 8 decimal places). Amounts at the same price are summed as
+        floats, so exact comparisons would report rounding errors as changes.
+    :type tolerance: float
+    """
+
+    def __init__(self, book=None, name=None, tolerance=1e-9):
+        self.name = name or (book.name if book is not None else None)
+        self.tolerance = tolerance
+        self._book = book
+        self._lock = threading.Lock()
+        self._subscribers = []
+        empty = (np.empty(0), np.empty(0))
+        self._previous = (empty, empty)
+
+    def __repr__(self):
+        return '<BookDiffer \'{}\' subscribers={}>'.format(
+            self.name, len(self._subscribers)
+        )
+
+    def subscribe(self, callback):
+        """Call a function with every non-empty delta.
+
+        :param callback: Function called with a
+            :class:`quadriga.diff.BookDelta`.
+        :type callback: callable
+        :return: The callback, so this method can be used as a decorator.
+        :rtype: callable
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling a function subscribed earlier.
+
+        :param callback: Subscribed function.
+        :type callback: callable
+        """
+        self._subscribers.remove(callback)
+
+    def update(self, snapshot):
+        """Diff a new snapshot against the previous one.
+
+        :param snapshot: Response body of
+            :func:`quadriga.book.OrderBook.get_public_orders` (grouped or not).
+        :type snapshot: dict
+        :return: Changes since the previous snapshot.
+        :rtype: quadriga.diff.BookDelta
+        """
+        current = (_aggregate(snapshot['bids']), _aggregate(snapshot['asks']))
+        with self._lock:
+            previous, self._previous = self._previous, current
+            delta = BookDelta(
+                self.name,
+                snapshot.get('timestamp'),
+                _diff_side(previous[0], current[0], self.tolerance),
+                _diff_side(previous[1], current[1], self.tolerance)
+            )
+            if len(delta):
+                for callback in list(self._subscribers):
+                    callback(delta)
+        return delta
+
+    def poll(self):
+        """Fetch a new snapshot of the order book and diff it.
+
+        :return: Changes since the previous snapshot.
+        :rtype: quadriga.diff.BookDelta
+        """
+        return self.update(self._book.get_public_orders(group=True))
@@ -42,3 +42,7 @@ class InvalidCurrencyError(QuadrigaError):
 
 class InvalidOrderBookError(QuadrigaError):
     """Raised when an invalid order book is given."""
+
+
+class InvalidOrderError(QuadrigaError):
+    """Raised when an invalid order is given."""
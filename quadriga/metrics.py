@@ -0,0 +1,368 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import math
+import threading
+import weakref
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # pragma: no cover
+    from urllib import urlencode
+
+
+def request_size(method, data):
+    """Return the number of bytes of request data sent to QuadrigaCX.
+
+    :param method: HTTP method ("GET" or "POST").
+    :type method: str | unicode
+    :param data: URL parameters for GET requests, payload for POST requests.
+    :type data: dict
+    :return: Size of the query string or JSON body.
+    :rtype: int
+    """
+    if not data:
+        return 0
+    if method == 'GET':
+        return len(urlencode(data))
+    return len(json.dumps(data))
+
+
+class LatencyHistogram(object):
+    """Histogram of latencies in logarithmic buckets.
+
+    Each power of two is split into :attr:`buckets_per_octave` buckets, so
+    percentiles are accurate to within about 4.5% regardless of the range of
+    latencies, and only buckets which were hit take up memory.
+    """
+
+    #: Number of buckets per doubling of latency.
+    buckets_per_octave = 16
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def __repr__(self):
+        return '<LatencyHistogram count={}>'.format(self.count)
+
+    def record(self, seconds):
+        """Record a latency.
+
+        :param seconds: Latency in seconds.
+        :type seconds: float
+        """
+        micros = seconds * 1e6
+        index = 0
+        if micros > 1:
+            index = int(math.log(micros, 2) * self.buckets_per_octave)
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """Add the latencies recorded by another histogram to this one.
+
+        :param other: Histogram to merge.
+        :type other: quadriga.metrics.LatencyHistogram
+        """
+        for index, count in list(other.buckets.items()):
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """Return a latency percentile.
+
+        :param percent: Percentile between 0 and 100 (e.g. 99.9).
+        :type percent: int | float
+        :return: Upper bound of the bucket holding the percentile, in seconds,
+            or 0 if no latencies were recorded.
+        :rtype: float
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * percent / 100)))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                bound = 2 ** ((index + 1) / self.buckets_per_octave) / 1e6
+                return min(bound, self.max)
+        return self.max  # pragma: no cover
+
+
+class _Stats(object):
+    """Metrics of one endpoint and order book, recorded by one thread."""
+
+    def __init__(self):
+        self.started = 0
+        self.latency = LatencyHistogram()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.decode_time = 0.0
+        self.statuses = {}
+        self.error_codes = {}
+
+    def merge(self, other):
+        """Add the metrics of another thread to these ones.
+
+        :param other: Metrics to merge.
+        :type other: quadriga.metrics._Stats
+        """
+        self.started += other.started
+        self.latency.merge(other.latency)
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.decode_time += other.decode_time
+        for counts, other_counts in (
+            (self.statuses, other.statuses),
+            (self.error_codes, other.error_codes),
+        ):
+            for key, count in list(other_counts.items()):
+                counts[key] = counts.get(key, 0) + count
+
+
+class _Owner(object):
+    """Token kept in a thread's local storage, freed when the thread exits."""
+
+    __slots__ = ('__weakref__',)
+
+
+class RequestMetrics(object):
+    """Request metrics per endpoint and order book.
+
+    Pass an instance to :class:`quadriga.client.QuadrigaClient` to record, for
+    each endpoint and order book:
+
+    - a latency histogram (time from sending a request to receiving the
+      response, with p50, p99 and p999 in snapshots)
+    - bytes sent and received
+    - time spent decoding response bodies
+    - counts of HTTP status codes and QuadrigaCX error codes
+    - the number of requests in flight
+
+    Each thread records into its own set of counters, so recording takes no
+    locks. Counters of threads which exited are folded into one set, so
+    memory and snapshot time do not grow with the number of threads started
+    over time. Snapshots add up the counters of all threads, and may miss the
+    requests completing while they are taken.
+
+    :param enabled: If set to False (default: True), nothing is recorded
+        until :attr:`enabled` is set to True. Clients without metrics skip
+        instrumentation altogether.
+    :type enabled: bool
+    """
+
+    #: Percentiles reported in snapshots.
+    percentiles = (('p50', 50), ('p99', 99), ('p999', 99.9))
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._shards = {}
+        self._exited = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<RequestMetrics enabled={}>'.format(self.enabled)
+
+    def _stats(self, endpoint, book):
+        """Return the calling thread's metrics of an endpoint and order book.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param book: Order book name, or None.
+        :type book: str | unicode
+        :rtype: quadriga.metrics._Stats
+        """
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        stats = shard.get((endpoint, book))
+        if stats is None:
+            stats = shard[(endpoint, book)] = _Stats()
+        return stats
+
+    def _new_shard(self):
+        """Create the calling thread's set of counters.
+
+        The set is tied to a token in the thread's local storage. Once the
+        thread exits and the token is freed, the set is queued to be folded
+        into the counters of exited threads.
+
+        :return: Metrics keyed by (endpoint, order book).
+        :rtype: dict
+        """
+        shard = {}
+        owner = _Owner()
+        ref = weakref.ref(owner, self._exited.append)
+        with self._lock:
+            self._fold()
+            self._shards[ref] = shard
+        self._local.owner = owner
+        self._local.shard = shard
+        return shard
+
+    def _fold(self):
+        """Fold the counters of exited threads together.
+
+        Must be called with the lock held.
+        """
+        while self._exited:
+            shard = self._shards.pop(self._exited.pop(), None)
+            for key, stats in (shard or {}).items():
+                if key not in self._retired:
+                    self._retired[key] = _Stats()
+                self._retired[key].merge(stats)
+
+    def start(self, endpoint, book):
+        """Record a request being sent.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param book: Order book name, or None.
+        :type book: str | unicode
+        """
+        self._stats(endpoint, book).started += 1
+
+    def finish(self,
+               endpoint,
+               book,
+               latency,
+               status=None,
+               bytes_out=0,
+               bytes_in=0,
+               decode_time=0.0,
+               error_code=None):
+        """Record a request being completed.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param book: Order book name, or None.
+        :type book: str | unicode
+        :param latency: Number of seconds until the response was received.
+        :type latency: float
+        :param status: HTTP status code, or None if no response was received.
+        :type status: int
+        :param bytes_out: Number of bytes of request data sent.
+        :type bytes_out: int
+        :param bytes_in: Number of bytes of response body received.
+        :type bytes_in: int
+        :param decode_time: Number of seconds spent decoding the response.
+        :type decode_time: float
+        :param error_code: Error code from QuadrigaCX, if any.
+        :type error_code: int | str | unicode
+        """
+        stats = self._stats(endpoint, book)
+        stats.latency.record(latency)
+        stats.bytes_out += bytes_out
+        stats.bytes_in += bytes_in
+        stats.decode_time += decode_time
+        statuses = stats.statuses
+        statuses[status] = statuses.get(status, 0) + 1
+        if error_code is not None:
+            error_codes = stats.error_codes
+            error_codes[error_code] = error_codes.get(error_code, 0) + 1
+
+    def _merged(self):
+        """Add up the metrics of all threads.
+
+        :return: Metrics keyed by (endpoint, order book).
+        :rtype: dict
+        """
+        merged = {}
+        with self._lock:
+            self._fold()
+            shards = list(self._shards.values())
+            shards.append(self._retired)
+        for shard in shards:
+            for key, stats in list(shard.items()):
+                if key not in merged:
+                    merged[key] = _Stats()
+                merged[key].merge(stats)
+        return merged
+
+    def snapshot(self):
+        """Return the metrics recorded so far.
+
+        :return: One dict per endpoint and order book, sorted by endpoint
+            then order book, with the following keys: "endpoint", "book",
+            "requests" (completed), "in_flight", "latency" (dict of "mean",
+            "max" and percentiles in seconds), "bytes_in", "bytes_out",
+            "decode_time" (total seconds), "statuses" (counts keyed by HTTP
+            status code, or None for requests which received no response) and
+            "error_codes" (counts keyed by QuadrigaCX error code).
+        :rtype: [dict]
+        """
+        merged = self._merged()
+        records = []
+        for endpoint, book in sorted(merged, key=lambda k: (k[0], k[1] or '')):
+            stats = merged[(endpoint, book)]
+            latency = stats.latency
+            summary = {
+                'mean': latency.total / latency.count if latency.count else 0,
+                'max': latency.max,
+            }
+            for name, percent in self.percentiles:
+                summary[name] = latency.percentile(percent)
+            records.append({
+                'endpoint': endpoint,
+                'book': book,
+                'requests': latency.count,
+                'in_flight': stats.started - latency.count,
+                'latency': summary,
+                'bytes_in': stats.bytes_in,
+                'bytes_out': stats.bytes_out,
+                'decode_time': stats.decode_time,
+                'statuses': stats.statuses,
+                'error_codes': stats.error_codes,
+            })
+        return records
+
+    def in_flight(self):
+        """Return the number of requests in flight per endpoint.
+
+        :return: Requests in flight keyed by endpoint.
+        :rtype: dict
+        """
+        gauges = {}
+        for (endpoint, _), stats in self._merged().items():
+            gauges[endpoint] = (
+                gauges.get(endpoint, 0) + stats.started - stats.latency.count
+            )
+        return gauges
+
+    def export(self, fp):
+        """Write a snapshot of the metrics to a file as JSON.
+
+        :param fp: File object opened for writing text.
+        :type fp: file
+        """
+        records = self.snapshot()
+        for record in records:
+            for key in ('statuses', 'error_codes'):
+                record[key] = {
+                    str(code): count for code, count in record[key].items()
+                }
+        fp.write(json.dumps(records, sort_keys=True))
+
+    def reset(self):
+        """Discard the metrics recorded so far.
+
+        Counts of requests in flight are reset too, so they may be negative
+        until those requests complete.
+        """
+        with self._lock:
+            self._fold()
+            self._retired.clear()
+            for shard in self._shards.values():
+                shard.clear()
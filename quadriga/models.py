@@ -0,0 +1,226 @@
+from __future__ import absolute_import, unicode_literals, division
+
+from decimal import Decimal, InvalidOperation
+
+
+class _LazyDecimal(object):
+    """Descriptor converting a raw numeric field to Decimal on first access.
+
+    :param slot: Name of the slot holding the raw value.
+    :type slot: str | unicode
+    """
+
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            value = Decimal(repr(value) if isinstance(value, float) else value)
+        except (TypeError, InvalidOperation):
+            return value
+        setattr(instance, self.slot, value)
+        return value
+
+
+class Result(object):
+    """Base class for compact API results.
+
+    Numeric fields are stored as returned by QuadrigaCX (usually strings), and
+    converted to ``decimal.Decimal`` the first time they are accessed.
+    Instances have no ``__dict__``, which makes them much smaller than the
+    dicts returned by default.
+    """
+
+    __slots__ = ()
+
+    #: Names of the public fields, in the same order as ``__slots__``.
+    fields = ()
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, ' '.join(
+            '{}={}'.format(field, getattr(self, field))
+            for field in self.fields
+        ))
+
+    def __eq__(self, other):
+        return (
+            type(self) is type(other) and
+            self.as_tuple() == other.as_tuple()
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def as_tuple(self):
+        """Return the field values (numeric fields converted).
+
+        :return: Field values in the order of :attr:`fields`.
+        :rtype: tuple
+        """
+        return tuple(getattr(self, field) for field in self.fields)
+
+    def as_dict(self):
+        """Return the fields as a dict (numeric fields converted).
+
+        :return: Field values keyed by field name.
+        :rtype: dict
+        """
+        return dict(zip(self.fields, self.as_tuple()))
+
+
+class Ticker(Result):
+    """Latest ticker information of an order book."""
+
+    __slots__ = (
+        '_last', '_bid', '_ask', '_high', '_low', '_vwap', '_volume',
+        'timestamp'
+    )
+    fields = (
+        'last', 'bid', 'ask', 'high', 'low', 'vwap', 'volume', 'timestamp'
+    )
+
+    last = _LazyDecimal('_last')
+    bid = _LazyDecimal('_bid')
+    ask = _LazyDecimal('_ask')
+    high = _LazyDecimal('_high')
+    low = _LazyDecimal('_low')
+    vwap = _LazyDecimal('_vwap')
+    volume = _LazyDecimal('_volume')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a ticker from a /ticker response body.
+
+        :param data: Response body.
+        :type data: dict
+        :rtype: quadriga.models.Ticker
+        """
+        get = data.get
+        return cls(
+            get('last'), get('bid'), get('ask'), get('high'), get('low'),
+            get('vwap'), get('volume'), get('timestamp')
+        )
+
+
+class BookLevel(Result):
+    """Price level (or a single order, if not grouped) of an order book."""
+
+    __slots__ = ('_price', '_amount')
+    fields = ('price', 'amount')
+
+    price = _LazyDecimal('_price')
+    amount = _LazyDecimal('_amount')
+
+    @classmethod
+    def from_book(cls, data):
+        """Create price levels from an /order_book response body.
+
+        :param data: Response body.
+        :type data: dict
+        :return: Order book with bids and asks as lists of price levels.
+        :rtype: dict
+        """
+        return {
+            'timestamp': data.get('timestamp'),
+            'bids': [cls(price, amount) for price, amount in data['bids']],
+            'asks': [cls(price, amount) for price, amount in data['asks']],
+        }
+
+
+class Trade(Result):
+    """Public trade completed on an order book."""
+
+    __slots__ = ('tid', 'date', '_price', '_amount', 'side')
+    fields = ('tid', 'date', 'price', 'amount', 'side')
+
+    price = _LazyDecimal('_price')
+    amount = _LazyDecimal('_amount')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a trade from a row of a /transactions response body.
+
+        :param data: Response body row.
+        :type data: dict
+        :rtype: quadriga.models.Trade
+        """
+        get = data.get
+        return cls(
+            get('tid'), get('date'), get('price'), get('amount'), get('side')
+        )
+
+
+class UserTrade(Result):
+    """Trade (or other transaction) in the user's history for an order book.
+
+    Amounts of the order book's major and minor currencies are available as
+    **major** and **minor** (e.g. BTC and CAD amounts for "btc_cad").
+    """
+
+    __slots__ = (
+        'id', 'datetime', 'type', 'order_id', '_rate', '_fee', '_major',
+        '_minor'
+    )
+    fields = (
+        'id', 'datetime', 'type', 'order_id', 'rate', 'fee', 'major', 'minor'
+    )
+
+    rate = _LazyDecimal('_rate')
+    fee = _LazyDecimal('_fee')
+    major = _LazyDecimal('_major')
+    minor = _LazyDecimal('_minor')
+
+    @classmethod
+    def from_dict(cls, data, major, minor):
+        """Create a user trade from a row of a /user_transactions response.
+
+        :param data: Response body row.
+        :type data: dict
+        :param major: Major currency of the order book (e.g. "btc").
+        :type major: str | unicode
+        :param minor: Minor currency of the order book (e.g. "cad").
+        :type minor: str | unicode
+        :rtype: quadriga.models.UserTrade
+        """
+        get = data.get
+        return cls(
+            get('id'), get('datetime'), get('type'), get('order_id'),
+            get('rate'), get('fee'), get(major), get(minor)
+        )
+
+
+class Order(Result):
+    """User's order currently open on an order book."""
+
+    __slots__ = ('id', 'datetime', 'type', '_price', '_amount', 'status')
+    fields = ('id', 'datetime', 'type', 'price', 'amount', 'status')
+
+    price = _LazyDecimal('_price')
+    amount = _LazyDecimal('_amount')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an order from a row of an /open_orders response body.
+
+        :param data: Response body row.
+        :type data: dict
+        :rtype: quadriga.models.Order
+        """
+        get = data.get
+        return cls(
+            get('id'), get('datetime'), get('type'), get('price'),
+            get('amount'), get('status')
+        )
@@ -0,0 +1,76 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import os
+import threading
+import time
+
+# Python 2 has no atomic os.replace, but os.rename is atomic on POSIX.
+_replace = getattr(os, 'replace', os.rename)
+
+
+class NonceGenerator(object):
+    """Thread-safe generator of strictly increasing nonces.
+
+    Nonces follow the system clock in units of 100 microseconds. If the clock
+    has not advanced (e.g. two threads signing within the same 100
+    microseconds) or has stepped backwards since the last nonce, the last nonce
+    plus one is used instead. Nonces are therefore unique and strictly
+    increasing across all threads sharing the generator.
+
+    :param path: Path to a file used to persist nonces across process restarts.
+        If not set, nonces are kept in memory only.
+    :type path: str | unicode
+    :param reserve: Number of nonces reserved with each write to **path**
+        (default: 100000, or 10 seconds' worth of clock ticks). Larger values
+        mean fewer writes, but a larger gap in nonces after a restart.
+    :type reserve: int
+    """
+
+    def __init__(self, path=None, reserve=100000):
+        self._lock = threading.Lock()
+        self._path = path
+        self._reserve = reserve
+        self._reserved = 0
+        self._last = 0
+        if path is not None and os.path.exists(path):
+            with open(path) as fp:
+                self._last = self._reserved = int(fp.read().strip() or 0)
+
+    def __repr__(self):
+        return '<NonceGenerator last={}>'.format(self._last)
+
+    def __call__(self):
+        """Return the next nonce.
+
+        :return: Nonce greater than all previously returned ones.
+        :rtype: int
+        """
+        with self._lock:
+            nonce = max(int(time.time() * 10000), self._last + 1)
+            if self._path is not None and nonce > self._reserved:
+                self._persist(nonce + self._reserve)
+            self._last = nonce
+            return nonce
+
+    @property
+    def last(self):
+        """Return the last nonce generated (or restored from file).
+
+        :return: Last nonce, or 0 if none was generated yet.
+        :rtype: int
+        """
+        return self._last
+
+    def _persist(self, reserved):
+        """Atomically write the highest reserved nonce to file.
+
+        :param reserved: Highest reserved nonce.
+        :type reserved: int
+        """
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w') as fp:
+            fp.write(str(reserved))
+            fp.flush()
+            os.fsync(fp.fileno())
+        _replace(tmp_path, self._path)
+        self._reserved = reserved
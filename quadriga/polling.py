@@ -0,0 +1,236 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+
+from quadriga.utils import monotonic
+
+
+class PollingScheduler(object):
+    """Scheduler sharing a global request budget between order books.
+
+    Each order book is polled for its ticker at its own interval. After every
+    poll, the book's activity score is updated from the changes since its
+    previous ticker: a new last price, a new 24h volume (trades arrived) and a
+    new best bid or ask (book churn at the top). Activity can also be reported
+    from other sources with :func:`observe` (e.g. the number of new trades
+    from a :class:`quadriga.tape.TradeTape`, or the size of a
+    :class:`quadriga.diff.BookDelta`).
+
+    The budget is then split between order books: every book gets at least
+    one poll per **max_interval**, and the rest of the budget is handed out in
+    proportion to activity scores, up to one poll per **min_interval**. Quiet
+    books are polled rarely, and active books get fresher data.
+
+    :param client: QuadrigaCX client.
+    :type client: quadriga.client.QuadrigaClient
+    :param books: Order book names. If not set, all supported order books are
+        polled.
+    :type books: [str | unicode]
+    :param budget: Global budget in requests per second (default: 2).
+    :type budget: int | float
+    :param min_interval: Minimum number of seconds between polls of a book
+        (default: 1).
+    :type min_interval: int | float
+    :param max_interval: Maximum number of seconds between polls of a book
+        (default: 60).
+    :type max_interval: int | float
+    :param smoothing: Weight of the latest observation in the exponential
+        moving average of activity scores, between 0 and 1 (default: 0.3).
+    :type smoothing: float
+    :raise InvalidOrderBookError: If an invalid order book is given.
+    """
+
+    #: Ticker fields whose changes are counted as activity.
+    ticker_fields = (('last',), ('volume',), ('bid', 'ask'))
+
+    def __init__(self,
+                 client,
+                 books=None,
+                 budget=2,
+                 min_interval=1,
+                 max_interval=60,
+                 smoothing=0.3):
+        self._client = client
+        self._books = sorted(client.order_books if books is None else books)
+        for book in self._books:
+            # Raises InvalidOrderBookError for unsupported order books.
+            client.book(book)
+        self._budget = budget
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._smoothing = smoothing
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._activity = dict.fromkeys(self._books, 1.0)
+        self._intervals = {}
+        self._tickers = {}
+        self._polled = {}
+        self._allocate()
+
+    def __repr__(self):
+        return '<PollingScheduler books={} budget={}>'.format(
+            len(self._books), self._budget
+        )
+
+    def subscribe(self, callback):
+        """Call a function with every ticker fetched.
+
+        :param callback: Function called with the order book name and the
+            ticker.
+        :type callback: callable
+        :return: The callback, so this method can be used as a decorator.
+        :rtype: callable
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling a function subscribed earlier.
+
+        :param callback: Subscribed function.
+        :type callback: callable
+        """
+        self._subscribers.remove(callback)
+
+    def _allocate(self):
+        """Split the budget between order books by activity."""
+        min_rate = 1 / self._max_interval
+        max_rate = 1 / self._min_interval
+        count = len(self._books)
+        spare = self._budget - count * min_rate
+        total = sum(self._activity.values())
+        for book in self._books:
+            if spare <= 0:
+                rate = self._budget / count
+            elif total > 0:
+                rate = min_rate + spare * self._activity[book] / total
+            else:
+                rate = min_rate + spare / count
+            self._intervals[book] = 1 / min(rate, max_rate)
+
+    def _observe(self, book, activity):
+        """Update the activity score of an order book.
+
+        :param book: Order book name.
+        :type book: str | unicode
+        :param activity: Activity observed.
+        :type activity: int | float
+        """
+        score = self._activity[book]
+        self._activity[book] = score + self._smoothing * (activity - score)
+
+    def observe(self, book, activity):
+        """Report activity on an order book and reallocate the budget.
+
+        :param book: Order book name.
+        :type book: str | unicode
+        :param activity: Activity observed since the previous report (e.g. a
+            number of new trades or changed price levels).
+        :type activity: int | float
+        :raise KeyError: If the order book is not scheduled.
+        """
+        with self._lock:
+            self._observe(book, activity)
+            self._allocate()
+
+    def _ticker_activity(self, previous, ticker):
+        """Return the number of ticker field groups which changed.
+
+        :param previous: Previous ticker.
+        :type previous: dict
+        :param ticker: Latest ticker.
+        :type ticker: dict
+        :rtype: int
+        """
+        return sum(
+            any(previous.get(field) != ticker.get(field) for field in group)
+            for group in self.ticker_fields
+        )
+
+    def _due(self, book, now):
+        """Return the number of seconds until an order book is due.
+
+        :param book: Order book name.
+        :type book: str | unicode
+        :param now: Current monotonic time.
+        :type now: float
+        :return: Number of seconds, or 0 or lower if the book is due now.
+        :rtype: float
+        """
+        polled = self._polled.get(book)
+        if polled is None:
+            return 0
+        return polled + self._intervals[book] - now
+
+    def delay(self):
+        """Return the number of seconds until the next order book is due.
+
+        :return: Number of seconds, or 0 if an order book is due now.
+        :rtype: float
+        """
+        now = monotonic()
+        with self._lock:
+            return max(0, min(self._due(book, now) for book in self._books))
+
+    def run_pending(self):
+        """Fetch the tickers of the order books which are due, concurrently.
+
+        :return: Tickers (or exceptions raised) keyed by order book name.
+        :rtype: dict
+        """
+        now = monotonic()
+        with self._lock:
+            due = [book for book in self._books if self._due(book, now) <= 0]
+        if not due:
+            return {}
+        tickers = self._client.fan_out(due, 'get_ticker')
+        with self._lock:
+            for book, ticker in tickers.items():
+                self._polled[book] = now
+                if isinstance(ticker, BaseException):
+                    continue
+                previous = self._tickers.get(book)
+                self._tickers[book] = ticker
+                if previous is not None:
+                    self._observe(
+                        book, self._ticker_activity(previous, ticker)
+                    )
+            self._allocate()
+        for book in due:
+            if not isinstance(tickers[book], BaseException):
+                for callback in list(self._subscribers):
+                    callback(book, tickers[book])
+        return tickers
+
+    def run(self, sleep=time.sleep):
+        """Poll order books forever, as they become due.
+
+        :param sleep: Function called with the number of seconds to wait
+            between rounds (default: ``time.sleep``).
+        :type sleep: callable
+        """
+        while True:
+            self.run_pending()
+            sleep(self.delay())
+
+    def rates(self):
+        """Return the polling rate of each order book, for monitoring.
+
+        :return: Polls per second keyed by order book name.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                book: 1 / interval
+                for book, interval in self._intervals.items()
+            }
+
+    def activity(self):
+        """Return the activity score of each order book, for monitoring.
+
+        :return: Activity scores keyed by order book name.
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._activity)
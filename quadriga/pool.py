@@ -0,0 +1,201 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from decimal import Decimal
+
+from quadriga.client import QuadrigaClient
+from quadriga.ratelimit import RateLimiter
+from quadriga.replica import to_decimal
+from quadriga.utils import WorkerPool
+
+
+class ClientPool(object):
+    """Pool of QuadrigaCX clients, one per account.
+
+    Each account gets its own :class:`quadriga.client.QuadrigaClient`, and
+    therefore its own REST client, HTTP session and nonce sequence. If
+    **rate** is given, each account also gets its own
+    :class:`quadriga.ratelimit.RateLimiter`, since QuadrigaCX enforces request
+    limits per API key.
+
+    Work is routed to a pinned account, or to the least-loaded one (the
+    account with the fewest calls in flight, then the fewest calls so far).
+
+    :param accounts: Client arguments keyed by account name. Each value is a
+        dict of :class:`quadriga.client.QuadrigaClient` arguments, usually
+        **api_key**, **api_secret** and **client_id**.
+    :type accounts: dict
+    :param rate: Budget of each account in requests per second. If not set,
+        requests are not rate limited (unless an account is given its own
+        **rate_limiter**).
+    :type rate: int | float
+    :param max_workers: Maximum number of accounts called concurrently by
+        aggregate calls (default: 10), on a pool of worker threads stopped by
+        :func:`close`.
+    :type max_workers: int
+    :param kwargs: Client arguments shared by all accounts (e.g. **timeout**
+        or **logger**). Per-account arguments take precedence.
+    :raise ValueError: If no accounts are given.
+    """
+
+    def __init__(self, accounts, rate=None, max_workers=10, **kwargs):
+        if not accounts:
+            raise ValueError('At least one account is required')
+        self._clients = {}
+        for name, account_kwargs in accounts.items():
+            client_kwargs = dict(kwargs)
+            if rate is not None:
+                client_kwargs['rate_limiter'] = RateLimiter(rate)
+            client_kwargs.update(account_kwargs)
+            self._clients[name] = QuadrigaClient(**client_kwargs)
+        self._names = sorted(self._clients)
+        self._workers = WorkerPool(max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = dict.fromkeys(self._names, 0)
+        self._calls = dict.fromkeys(self._names, 0)
+
+    def __repr__(self):
+        return '<ClientPool accounts={}>'.format(len(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def close(self):
+        """Stop the worker threads of aggregate calls, and close the client of
+        each account.
+        """
+        self._workers.close()
+        for client in self._clients.values():
+            client.close()
+
+    @property
+    def accounts(self):
+        """Return the account names.
+
+        :rtype: [str | unicode]
+        """
+        return list(self._names)
+
+    def client(self, account):
+        """Return the client of an account.
+
+        :param account: Account name.
+        :type account: str | unicode
+        :rtype: quadriga.client.QuadrigaClient
+        :raise KeyError: If the account is not in the pool.
+        """
+        return self._clients[account]
+
+    def loads(self):
+        """Return the number of calls in flight per account, for monitoring.
+
+        :return: Calls in flight keyed by account name.
+        :rtype: dict
+        """
+        with self._lock:
+            return dict(self._in_flight)
+
+    def _acquire(self, account=None):
+        """Pick an account and count a call in flight on it.
+
+        :param account: Account name. If not set, the least-loaded account is
+            picked.
+        :type account: str | unicode
+        :return: Account name.
+        :rtype: str | unicode
+        :raise KeyError: If the account is not in the pool.
+        """
+        with self._lock:
+            if account is None:
+                account = min(
+                    self._names,
+                    key=lambda name: (self._in_flight[name], self._calls[name])
+                )
+            self._in_flight[account] += 1
+            self._calls[account] += 1
+            return account
+
+    def _release(self, account):
+        """Count a call in flight on an account as done.
+
+        :param account: Account name.
+        :type account: str | unicode
+        """
+        with self._lock:
+            self._in_flight[account] -= 1
+
+    def run(self, func, account=None):
+        """Call a function with the client of an account.
+
+        :param func: Function called with a client.
+        :type func: callable
+        :param account: Account name. If not set, the least-loaded account is
+            used.
+        :type account: str | unicode
+        :return: Result of the function.
+        :raise KeyError: If the account is not in the pool.
+        """
+        account = self._acquire(account)
+        try:
+            return func(self._clients[account])
+        finally:
+            self._release(account)
+
+    def map(self, func, accounts=None):
+        """Call a function with the client of each account, concurrently.
+
+        :param func: Function called with a client.
+        :type func: callable
+        :param accounts: Account names. If not set, all accounts are used.
+        :type accounts: [str | unicode]
+        :return: Results (or exceptions raised) keyed by account name.
+        :rtype: dict
+        :raise KeyError: If an account is not in the pool.
+        """
+        accounts = self._names if accounts is None else list(accounts)
+        for account in accounts:
+            if account not in self._clients:
+                raise KeyError(account)
+        results = self._workers.map(
+            lambda account: self.run(func, account),
+            accounts
+        )
+        return dict(zip(accounts, results))
+
+    def get_balances(self, accounts=None):
+        """Return the balance of each account, fetched concurrently.
+
+        :param accounts: Account names. If not set, all accounts are used.
+        :type accounts: [str | unicode]
+        :return: Balances (or exceptions raised) keyed by account name.
+        :rtype: dict
+        :raise KeyError: If an account is not in the pool.
+        """
+        return self.map(lambda client: client.get_balance(), accounts)
+
+    def get_pooled_balance(self, accounts=None):
+        """Return the balances of all accounts added up, fetched concurrently.
+
+        Only the available, reserved and total balances are added up. Fees
+        differ between accounts and are left out.
+
+        :param accounts: Account names. If not set, all accounts are used.
+        :type accounts: [str | unicode]
+        :return: Pooled balances, e.g. ``{'btc_available': Decimal('1.5')}``.
+        :rtype: dict
+        :raise KeyError: If an account is not in the pool.
+        :raise Exception: If a balance could not be fetched (the error raised
+            for the first such account, by account name).
+        """
+        balances = self.get_balances(accounts)
+        pooled = {}
+        for account in sorted(balances):
+            balance = balances[account]
+            if isinstance(balance, BaseException):
+                raise balance
+            for key, value in balance.items():
+                if key.endswith(('_available', '_reserved', '_balance')):
+                    pooled[key] = (
+                        pooled.get(key, Decimal(0)) + to_decimal(value)
+                    )
+        return pooled
@@ -0,0 +1,204 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import itertools
+import threading
+
+from quadriga.utils import monotonic
+
+PRIORITY_CANCEL = 0
+PRIORITY_ORDER = 1
+PRIORITY_PRIVATE = 2
+PRIORITY_PUBLIC = 3
+
+
+class TokenBucket(object):
+    """Token bucket refilled at a constant rate.
+
+    This class is not thread-safe and is meant to be used by
+    :class:`quadriga.ratelimit.RateLimiter` only.
+
+    :param rate: Number of tokens added per second.
+    :type rate: int | float
+    :param capacity: Maximum number of tokens (default: **rate**). The bucket
+        starts full.
+    :type capacity: int | float
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = max(capacity or rate, 1)
+        self._tokens = self.capacity
+        self._updated = monotonic()
+
+    def __repr__(self):
+        return '<TokenBucket rate={} capacity={}>'.format(
+            self.rate, self.capacity
+        )
+
+    def delay(self, now):
+        """Return the number of seconds until a token is available.
+
+        :param now: Current monotonic time.
+        :type now: float
+        :return: Number of seconds, or 0 if a token is available now.
+        :rtype: float
+        """
+        self._tokens = min(
+            self.capacity,
+            self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return 0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def consume(self):
+        """Take a token from the bucket."""
+        self._tokens -= 1
+
+
+class RateLimiter(object):
+    """Client-side rate limiter which admits requests by priority.
+
+    Each request takes a token from a global bucket and, if one is configured,
+    from a bucket for its endpoint. When tokens run out, requests are queued
+    and admitted in priority order, then in arrival order:
+
+    1. :data:`PRIORITY_CANCEL`: order cancellations
+    2. :data:`PRIORITY_ORDER`: order placements
+    3. :data:`PRIORITY_PRIVATE`: other private API calls
+    4. :data:`PRIORITY_PUBLIC`: public API (market data) calls
+
+    A queued request whose endpoint bucket is empty does not hold up requests
+    to other endpoints behind it.
+
+    :param rate: Global budget in requests per second (default: 10).
+    :type rate: int | float
+    :param burst: Maximum number of requests sent back-to-back once the budget
+        has accumulated (default: **rate**).
+    :type burst: int | float
+    :param endpoint_limits: Per-endpoint budgets mapping endpoints to requests
+        per second, or to (requests per second, burst) tuples (e.g.
+        ``{'/order_book': 1, '/ticker': (2, 5)}``).
+    :type endpoint_limits: dict
+    """
+
+    endpoint_priorities = {
+        '/cancel_order': PRIORITY_CANCEL,
+        '/buy': PRIORITY_ORDER,
+        '/sell': PRIORITY_ORDER,
+    }
+
+    priority_names = {
+        PRIORITY_CANCEL: 'cancel',
+        PRIORITY_ORDER: 'order',
+        PRIORITY_PRIVATE: 'private',
+        PRIORITY_PUBLIC: 'public',
+    }
+
+    def __init__(self, rate=10, burst=None, endpoint_limits=None):
+        self._bucket = TokenBucket(rate, burst)
+        self._endpoint_buckets = {}
+        for endpoint, limit in (endpoint_limits or {}).items():
+            if not isinstance(limit, tuple):
+                limit = (limit,)
+            self._endpoint_buckets[endpoint] = TokenBucket(*limit)
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._queue = []
+        self._stats = {
+            priority: {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for priority in self.priority_names
+        }
+
+    def __repr__(self):
+        return '<RateLimiter rate={} queued={}>'.format(
+            self._bucket.rate, len(self._queue)
+        )
+
+    def priority(self, method, endpoint):
+        """Return the priority class of a request.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :return: Priority class (lower is more urgent).
+        :rtype: int
+        """
+        if method == 'GET':
+            return PRIORITY_PUBLIC
+        return self.endpoint_priorities.get(endpoint, PRIORITY_PRIVATE)
+
+    def _first_eligible(self, now):
+        """Return the most urgent queued request whose endpoint has budget.
+
+        :param now: Current monotonic time.
+        :type now: float
+        :return: Queued request, or None if there are none eligible.
+        :rtype: tuple
+        """
+        for ticket in sorted(self._queue):
+            bucket = self._endpoint_buckets.get(ticket[2])
+            if bucket is None or bucket.delay(now) == 0:
+                return ticket
+        return None
+
+    def acquire(self, method, endpoint):
+        """Block until the request may be sent.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :return: Number of seconds the request was queued for.
+        :rtype: float
+        """
+        priority = self.priority(method, endpoint)
+        ticket = (priority, next(self._counter), endpoint)
+        endpoint_bucket = self._endpoint_buckets.get(endpoint)
+        start = monotonic()
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = monotonic()
+                    if self._first_eligible(now) is ticket:
+                        delay = self._bucket.delay(now)
+                        if delay == 0:
+                            break
+                    elif endpoint_bucket is not None:
+                        delay = endpoint_bucket.delay(now) or None
+                    else:
+                        delay = None
+                    self._cond.wait(delay)
+                self._bucket.consume()
+                if endpoint_bucket is not None:
+                    endpoint_bucket.consume()
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+            wait = monotonic() - start
+            stats = self._stats[priority]
+            stats['requests'] += 1
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+        return wait
+
+    def stats(self):
+        """Return queue-wait statistics per priority class.
+
+        :return: Number of queued requests, and the number of requests
+            admitted along with their total, average and maximum queue-wait
+            times in seconds for each priority class.
+        :rtype: dict
+        """
+        with self._cond:
+            result = {'queued': len(self._queue)}
+            for priority, name in self.priority_names.items():
+                stats = dict(self._stats[priority])
+                stats['avg_wait'] = (
+                    stats['total_wait'] / stats['requests']
+                    if stats['requests'] else 0.0
+                )
+                result[name] = stats
+            return result
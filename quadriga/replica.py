@@ -0,0 +1,276 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+
+from quadriga.utils import monotonic
+
+
+def to_decimal(value):
+    """Convert a price or amount to Decimal.
+
+    :param value: Price or amount (e.g. "10.5", 10.5 or Decimal("10.5")).
+    :type value: int | float | str | unicode | decimal.Decimal
+    :rtype: decimal.Decimal
+    """
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(repr(value) if isinstance(value, float) else value)
+
+
+class _Side(object):
+    """Price levels of one side of an order book, best price first.
+
+    Levels are indexed by a sort key (the price for asks, the negated price
+    for bids) so that bisection works the same way on both sides.
+
+    :param levels: Price levels as [price, amount] pairs, in any order.
+    :type levels: list
+    :param descending: If set to True, higher prices are better (bids).
+    :type descending: bool
+    """
+
+    __slots__ = ('descending', 'keys', 'prices', 'amounts', 'depths')
+
+    def __init__(self, levels, descending):
+        self.descending = descending
+        merged = {}
+        for price, amount in levels:
+            price = to_decimal(price)
+            merged[price] = merged.get(price, 0) + to_decimal(amount)
+        self.prices = sorted(merged, reverse=descending)
+        self.keys = [-p for p in self.prices] if descending else self.prices
+        self.amounts = [merged[price] for price in self.prices]
+        self.depths = []
+        total = Decimal(0)
+        for amount in self.amounts:
+            total += amount
+            self.depths.append(total)
+
+    def __len__(self):
+        return len(self.prices)
+
+    def key(self, price):
+        return -price if self.descending else price
+
+    def amount_at(self, price):
+        key = self.key(price)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return self.amounts[index]
+        return Decimal(0)
+
+    def depth(self, price):
+        index = bisect_right(self.keys, self.key(price))
+        return self.depths[index - 1] if index else Decimal(0)
+
+
+class OrderBookReplica(object):
+    """Local replica of an order book, refreshed from /order_book snapshots.
+
+    Price levels are kept sorted with cumulative amounts, so the best prices
+    are found in O(1), and the amount at a price and the cumulative depth up
+    to a price in O(log n). A refresh swaps in the new snapshot at once:
+    readers never see a partially updated book, and do not need to lock.
+
+    This class is not meant to be instantiated directly. Use method
+    :func:`quadriga.client.QuadrigaClient.replica` instead, which shares one
+    replica per order book between all callers.
+
+    :param book: Order book API wrapper.
+    :type book: quadriga.book.OrderBook
+    """
+
+    def __init__(self, book):
+        self.name = book.name
+        self._book = book
+        self._lock = threading.Lock()
+        # Number of snapshots fetched by refresh, so callers waiting on the
+        # lock can tell whether a snapshot was fetched in the meantime.
+        self._refreshes = 0
+        # Bids, asks, snapshot timestamp and monotonic time of the refresh,
+        # replaced together in a single assignment.
+        self._state = (
+            _Side([], descending=True), _Side([], descending=False), None, None
+        )
+
+    def __repr__(self):
+        bids, asks = self._state[:2]
+        return '<OrderBookReplica \'{}\' bids={} asks={}>'.format(
+            self.name, len(bids), len(asks)
+        )
+
+    @property
+    def timestamp(self):
+        """Return the timestamp of the snapshot loaded last.
+
+        :rtype: str | unicode
+        """
+        return self._state[2]
+
+    @property
+    def age(self):
+        """Return the number of seconds since the replica was last refreshed.
+
+        :return: Number of seconds, or None if it was never refreshed.
+        :rtype: float
+        """
+        updated = self._state[3]
+        return None if updated is None else monotonic() - updated
+
+    def _side(self, side):
+        """Return the price levels of the given side.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :rtype: quadriga.replica._Side
+        :raise ValueError: If an invalid side is given.
+        """
+        if side == 'bids':
+            return self._state[0]
+        if side == 'asks':
+            return self._state[1]
+        raise ValueError('Invalid order book side: {}'.format(side))
+
+    def load(self, snapshot):
+        """Replace the replica's content with an /order_book snapshot.
+
+        :param snapshot: Response body of
+            :func:`quadriga.book.OrderBook.get_public_orders` (grouped or not).
+        :type snapshot: dict
+        """
+        self._state = (
+            _Side(snapshot['bids'], descending=True),
+            _Side(snapshot['asks'], descending=False),
+            snapshot.get('timestamp'),
+            monotonic()
+        )
+
+    def refresh(self, max_age=None):
+        """Refresh the replica from a new /order_book snapshot.
+
+        Concurrent callers do not send duplicate requests: while a refresh is
+        in progress, other callers wait for it and use its result.
+
+        :param max_age: If set, the replica is refreshed only if it is older
+            than this number of seconds.
+        :type max_age: int | float
+        :return: True if a snapshot was fetched by this call, False otherwise.
+        :rtype: bool
+        """
+        refreshes = self._refreshes
+        with self._lock:
+            if self._refreshes != refreshes:
+                return False
+            age = self.age
+            if max_age is not None and age is not None and age <= max_age:
+                return False
+            self.load(self._book.get_public_orders(group=True))
+            self._refreshes += 1
+            return True
+
+    def best_bid(self):
+        """Return the highest bid.
+
+        :return: Price and amount, or None if there are no bids.
+        :rtype: (decimal.Decimal, decimal.Decimal)
+        """
+        bids = self._state[0]
+        return (bids.prices[0], bids.amounts[0]) if len(bids) else None
+
+    def best_ask(self):
+        """Return the lowest ask.
+
+        :return: Price and amount, or None if there are no asks.
+        :rtype: (decimal.Decimal, decimal.Decimal)
+        """
+        asks = self._state[1]
+        return (asks.prices[0], asks.amounts[0]) if len(asks) else None
+
+    def spread(self):
+        """Return the difference between the lowest ask and the highest bid.
+
+        :return: Spread, or None if either side is empty.
+        :rtype: decimal.Decimal
+        """
+        bids, asks = self._state[:2]
+        if not len(bids) or not len(asks):
+            return None
+        return asks.prices[0] - bids.prices[0]
+
+    def mid_price(self):
+        """Return the average of the lowest ask and the highest bid.
+
+        :return: Mid price, or None if either side is empty.
+        :rtype: decimal.Decimal
+        """
+        bids, asks = self._state[:2]
+        if not len(bids) or not len(asks):
+            return None
+        return (asks.prices[0] + bids.prices[0]) / 2
+
+    def levels(self, side, count=None):
+        """Return price levels, best price first.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :param count: Maximum number of levels returned. If not set, all
+            levels are returned.
+        :type count: int
+        :return: Prices and amounts.
+        :rtype: [(decimal.Decimal, decimal.Decimal)]
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        return list(zip(levels.prices[:count], levels.amounts[:count]))
+
+    def amount_at(self, side, price):
+        """Return the amount offered at a price.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :param price: Price.
+        :type price: int | float | str | unicode | decimal.Decimal
+        :return: Amount, or 0 if there is no level at the price.
+        :rtype: decimal.Decimal
+        :raise ValueError: If an invalid side is given.
+        """
+        return self._side(side).amount_at(to_decimal(price))
+
+    def depth(self, side, price):
+        """Return the cumulative amount offered at a price or better.
+
+        For bids, this is the amount bid at or above the price. For asks, it
+        is the amount asked at or below the price.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :param price: Price.
+        :type price: int | float | str | unicode | decimal.Decimal
+        :return: Cumulative amount.
+        :rtype: decimal.Decimal
+        :raise ValueError: If an invalid side is given.
+        """
+        return self._side(side).depth(to_decimal(price))
+
+    def depth_within(self, side, percent):
+        """Return the cumulative amount offered within a percentage of the
+        best price.
+
+        :param side: Side of the order book ("bids" or "asks").
+        :type side: str | unicode
+        :param percent: Distance from the best price in percent (e.g. 1 for
+            bids down to 99% of the highest bid).
+        :type percent: int | float | str | unicode | decimal.Decimal
+        :return: Cumulative amount.
+        :rtype: decimal.Decimal
+        :raise ValueError: If an invalid side is given.
+        """
+        levels = self._side(side)
+        if not len(levels):
+            return Decimal(0)
+        ratio = to_decimal(percent) / 100
+        best = levels.prices[0]
+        bound = best * (1 - ratio if levels.descending else 1 + ratio)
+        return levels.depth(bound)
@@ -2,9 +2,13 @@ from __future__ import absolute_import, unicode_literals, division
 
 import hashlib
 import hmac
-import time
+import logging
+import threading
 
 from quadriga.exceptions import RequestError
+from quadriga.metrics import request_size
+from quadriga.nonce import NonceGenerator
+from quadriga.tracing import Hooks, RequestSpan
 
 
 class RestClient(object):
@@ -21,25 +25,99 @@ class RestClient(object):
     :param timeout: Number of seconds to wait for QuadrigaCX to respond to an
         API request.
     :type timeout: int | float
-    :param session: User-defined requests.Session object.
-    :type session: requests.Session
+    :param transport: HTTP transport.
+    :type transport: quadriga.transport.Transport
+    :param cache: Cache for responses to HTTP GET requests.
+    :type cache: quadriga.cache.ResponseCache
+    :param nonce_generator: Generator of nonces for signed requests. If not
+        set, an in-memory :class:`quadriga.nonce.NonceGenerator` is used.
+    :type nonce_generator: quadriga.nonce.NonceGenerator
+    :param rate_limiter: Rate limiter which requests must pass through before
+        they are sent.
+    :type rate_limiter: quadriga.ratelimit.RateLimiter
+    :param decoder: Decoder for response bodies. If not set, response bodies
+        are decoded with ``resp.json()``.
+    :type decoder: quadriga.decoding.JSONDecoder
+    :param metrics: Request metrics to record each request in.
+    :type metrics: quadriga.metrics.RequestMetrics
+    :param hooks: Request lifecycle hooks. If not set, an empty
+        :class:`quadriga.tracing.Hooks` is used.
+    :type hooks: quadriga.tracing.Hooks
+    :param logger: Logger to record the outcome and latency of each request
+        with, at debug level.
+    :type logger: logging.Logger
+    :param serialize_signed: If set to True (default: False), signed requests
+        are sent one at a time, each signed only once the previous one has
+        completed, so they reach QuadrigaCX in nonce order.
+    :type serialize_signed: bool
+
+    :ivar hooks: Request lifecycle hooks.
+    :vartype hooks: quadriga.tracing.Hooks
     """
 
     http_success_status_codes = {200, 201, 202}
 
-    def __init__(self, url, api_key, api_secret, client_id, timeout, session):
+    def __init__(self,
+                 url,
+                 api_key,
+                 api_secret,
+                 client_id,
+                 timeout,
+                 transport,
+                 cache=None,
+                 nonce_generator=None,
+                 rate_limiter=None,
+                 decoder=None,
+                 metrics=None,
+                 hooks=None,
+                 logger=None,
+                 serialize_signed=False):
         self._url = url
         self._api_key = str(api_key)
         self._hmac_key = str(api_secret).encode('utf-8')
         self._client_id = str(client_id)
         self._timeout = timeout
-        self._session = session
+        self._transport = transport
+        self._cache = cache
+        self._nonce = nonce_generator or NonceGenerator()
+        self._rate_limiter = rate_limiter
+        self._decoder = decoder
+        self._metrics = metrics
+        self.hooks = Hooks() if hooks is None else hooks
+        self._logger = logger
+        self._signed_lock = threading.Lock() if serialize_signed else None
+
+    def _sign(self, payload=None):
+        """Add the API key, nonce and HMAC signature to the request payload.
+
+        :param payload: Request payload.
+        :type payload: dict
+        :return: Signed request payload.
+        :rtype: dict
+        """
+        nonce = self._nonce()
+        hmac_msg = str(nonce) + self._client_id + self._api_key
+        signature = hmac.new(
+            key=self._hmac_key,
+            msg=hmac_msg.encode('utf-8'),
+            digestmod=hashlib.sha256
+        ).hexdigest()
 
-    def _handle_response(self, resp):
+        if payload is None:
+            payload = {}
+        payload['key'] = self._api_key
+        payload['nonce'] = nonce
+        payload['signature'] = signature
+        return payload
+
+    def _handle_response(self, resp, parser=None):
         """Handle the response from QuadrigaCX.
 
         :param resp: Response from QuadrigaCX.
         :type resp: requests.models.Response
+        :param parser: Function parsing the raw response body, used instead of
+            the decoder if given.
+        :type parser: callable
         :return: Response body.
         :rtype: dict
         :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
@@ -51,7 +129,14 @@ class RestClient(object):
                 message='[HTTP {}] {}'.format(http_code, resp.reason)
             )
         try:
-            body = resp.json()
+            if parser is not None:
+                body = parser(resp.content)
+                if self._decoder is not None:
+                    body = self._decoder.convert(body)
+            elif self._decoder is None:
+                body = resp.json()
+            else:
+                body = self._decoder.decode(resp.content)
         except ValueError:
             raise RequestError(
                 response=resp,
@@ -74,23 +159,53 @@ class RestClient(object):
                 )
             return body
 
-    def get(self, endpoint, params=None):
+    def get(self, endpoint, params=None, parser=None):
         """Send an HTTP GET request to QuadrigaCX.
 
         :param endpoint: API endpoint.
         :type endpoint: str | unicode
         :param params: URL parameters.
         :type params: dict
+        :param parser: Function parsing the raw response body (e.g.
+            :class:`quadriga.decoding.OrderBookParser`). Responses parsed with
+            equal parsers are cached together.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        if self._cache is None:
+            return self._get(endpoint, params, parser)
+        return self._cache.get(
+            endpoint,
+            params,
+            lambda endpoint, params: self._get(endpoint, params, parser),
+            variant=parser
+        )
+
+    def _get(self, endpoint, params, parser=None):
+        """Send an HTTP GET request to QuadrigaCX, bypassing the cache.
+
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param params: URL parameters.
+        :type params: dict
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
         :return: Response body from QuadrigaCX.
         :rtype: dict
         :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
         """
-        response = self._session.get(
+        if self._is_instrumented():
+            return self._send('GET', endpoint, params, parser)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire('GET', endpoint)
+        response = self._transport.get(
             url=self._url + endpoint,
             params=params,
             timeout=self._timeout
         )
-        return self._handle_response(response)
+        return self._handle_response(response, parser)
 
     def post(self, endpoint, payload=None):
         """Send an HTTP POST request to QuadrigaCX.
@@ -103,23 +218,223 @@ class RestClient(object):
         :rtype: dict
         :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
         """
-        nonce = int(time.time() * 10000)
-        hmac_msg = str(nonce) + self._client_id + self._api_key
-        signature = hmac.new(
-            key=self._hmac_key,
-            msg=hmac_msg.encode('utf-8'),
-            digestmod=hashlib.sha256
-        ).hexdigest()
+        if self._signed_lock is None:
+            return self._post(endpoint, payload)
+        with self._signed_lock:
+            return self._post(endpoint, payload)
 
-        if payload is None:
-            payload = {}
-        payload['key'] = self._api_key
-        payload['nonce'] = nonce
-        payload['signature'] = signature
+    def _post(self, endpoint, payload=None):
+        """Sign and send an HTTP POST request to QuadrigaCX.
 
-        response = self._session.post(
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param payload: Request payload.
+        :type payload: dict
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        if self._is_instrumented():
+            return self._send('POST', endpoint, payload)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire('POST', endpoint)
+        response = self._transport.post(
             url=self._url + endpoint,
-            json=payload,
+            json=self._sign(payload),
             timeout=self._timeout
         )
         return self._handle_response(response)
+
+    def _is_instrumented(self):
+        """Return True if requests must be timed for hooks, metrics or logs.
+
+        :rtype: bool
+        """
+        return bool(self.hooks) or (
+            self._metrics is not None and self._metrics.enabled
+        ) or (
+            self._logger is not None and
+            self._logger.isEnabledFor(logging.DEBUG)
+        )
+
+    def _send(self, method, endpoint, data, parser=None):
+        """Send an HTTP request to QuadrigaCX, timing each phase.
+
+        Hooks are called along the way, and metrics are recorded at the end.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param data: URL parameters for GET requests, payload (not yet signed)
+            for POST requests.
+        :type data: dict
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        span = self._start_span(method, endpoint, data)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint)
+            span.mark('rate_limit')
+        metrics = self._prepare_span(span, data)
+        try:
+            self.hooks.run('pre_send', span)
+            if method == 'GET':
+                span.response = self._transport.get(
+                    url=self._url + endpoint,
+                    params=span.data,
+                    timeout=self._timeout
+                )
+            else:
+                span.response = self._transport.post(
+                    url=self._url + endpoint,
+                    json=span.data,
+                    timeout=self._timeout
+                )
+            return self._finish_span(span, parser)
+        except Exception as err:
+            self._fail_span(span, err)
+            raise
+        finally:
+            self._complete(span, metrics)
+
+    @staticmethod
+    def _start_span(method, endpoint, data):
+        """Return the span of a new request.
+
+        :param method: HTTP method ("GET" or "POST").
+        :type method: str | unicode
+        :param endpoint: API endpoint.
+        :type endpoint: str | unicode
+        :param data: URL parameters or payload of the request.
+        :type data: dict
+        :rtype: quadriga.tracing.RequestSpan
+        """
+        book = data.get('book') if data else None
+        return RequestSpan(method, endpoint, book)
+
+    def _prepare_span(self, span, data):
+        """Sign the payload of a POST request, and start recording metrics.
+
+        The data to send is stored in the span.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        :param data: URL parameters for GET requests, payload (not yet signed)
+            for POST requests.
+        :type data: dict
+        :return: Request metrics to record the request in, if any.
+        :rtype: quadriga.metrics.RequestMetrics
+        """
+        if span.method == 'POST':
+            data = self._sign(data)
+            span.mark('sign')
+        span.data = data
+
+        metrics = self._metrics
+        if metrics is not None and metrics.enabled:
+            metrics.start(span.endpoint, span.book)
+            return metrics
+        return None
+
+    def _finish_span(self, span, parser=None):
+        """Handle the response received for a span.
+
+        :param span: Request span, with its response set.
+        :type span: quadriga.tracing.RequestSpan
+        :param parser: Function parsing the raw response body.
+        :type parser: callable
+        :return: Response body from QuadrigaCX.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If HTTP OK was not returned.
+        """
+        span.mark('send')
+        self.hooks.run('post_receive', span)
+        span.body = self._handle_response(span.response, parser)
+        span.mark('decode')
+        return span.body
+
+    @staticmethod
+    def _fail_span(span, err):
+        """Record the error of a failed request in its span.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        :param err: Error raised.
+        :type err: Exception
+        """
+        span.error = err
+        span.mark('send' if span.response is None else 'decode')
+
+    def _complete(self, span, metrics=None):
+        """Record, log and call the post_decode hooks of a completed request.
+
+        If the request failed, errors raised by the hooks are logged rather
+        than raised, so they do not replace the error of the request.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        :param metrics: Request metrics to record the request in, if any.
+        :type metrics: quadriga.metrics.RequestMetrics
+        """
+        if metrics is not None:
+            self._record(metrics, span)
+        if self._logger is not None:
+            self._log_span(span)
+        if span.error is None:
+            self.hooks.run('post_decode', span)
+            return
+        try:
+            self.hooks.run('post_decode', span)
+        except Exception:
+            logger = self._logger or logging.getLogger('quadriga')
+            logger.exception(
+                'post_decode hook failed on %s %s', span.method, span.endpoint
+            )
+
+    def _log_span(self, span):
+        """Log the outcome and latency of a completed request.
+
+        Records carry the ``endpoint``, ``book``, ``status`` and ``latency``
+        (in seconds) attributes.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        """
+        logger = self._logger
+        if logger.isEnabledFor(logging.DEBUG):
+            latency = span.duration
+            logger.debug(
+                '%s %s: status %s in %.1f ms',
+                span.method, span.endpoint, span.status, latency * 1000,
+                extra={
+                    'endpoint': span.endpoint,
+                    'book': span.book,
+                    'status': span.status,
+                    'latency': latency,
+                }
+            )
+
+    @staticmethod
+    def _record(metrics, span):
+        """Record the metrics of a completed request.
+
+        :param metrics: Request metrics.
+        :type metrics: quadriga.metrics.RequestMetrics
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        """
+        response = span.response
+        metrics.finish(
+            span.endpoint,
+            span.book,
+            span.phase('send'),
+            status=span.status,
+            bytes_out=request_size(span.method, span.data),
+            bytes_in=0 if response is None else len(response.content or b''),
+            decode_time=span.phase('decode'),
+            error_code=getattr(span.error, 'error_code', None)
+        )
@@ -0,0 +1,234 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import sqlite3
+import threading
+
+
+class TradeStore(object):
+    """Local SQLite store of user trade history, per account and order book.
+
+    Trades are keyed on (account, order book, trade ID), so inserting the same
+    trade twice has no effect. The store can be shared between threads.
+    Decimal values (e.g. from a :class:`quadriga.decoding.JSONDecoder` with
+    **number_type** set) are stored, and returned, as strings.
+
+    :param path: Path to the SQLite database file (default: ":memory:").
+    :type path: str | unicode
+    """
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS user_trades (
+            account TEXT NOT NULL,
+            book TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            datetime TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (account, book, id)
+        );
+        CREATE INDEX IF NOT EXISTS user_trades_datetime
+            ON user_trades (account, book, datetime);
+    '''
+
+    def __init__(self, path=':memory:'):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(self.schema)
+
+    def __repr__(self):
+        return '<TradeStore {}>'.format(self._path)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def insert(self, account, book, trades):
+        """Insert user trades, ignoring those already stored.
+
+        All trades are inserted in a single transaction: if any insert fails,
+        none of them are stored.
+
+        :param account: Account name (e.g. client ID).
+        :type account: str | unicode
+        :param book: Order book name.
+        :type book: str | unicode
+        :param trades: User trades as returned by
+            :func:`quadriga.book.OrderBook.get_user_trades`.
+        :type trades: collections.Iterable[dict]
+        :return: Number of trades inserted.
+        :rtype: int
+        """
+        rows = (
+            (account, book, int(trade['id']), trade.get('datetime'),
+             json.dumps(trade, default=str))
+            for trade in trades
+        )
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO user_trades '
+                '(account, book, id, datetime, data) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            return self._conn.total_changes - before
+
+    def high_watermark(self, account, book):
+        """Return the ID of the latest stored trade.
+
+        :param account: Account name (e.g. client ID).
+        :type account: str | unicode
+        :param book: Order book name.
+        :type book: str | unicode
+        :return: Highest trade ID, or None if no trades are stored.
+        :rtype: int
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT MAX(id) FROM user_trades '
+                'WHERE account = ? AND book = ?',
+                (account, book)
+            ).fetchone()[0]
+
+    def count(self, account, book):
+        """Return the number of stored trades.
+
+        :param account: Account name (e.g. client ID).
+        :type account: str | unicode
+        :param book: Order book name.
+        :type book: str | unicode
+        :return: Number of stored trades.
+        :rtype: int
+        """
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM user_trades '
+                'WHERE account = ? AND book = ?',
+                (account, book)
+            ).fetchone()[0]
+
+    def trades(self, account, book, start=None, end=None, sort='asc'):
+        """Return stored trades, optionally within a date and time range.
+
+        :param account: Account name (e.g. client ID).
+        :type account: str | unicode
+        :param book: Order book name.
+        :type book: str | unicode
+        :param start: Earliest date and time, inclusive (e.g. "2017-12-01" or
+            "2017-12-01 12:00:00").
+        :type start: str | unicode
+        :param end: Latest date and time, exclusive.
+        :type end: str | unicode
+        :param sort: Method used to sort the results by date and time. Allowed
+            values are "asc" for ascending order, and "desc" for descending
+            order (default: "asc").
+        :type sort: str | unicode
+        :return: User trades.
+        :rtype: [dict]
+        """
+        query = 'SELECT data FROM user_trades WHERE account = ? AND book = ?'
+        params = [account, book]
+        if start is not None:
+            query += ' AND datetime >= ?'
+            params.append(start)
+        if end is not None:
+            query += ' AND datetime < ?'
+            params.append(end)
+        order = 'DESC' if sort == 'desc' else 'ASC'
+        query += ' ORDER BY datetime {0}, id {0}'.format(order)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class TradeSync(object):
+    """Incremental synchronization of user trade history into a local store.
+
+    Each sync walks the trade history from the newest trade backwards and
+    stops at the latest trade already stored, so only new trades are fetched.
+    New trades are stored in a single transaction once the scan completes,
+    which keeps the store consistent if a sync is interrupted. Re-running a
+    sync with few new trades costs two requests per order book (the first page
+    of the history, and the next one prefetched by
+    :func:`quadriga.book.OrderBook.iter_user_trades`).
+
+    :param client: QuadrigaCX client.
+    :type client: quadriga.client.QuadrigaClient
+    :param store: Local trade store.
+    :type store: quadriga.store.TradeStore
+    :param account: Account name used to key stored trades (e.g. client ID).
+    :type account: str | unicode
+    :param page_size: Number of trades fetched per request (default: 100).
+    :type page_size: int
+    :raise ValueError: If no account name is given.
+    """
+
+    def __init__(self, client, store, account, page_size=100):
+        if not account:
+            raise ValueError('An account name is required')
+        self._client = client
+        self._store = store
+        self._account = account
+        self._page_size = page_size
+
+    def __repr__(self):
+        return '<TradeSync account={}>'.format(self._account)
+
+    @property
+    def account(self):
+        """Return the account name used to key stored trades.
+
+        :rtype: str | unicode
+        """
+        return self._account
+
+    def sync_book(self, name):
+        """Fetch and store trades newer than the latest stored trade.
+
+        :param name: Order book name.
+        :type name: str | unicode
+        :return: Number of new trades stored.
+        :rtype: int
+        :raise quadriga.exceptions.RequestError: If a request fails. No trades
+            are stored in that case.
+        """
+        book = self._client.book(name)
+        watermark = self._store.high_watermark(self._account, name)
+        new_trades = []
+        trades = book.iter_user_trades(page_size=self._page_size, sort='desc')
+        try:
+            for trade in trades:
+                if watermark is not None and int(trade['id']) <= watermark:
+                    break
+                new_trades.append(trade)
+        finally:
+            trades.close()
+        return self._store.insert(self._account, name, new_trades)
+
+    def sync(self, books=None):
+        """Synchronize many order books.
+
+        :param books: Order book names. If not set, all supported order books
+            are synchronized.
+        :type books: [str | unicode]
+        :return: Number of new trades stored keyed by order book name.
+        :rtype: dict
+        :raise quadriga.exceptions.RequestError: If a request fails. Trades
+            of order books synchronized before the failure remain stored.
+        """
+        books = sorted(self._client.order_books if books is None else books)
+        return {name: self.sync_book(name) for name in books}
+
+    def trades(self, book, start=None, end=None, sort='asc'):
+        """Return locally stored trades, optionally within a time range.
+
+        See :func:`quadriga.store.TradeStore.trades` for details.
+
+        :param book: Order book name.
+        :type book: str | unicode
+        :return: User trades.
+        :rtype: [dict]
+        """
+        return self._store.trades(self._account, book, start, end, sort)
@@ -0,0 +1,167 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+from collections import deque
+
+from quadriga.models import Trade
+from quadriga.utils import monotonic
+
+
+class TradeTape(object):
+    """Poller of an order book's public trades, yielding each trade once.
+
+    Every poll fetches the trades of the last minute (or of the last hour, if
+    the previous poll is too old for the minute window to overlap it). Trades
+    are returned newest first, so only the new ones at the head of the
+    response are processed: the scan stops at the first trade already seen.
+    New trades are appended to a bounded rolling window, and passed to every
+    subscriber.
+
+    The polling interval adapts to the trading activity: it is halved after a
+    poll returning new trades, and grows by half after one returning none.
+
+    :param book: Order book API wrapper.
+    :type book: quadriga.book.OrderBook
+    :param maxlen: Maximum number of trades kept in the rolling window
+        (default: 10000).
+    :type maxlen: int
+    :param min_interval: Minimum number of seconds between polls (default: 1).
+    :type min_interval: int | float
+    :param max_interval: Maximum number of seconds between polls
+        (default: 30).
+    :type max_interval: int | float
+    :param typed: If set to True (default: False), compact
+        :class:`quadriga.models.Trade` objects are kept and yielded instead of
+        dicts.
+    :type typed: bool
+    """
+
+    #: Maximum number of seconds since the previous poll for which the trades
+    #: of the last minute are enough to not miss any.
+    minute_window = 45
+
+    def __init__(self,
+                 book,
+                 maxlen=10000,
+                 min_interval=1,
+                 max_interval=30,
+                 typed=False):
+        self._book = book
+        self._window = deque(maxlen=maxlen)
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._typed = typed
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._last_tid = None
+        self._last_poll = None
+        self.interval = min_interval
+
+    def __repr__(self):
+        return '<TradeTape \'{}\' trades={} interval={}>'.format(
+            self._book.name, len(self._window), self.interval
+        )
+
+    def __len__(self):
+        return len(self._window)
+
+    @property
+    def last_tid(self):
+        """Return the ID of the latest trade seen.
+
+        :return: Trade ID, or None if no trades were seen yet.
+        :rtype: int
+        """
+        return self._last_tid
+
+    def subscribe(self, callback):
+        """Call a function with the new trades of every poll returning any.
+
+        :param callback: Function called with a list of new trades, oldest
+            first.
+        :type callback: callable
+        :return: The callback, so this method can be used as a decorator.
+        :rtype: callable
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling a function subscribed earlier.
+
+        :param callback: Subscribed function.
+        :type callback: callable
+        """
+        self._subscribers.remove(callback)
+
+    def window(self):
+        """Return the trades in the rolling window.
+
+        :return: Trades, oldest first.
+        :rtype: [dict] | [quadriga.models.Trade]
+        """
+        with self._lock:
+            return list(self._window)
+
+    def _new_trades(self, trades):
+        """Return the trades newer than the latest trade seen.
+
+        :param trades: Trades, newest first.
+        :type trades: [dict]
+        :return: New trades, oldest first.
+        :rtype: [dict]
+        """
+        last_tid = self._last_tid
+        new_trades = []
+        for trade in trades:
+            if last_tid is not None and int(trade['tid']) <= last_tid:
+                break
+            new_trades.append(trade)
+        new_trades.reverse()
+        return new_trades
+
+    def poll(self):
+        """Fetch the latest public trades and return the new ones.
+
+        :return: New trades, oldest first.
+        :rtype: [dict] | [quadriga.models.Trade]
+        :raise quadriga.exceptions.RequestError: If the request fails.
+        """
+        with self._lock:
+            now = monotonic()
+            recent = (
+                self._last_poll is not None and
+                now - self._last_poll <= self.minute_window
+            )
+            new_trades = self._new_trades(
+                self._book.get_public_trades('minute' if recent else 'hour')
+            )
+            self._last_poll = now
+            if new_trades:
+                self._last_tid = int(new_trades[-1]['tid'])
+                if self._typed:
+                    new_trades = [Trade.from_dict(t) for t in new_trades]
+                self._window.extend(new_trades)
+                self.interval = max(self._min_interval, self.interval / 2)
+            else:
+                self.interval = min(self._max_interval, self.interval * 1.5)
+        if new_trades:
+            for callback in list(self._subscribers):
+                callback(new_trades)
+        return new_trades
+
+    def stream(self, sleep=time.sleep):
+        """Poll forever and yield new trades one at a time, oldest first.
+
+        :param sleep: Function called with the number of seconds to wait
+            between polls (default: ``time.sleep``).
+        :type sleep: callable
+        :return: Generator of new trades.
+        :rtype: collections.Iterator[dict | quadriga.models.Trade]
+        :raise quadriga.exceptions.RequestError: If a request fails.
+        """
+        while True:
+            for trade in self.poll():
+                yield trade
+            sleep(self.interval)
@@ -0,0 +1,344 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import io
+import json
+import os
+import threading
+
+from quadriga.utils import monotonic
+
+
+class RequestSpan(object):
+    """Lifecycle of one request sent to QuadrigaCX, passed to hooks.
+
+    Phases are timed in the order they happen:
+
+    1. "rate_limit": waiting for the rate limiter, if any
+    2. "sign": signing the payload (POST requests only)
+    3. "send": sending the request and receiving the response
+    4. "decode": checking and decoding the response
+
+    The "send" phase cannot be split further: neither requests nor urllib3
+    report how long a request waited for a pooled connection. Requests only
+    wait for one if the transport is created with ``pool_block=True`` and
+    more threads than **pool_maxsize** send requests at once. Otherwise the
+    phase is network and server time, plus opening a connection if none was
+    free.
+
+    :ivar method: HTTP method ("GET" or "POST").
+    :vartype method: str | unicode
+    :ivar endpoint: API endpoint.
+    :vartype endpoint: str | unicode
+    :ivar book: Order book name, or None.
+    :vartype book: str | unicode
+    :ivar data: URL parameters, or signed payload (set before sending).
+    :vartype data: dict
+    :ivar response: Response (set once received).
+    :vartype response: quadriga.transport.Response | requests.Response
+    :ivar body: Decoded response body (set once decoded).
+    :vartype body: dict | list
+    :ivar error: Exception raised, if the request failed.
+    :vartype error: Exception
+    :ivar start: Monotonic time at which the request started.
+    :vartype start: float
+    :ivar phases: Phase names and durations in seconds, in order.
+    :vartype phases: [(str | unicode, float)]
+    """
+
+    __slots__ = (
+        'method', 'endpoint', 'book', 'data', 'response', 'body', 'error',
+        'start', 'phases', '_last'
+    )
+
+    def __init__(self, method, endpoint, book=None):
+        self.method = method
+        self.endpoint = endpoint
+        self.book = book
+        self.data = None
+        self.response = None
+        self.body = None
+        self.error = None
+        self.start = self._last = monotonic()
+        self.phases = []
+
+    def __repr__(self):
+        return '<RequestSpan {} {}>'.format(self.method, self.endpoint)
+
+    def mark(self, phase):
+        """Record the end of a phase.
+
+        :param phase: Phase name.
+        :type phase: str | unicode
+        :return: Duration of the phase in seconds.
+        :rtype: float
+        """
+        now = monotonic()
+        duration = now - self._last
+        self.phases.append((phase, duration))
+        self._last = now
+        return duration
+
+    def phase(self, name):
+        """Return the duration of a phase.
+
+        :param name: Phase name.
+        :type name: str | unicode
+        :return: Duration in seconds, or 0 if the phase did not happen.
+        :rtype: float
+        """
+        for phase, duration in self.phases:
+            if phase == name:
+                return duration
+        return 0.0
+
+    @property
+    def duration(self):
+        """Return the number of seconds from start to the last phase.
+
+        :rtype: float
+        """
+        return self._last - self.start
+
+    @property
+    def status(self):
+        """Return the HTTP status code.
+
+        :return: HTTP status code, or None if no response was received.
+        :rtype: int
+        """
+        return None if self.response is None else self.response.status_code
+
+
+class Hooks(object):
+    """Request lifecycle hooks of a client.
+
+    Each hook is a function called with the :class:`RequestSpan` of the
+    request, in the thread sending it:
+
+    - **pre_send**: right before the request is sent (after rate limiting and
+      signing)
+    - **post_receive**: right after the response is received
+    - **post_decode**: after the response is decoded, or after the request
+      failed (with :attr:`RequestSpan.error` set). Called once for every
+      request, last. If the request failed, errors raised by these hooks are
+      logged and the error of the request is raised instead.
+
+    Requests are only timed when at least one hook is registered (or request
+    metrics are recorded).
+    """
+
+    events = ('pre_send', 'post_receive', 'post_decode')
+
+    def __init__(self):
+        self.pre_send = []
+        self.post_receive = []
+        self.post_decode = []
+
+    def __repr__(self):
+        return '<Hooks {}>'.format(len(self))
+
+    def __len__(self):
+        return sum(len(getattr(self, event)) for event in self.events)
+
+    def __bool__(self):
+        return bool(self.pre_send or self.post_receive or self.post_decode)
+
+    __nonzero__ = __bool__
+
+    def _hooks(self, event):
+        """Return the hooks of an event.
+
+        :param event: Event name.
+        :type event: str | unicode
+        :rtype: [callable]
+        :raise ValueError: If the event is invalid.
+        """
+        if event not in self.events:
+            raise ValueError(
+                'Invalid event \'{}\'. Choose from {}.'
+                .format(event, self.events)
+            )
+        return getattr(self, event)
+
+    def register(self, event, hook):
+        """Register a hook.
+
+        :param event: Event name ("pre_send", "post_receive" or
+            "post_decode").
+        :type event: str | unicode
+        :param hook: Function called with a :class:`RequestSpan`.
+        :type hook: callable
+        :return: The hook.
+        :rtype: callable
+        :raise ValueError: If the event is invalid.
+        """
+        self._hooks(event).append(hook)
+        return hook
+
+    def unregister(self, event, hook):
+        """Remove a hook registered earlier.
+
+        :param event: Event name.
+        :type event: str | unicode
+        :param hook: Registered function.
+        :type hook: callable
+        :raise ValueError: If the event is invalid or the hook not registered.
+        """
+        self._hooks(event).remove(hook)
+
+    def run(self, event, span):
+        """Call the hooks of an event.
+
+        :param event: Event name.
+        :type event: str | unicode
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        """
+        for hook in getattr(self, event):
+            hook(span)
+
+
+class Tracer(object):
+    """Writer of request spans to a trace file, for offline profiling.
+
+    Two formats are supported:
+
+    - "chrome": Chrome trace events, one per request and one per phase,
+      which can be opened with ``chrome://tracing`` or Perfetto. Requests
+      are grouped by thread.
+    - "jsonl": one JSON object per request and per line, with the phase
+      durations, for analysis with other tools.
+
+    Timestamps and durations are in microseconds in Chrome traces, and in
+    seconds in JSONL traces.
+
+    :param path: Path to the trace file, overwritten if it exists.
+    :type path: str | unicode
+    :param format: Trace format, "chrome" or "jsonl" (default: "chrome").
+    :type format: str | unicode
+    :raise ValueError: If the format is invalid.
+    """
+
+    formats = ('chrome', 'jsonl')
+
+    def __init__(self, path, format='chrome'):
+        if format not in self.formats:
+            raise ValueError(
+                'Invalid format \'{}\'. Choose from {}.'
+                .format(format, self.formats)
+            )
+        self.path = path
+        self.format = format
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._fp = io.open(path, 'w', encoding='utf-8')
+        if format == 'chrome':
+            self._fp.write('[\n')
+        self._first = True
+        self._clients = []
+
+    def __repr__(self):
+        return '<Tracer {} \'{}\'>'.format(self.format, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def install(self, client):
+        """Start tracing the requests of a client.
+
+        :param client: QuadrigaCX client.
+        :type client: quadriga.client.QuadrigaClient
+        :return: The tracer.
+        :rtype: quadriga.tracing.Tracer
+        """
+        client.hooks.register('post_decode', self.record)
+        self._clients.append(client)
+        return self
+
+    def _chrome_events(self, span):
+        """Return the Chrome trace events of a span.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        :rtype: [dict]
+        """
+        tid = threading.current_thread().ident
+        args = {'book': span.book, 'status': span.status}
+        if span.error is not None:
+            args['error'] = repr(span.error)
+        events = [{
+            'name': '{} {}'.format(span.method, span.endpoint),
+            'cat': 'request',
+            'ph': 'X',
+            'ts': span.start * 1e6,
+            'dur': span.duration * 1e6,
+            'pid': self._pid,
+            'tid': tid,
+            'args': args,
+        }]
+        start = span.start
+        for phase, duration in span.phases:
+            events.append({
+                'name': phase,
+                'cat': 'phase',
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': duration * 1e6,
+                'pid': self._pid,
+                'tid': tid,
+            })
+            start += duration
+        return events
+
+    def _jsonl_record(self, span):
+        """Return the JSONL record of a span.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        :rtype: dict
+        """
+        return {
+            'method': span.method,
+            'endpoint': span.endpoint,
+            'book': span.book,
+            'start': span.start,
+            'duration': span.duration,
+            'status': span.status,
+            'error': None if span.error is None else repr(span.error),
+            'phases': dict(span.phases),
+        }
+
+    def record(self, span):
+        """Write a request span to the trace file.
+
+        :param span: Request span.
+        :type span: quadriga.tracing.RequestSpan
+        """
+        if self.format == 'chrome':
+            lines = [json.dumps(e) for e in self._chrome_events(span)]
+        else:
+            lines = [json.dumps(self._jsonl_record(span))]
+        with self._lock:
+            if self._fp.closed:
+                return
+            for line in lines:
+                if self.format == 'chrome':
+                    line = ('' if self._first else ',\n') + line
+                    self._first = False
+                else:
+                    line += '\n'
+                self._fp.write(line)
+
+    def close(self):
+        """Stop tracing and close the trace file."""
+        for client in self._clients:
+            client.hooks.unregister('post_decode', self.record)
+        self._clients = []
+        with self._lock:
+            if not self._fp.closed:
+                if self.format == 'chrome':
+                    self._fp.write('\n]\n')
+                self._fp.close()
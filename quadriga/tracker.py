@@ -0,0 +1,234 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from collections import OrderedDict
+
+from quadriga.replica import to_decimal
+
+# Order status codes returned by /lookup_order.
+_CANCELLED = -1
+_COMPLETE = 2
+
+
+class OrderTracker(object):
+    """Local tracker of user's open orders, reconciled in bulk.
+
+    Orders placed with :func:`quadriga.book.OrderBook.buy_limit_order` or
+    :func:`quadriga.book.OrderBook.sell_limit_order` are recorded with
+    :func:`track`. Each call to :func:`reconcile` lists the open orders of
+    every order book with tracked orders (one request per order book, sent
+    concurrently), and compares them with the tracked orders:
+
+    - An order whose remaining amount went down was partially filled.
+    - An order no longer open was either filled or cancelled. Only these
+      orders are looked up by ID, with
+      :func:`quadriga.client.QuadrigaClient.lookup_orders`.
+
+    The number of requests per cycle therefore grows with the number of order
+    books, not the number of orders. Orders of an order book whose open orders
+    could not be listed, and vanished orders which could not be looked up, are
+    left as they are until the next cycle.
+
+    Each change is reported as an event, a dict with the following keys:
+
+    - **event**: "fill" (partial fill), "filled" or "cancelled".
+    - **order**: Tracked order, after the change.
+    - **amount**: Amount filled, or amount left when cancelled (as reported
+      by QuadrigaCX). An order partially filled and then cancelled between
+      two cycles yields a "fill" event before the "cancelled" one.
+
+    :param client: QuadrigaCX client with API credentials.
+    :type client: quadriga.client.QuadrigaClient
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def __repr__(self):
+        return '<OrderTracker orders={}>'.format(len(self._orders))
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def subscribe(self, callback):
+        """Call a function with every event.
+
+        :param callback: Function called with an event dict.
+        :type callback: callable
+        :return: The callback, so this method can be used as a decorator.
+        :rtype: callable
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling a function subscribed earlier.
+
+        :param callback: Subscribed function.
+        :type callback: callable
+        """
+        self._subscribers.remove(callback)
+
+    def track(self, book, order):
+        """Start tracking an order.
+
+        :param book: Order book name.
+        :type book: str | unicode
+        :param order: Order details as returned by
+            :func:`quadriga.book.OrderBook.buy_limit_order` or
+            :func:`quadriga.book.OrderBook.sell_limit_order`.
+        :type order: dict
+        :return: Tracked order.
+        :rtype: dict
+        """
+        amount = to_decimal(order['amount'])
+        tracked = {
+            'id': order['id'],
+            'book': book,
+            'type': order.get('type'),
+            'price': order.get('price'),
+            'amount': amount,
+            'remaining': amount,
+        }
+        with self._lock:
+            self._orders[tracked['id']] = tracked
+        return dict(tracked)
+
+    def untrack(self, order_id):
+        """Stop tracking an order.
+
+        :param order_id: Order ID.
+        :type order_id: str | unicode
+        :raise KeyError: If the order is not tracked.
+        """
+        with self._lock:
+            del self._orders[order_id]
+
+    def orders(self, book=None):
+        """Return the tracked orders.
+
+        :param book: Order book name. If not set, orders of all order books
+            are returned.
+        :type book: str | unicode
+        :rtype: [dict]
+        """
+        with self._lock:
+            return [
+                dict(order) for order in self._orders.values()
+                if book is None or order['book'] == book
+            ]
+
+    def _event(self, event, order, amount):
+        """Return an event for a tracked order.
+
+        :param event: Event type.
+        :type event: str | unicode
+        :param order: Tracked order.
+        :type order: dict
+        :param amount: Amount filled or cancelled.
+        :type amount: decimal.Decimal
+        :rtype: dict
+        """
+        return {'event': event, 'order': dict(order), 'amount': amount}
+
+    def _update(self, order, remaining, events):
+        """Record the remaining amount of an order still open.
+
+        :param order: Tracked order.
+        :type order: dict
+        :param remaining: Remaining amount reported by QuadrigaCX.
+        :type remaining: decimal.Decimal
+        :param events: List the events are appended to.
+        :type events: [dict]
+        """
+        filled = order['remaining'] - remaining
+        if filled > 0:
+            order['remaining'] = remaining
+            events.append(self._event('fill', order, filled))
+
+    def _resolve(self, order, details, events):
+        """Record the final state of an order no longer open.
+
+        :param order: Tracked order.
+        :type order: dict
+        :param details: Order details returned by /lookup_order.
+        :type details: dict
+        :param events: List the events are appended to.
+        :type events: [dict]
+        """
+        status = int(details.get('status', 0))
+        if status == _COMPLETE:
+            filled = order['remaining']
+            order['remaining'] = to_decimal(0)
+            del self._orders[order['id']]
+            events.append(self._event('filled', order, filled))
+        elif status == _CANCELLED:
+            # The order may have been partially filled before it was
+            # cancelled, since the previous cycle.
+            if 'amount' in details:
+                self._update(order, to_decimal(details['amount']), events)
+            del self._orders[order['id']]
+            events.append(self._event('cancelled', order, order['remaining']))
+        elif 'amount' in details:
+            self._update(order, to_decimal(details['amount']), events)
+
+    def reconcile(self):
+        """Reconcile the tracked orders with the orders open on QuadrigaCX.
+
+        Requests are sent without holding the tracker's lock, so
+        :func:`track`, :func:`untrack` and :func:`orders` do not wait for
+        them. Orders tracked while a reconciliation is in progress are
+        reconciled in the next cycle, and orders untracked in the meantime are
+        left out.
+
+        :return: Events, in the order they were detected.
+        :rtype: [dict]
+        """
+        with self._lock:
+            tracked = [
+                (order['id'], order['book']) for order in self._orders.values()
+            ]
+        books = sorted({book for _, book in tracked})
+        if not books:
+            return []
+
+        open_orders = self._client.fan_out(books, 'get_user_orders')
+        remaining = {}
+        for book, rows in open_orders.items():
+            if not isinstance(rows, BaseException):
+                remaining[book] = {
+                    row['id']: to_decimal(row['amount']) for row in rows
+                }
+        still_open = {}
+        vanished = []
+        for order_id, book in tracked:
+            book_remaining = remaining.get(book)
+            if book_remaining is None:
+                continue
+            if order_id in book_remaining:
+                still_open[order_id] = book_remaining[order_id]
+            else:
+                vanished.append(order_id)
+        lookups = self._client.lookup_orders(vanished) if vanished else {}
+
+        events = []
+        with self._lock:
+            for order_id, _ in tracked:
+                order = self._orders.get(order_id)
+                if order is None:
+                    continue
+                if order_id in still_open:
+                    self._update(order, still_open[order_id], events)
+                elif isinstance(lookups.get(order_id), dict):
+                    self._resolve(order, lookups[order_id], events)
+
+        for event in events:
+            for callback in list(self._subscribers):
+                callback(event)
+        return events
@@ -0,0 +1,243 @@
+from __future__ import absolute_import, unicode_literals, division
+
+from json import dumps, loads
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # pragma: no cover
+    from urllib import urlencode
+
+
+class Response(object):
+    """Fully-read HTTP response exposing the requests.Response attributes used
+    by the REST client and :class:`quadriga.exceptions.RequestError`.
+
+    :param url: Request URL.
+    :type url: str | unicode
+    :param status_code: HTTP status code.
+    :type status_code: int
+    :param reason: HTTP reason phrase.
+    :type reason: str | unicode
+    :param headers: Response headers.
+    :type headers: dict
+    :param content: Raw response body.
+    :type content: bytes
+    :param encoding: Response body encoding (default: "utf-8").
+    :type encoding: str | unicode
+    """
+
+    def __init__(self,
+                 url,
+                 status_code,
+                 reason,
+                 headers,
+                 content,
+                 encoding=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+
+    def __repr__(self):
+        return '<Response [{}]>'.format(self.status_code)
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, 'replace')
+
+    def json(self):
+        return loads(self.text)
+
+
+class Transport(object):
+    """Base class for HTTP transports used to send requests to QuadrigaCX.
+
+    Subclasses must implement :func:`get` and :func:`post`, and return objects
+    with the same attributes as :class:`quadriga.transport.Response`.
+    """
+
+    def get(self, url, params, timeout):  # pragma: no cover
+        """Send an HTTP GET request.
+
+        :param url: Request URL.
+        :type url: str | unicode
+        :param params: URL parameters.
+        :type params: dict
+        :param timeout: Number of seconds to wait for a response.
+        :type timeout: int | float
+        :return: HTTP response.
+        :rtype: quadriga.transport.Response | requests.Response
+        """
+        raise NotImplementedError
+
+    def post(self, url, json, timeout):  # pragma: no cover
+        """Send an HTTP POST request with a JSON body.
+
+        :param url: Request URL.
+        :type url: str | unicode
+        :param json: Request payload.
+        :type json: dict
+        :param timeout: Number of seconds to wait for a response.
+        :type timeout: int | float
+        :return: HTTP response.
+        :rtype: quadriga.transport.Response | requests.Response
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Close all pooled connections."""
+
+
+class RequestsTransport(Transport):
+    """HTTP transport using a requests.Session object.
+
+    :param session: User-defined requests.Session object. If set, the pool
+        settings below are ignored and the session is used as is.
+    :type session: requests.Session
+    :param pool_connections: Number of hosts to keep connection pools for
+        (default: 10).
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept open per host
+        (default: 10). Set this to at least the number of threads sharing the
+        transport, or connections are discarded and re-established.
+    :type pool_maxsize: int
+    :param pool_block: If set to True (default: False), requests wait for a
+        free connection rather than opening more than **pool_maxsize**
+        connections to a host.
+    :type pool_block: bool
+    :param max_retries: Maximum number of retries for failed connections
+        (default: 0).
+    :type max_retries: int
+    :param keep_alive: If set to False (default: True), connections are closed
+        after each request.
+    :type keep_alive: bool
+    """
+
+    def __init__(self,
+                 session=None,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 max_retries=0,
+                 keep_alive=True):
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=max_retries,
+                pool_block=pool_block
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            if not keep_alive:
+                session.headers['Connection'] = 'close'
+        self.session = session
+
+    def __repr__(self):
+        return '<RequestsTransport>'
+
+    def get(self, url, params, timeout):
+        return self.session.get(url=url, params=params, timeout=timeout)
+
+    def post(self, url, json, timeout):
+        return self.session.post(url=url, json=json, timeout=timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class Urllib3Transport(Transport):
+    """Lightweight HTTP transport using urllib3 directly.
+
+    It skips the per-request overhead of requests (hooks, cookies, redirects
+    and environment lookups), which QuadrigaCX API calls do not need.
+
+    :param pool_connections: Number of hosts to keep connection pools for
+        (default: 10).
+    :type pool_connections: int
+    :param pool_maxsize: Maximum number of connections kept open per host
+        (default: 10). Set this to at least the number of threads sharing the
+        transport, or connections are discarded and re-established.
+    :type pool_maxsize: int
+    :param pool_block: If set to True (default: False), requests wait for a
+        free connection rather than opening more than **pool_maxsize**
+        connections to a host.
+    :type pool_block: bool
+    :param max_retries: Maximum number of retries for failed connections
+        (default: 0).
+    :type max_retries: int
+    :param keep_alive: If set to False (default: True), connections are closed
+        after each request.
+    :type keep_alive: bool
+    :param headers: Additional headers sent with every request.
+    :type headers: dict
+    """
+
+    def __init__(self,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 max_retries=0,
+                 keep_alive=True,
+                 headers=None):
+        headers = dict(headers or {})
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        self._pool = urllib3.PoolManager(
+            num_pools=pool_connections,
+            maxsize=pool_maxsize,
+            block=pool_block,
+            retries=urllib3.Retry(
+                total=max_retries,
+                redirect=0,
+                raise_on_redirect=False
+            ),
+            headers=headers
+        )
+        self._json_headers = dict(headers)
+        self._json_headers['Content-Type'] = 'application/json'
+
+    def __repr__(self):
+        return '<Urllib3Transport>'
+
+    def _send(self, method, url, **kwargs):
+        """Send an HTTP request and read the response body.
+
+        :param method: HTTP method.
+        :type method: str | unicode
+        :param url: Request URL.
+        :type url: str | unicode
+        :return: HTTP response.
+        :rtype: quadriga.transport.Response
+        """
+        resp = self._pool.request(method, url, **kwargs)
+        return Response(
+            url=url,
+            status_code=resp.status,
+            reason=resp.reason,
+            headers=resp.headers,
+            content=resp.data
+        )
+
+    def get(self, url, params, timeout):
+        if params:
+            url = url + '?' + urlencode(params)
+        return self._send('GET', url, timeout=timeout)
+
+    def post(self, url, json, timeout):
+        return self._send(
+            'POST',
+            url,
+            body=dumps(json).encode('utf-8'),
+            headers=self._json_headers,
+            timeout=timeout
+        )
+
+    def close(self):
+        self._pool.clear()
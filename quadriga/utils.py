@@ -0,0 +1,86 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from time import monotonic
+except ImportError:  # pragma: no cover
+    # Python 2 has no monotonic clock in the standard library.
+    from time import time as monotonic  # noqa: F401
+
+
+class WorkerPool(object):
+    """Bounded pool of worker threads, reused across calls.
+
+    Threads are started on first use, up to **max_workers**, and kept until
+    :func:`close` is called.
+
+    :param max_workers: Maximum number of worker threads.
+    :type max_workers: int
+    """
+
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __repr__(self):
+        return '<WorkerPool max_workers={}>'.format(self.max_workers)
+
+    def _get_executor(self):
+        """Return the executor, creating it if necessary.
+
+        :rtype: concurrent.futures.ThreadPoolExecutor
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+            return self._executor
+
+    def map(self, func, items):
+        """Call a function on each item with at most **max_workers** calls
+        in flight.
+
+        Exceptions raised by individual calls are caught and returned in place
+        of their results, so that one failure does not abort the whole batch.
+        Calls made from the pool's own threads run in the calling thread, so
+        that nested calls cannot wait on each other for a free worker.
+
+        :param func: Function to call with each item.
+        :type func: callable
+        :param items: Items to call the function with.
+        :type items: list
+        :return: Results (or exceptions raised) in the same order as **items**.
+        :rtype: list
+        """
+        local = self._local
+
+        def call(item):
+            try:
+                return func(item)
+            except Exception as err:
+                return err
+
+        def work(item):
+            # Threads of the executor only ever work for this pool.
+            local.worker = True
+            return call(item)
+
+        if not items:
+            return []
+        if (len(items) == 1 or self.max_workers <= 1 or
+                getattr(local, 'worker', False)):
+            return [call(item) for item in items]
+        return list(self._get_executor().map(work, items))
+
+    def close(self):
+        """Wait for calls in flight, then stop the worker threads.
+
+        The pool can still be used afterwards, and starts new threads.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
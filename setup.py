@@ -15,9 +15,17 @@ setup(
     author='Joohwan Oh',
     author_email='joohwan.oh@outlook.com',
     url='https://github.com/joowani/quadriga',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     license='MIT',
-    install_requires=['requests'],
+    install_requires=[
+        'requests',
+        'urllib3',
+        'futures; python_version < "3"'
+    ],
+    extras_require={
+        'async': ['aiohttp'],
+        'analytics': ['numpy']
+    },
     tests_require=['pytest', 'mock', 'flake8'],
     classifiers=[
         'Intended Audience :: Developers',
@@ -1,11 +1,16 @@
 from __future__ import absolute_import, unicode_literals, division
 
+import hashlib
+import hmac
+import sys
 import time
 import mock
 import pytest
 
 from quadriga import QuadrigaClient
 
+# Asyncio tests use async generators, introduced in Python 3.6.
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 6) else []
 
 api_key = 'test_api_key'
 api_secret = 'test_api_secret'
@@ -15,6 +20,14 @@ timeout = 123456789
 signature = '6d39de3ac91dd6189993059be99068d2290d90207ab4aeca26dcbbccfef7b57d'
 
 
+def sign(value):
+    return hmac.new(
+        key=api_secret.encode('utf-8'),
+        msg=(str(value) + client_id + api_key).encode('utf-8'),
+        digestmod=hashlib.sha256
+    ).hexdigest()
+
+
 @pytest.fixture(autouse=True)
 def patch_time(monkeypatch):
     mock_time = mock.MagicMock()
@@ -26,9 +39,17 @@ def patch_time(monkeypatch):
 def logger():
     mock_logger = mock.MagicMock()
 
+    # Messages are logged with %-style arguments, formatted lazily.
+    def debug_messages():
+        return [
+            args[0] % args[1:]
+            for args, _ in mock_logger.debug.call_args_list
+        ]
+
     def debug_called_with(message):
-        mock_logger.debug.assert_called_with(message)
+        assert debug_messages()[-1] == message
 
+    mock_logger.debug_messages = debug_messages
     mock_logger.debug_called_with = debug_called_with
     return mock_logger
 
@@ -56,12 +77,16 @@ def session(response):
         )
     session.get_called_with = get_called_with
 
+    # The clock is frozen, so every signed request bumps the nonce by one.
+    nonces = iter(range(nonce, nonce + 1000))
+
     def post_called_with(endpoint, payload=None):
+        expected_nonce = next(nonces)
         payload = payload or {}
         payload.update({
             'key': api_key,
-            'nonce': nonce,
-            'signature': signature
+            'nonce': expected_nonce,
+            'signature': sign(expected_nonce)
         })
         session.post.assert_called_with(
             url=QuadrigaClient.url + endpoint,
@@ -75,7 +100,7 @@ def session(response):
 # noinspection PyShadowingNames
 @pytest.fixture(autouse=True)
 def client(session, logger):
-    return QuadrigaClient(
+    client = QuadrigaClient(
         api_key=api_key,
         api_secret=api_secret,
         client_id=client_id,
@@ -83,3 +108,5 @@ def client(session, logger):
         session=session,
         logger=logger
     )
+    yield client
+    client.close()
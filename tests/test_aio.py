@@ -0,0 +1,335 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import asyncio
+import json
+import logging
+import timeit
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from quadriga.aio import (  # noqa: E402
+    AsyncOrderBook,
+    AsyncOrderBookReplica,
+    AsyncQuadrigaClient
+)
+from quadriga.exceptions import RequestError  # noqa: E402
+from quadriga.metrics import RequestMetrics  # noqa: E402
+from quadriga.ratelimit import RateLimiter  # noqa: E402
+from quadriga.tracing import Tracer  # noqa: E402
+from quadriga.version import __version__  # noqa: E402
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def stub_app(requests_seen, delay=0):
+    async def handle(request):
+        if delay:
+            await asyncio.sleep(delay)
+        if request.method == 'POST':
+            payload = await request.json()
+        else:
+            payload = dict(request.query)
+        requests_seen.append((request.method, request.path, payload))
+        if request.path == '/ticker':
+            return web.json_response({'book': payload['book'], 'last': '1'})
+        if request.path == '/order_book' and payload['book'] == 'eth_cad':
+            return web.json_response({'bids': [['2', '1']], 'asks': []})
+        if request.path == '/user_transactions':
+            history = [{'id': 3}, {'id': 2}, {'id': 1}]
+            return web.json_response(history[payload['offset']:])
+        if request.path == '/cancel_order':
+            return web.json_response('true')
+        if request.path == '/lookup_order':
+            return web.json_response(
+                [{'id': order_id}
+                 for order_id in payload['id'] if order_id != 'b']
+            )
+        if request.path == '/open_orders':
+            return web.json_response(
+                [{'id': 'a'}, {'id': 'b'}] if payload['book'] == 'btc_cad'
+                else []
+            )
+        if request.path == '/balance':
+            return web.json_response({'error': {'code': 101, 'message': 'x'}})
+        if request.path == '/bad':
+            return web.Response(text='invalid')
+        if request.path == '/fail':
+            return web.Response(status=503, reason='Down')
+        return web.json_response(payload)
+
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handle)
+    return app
+
+
+async def with_client(requests_seen, body, delay=0, **kwargs):
+    server = TestServer(stub_app(requests_seen, delay))
+    await server.start_server()
+    try:
+        async with AsyncQuadrigaClient(
+            api_key='key',
+            api_secret='secret',
+            client_id='id',
+            url=str(server.make_url('')).rstrip('/'),
+            **kwargs
+        ) as client:
+            return await body(client)
+    finally:
+        await server.close()
+
+
+def test_async_client_public_api():
+    seen = []
+
+    async def body(client):
+        assert repr(client) == '<AsyncQuadrigaClient v{}>'.format(__version__)
+        book = client.book('btc_cad')
+        assert isinstance(book, AsyncOrderBook)
+        assert repr(book) == "<AsyncOrderBook 'btc_cad'>"
+        ticker = await book.get_ticker()
+        orders = await book.get_public_orders(group=True)
+        trades = await book.get_public_trades(time_frame='minute')
+        assert (await book.get_ticker(typed=True)).last == 1
+        return ticker, orders, trades
+
+    ticker, orders, trades = run(with_client(seen, body))
+    assert ticker == {'book': 'btc_cad', 'last': '1'}
+    assert orders == {'book': 'btc_cad', 'group': '1'}
+    assert trades == {'book': 'btc_cad', 'time': 'minute'}
+    assert [path for _, path, _ in seen] == [
+        '/ticker', '/order_book', '/transactions', '/ticker'
+    ]
+
+
+def test_async_client_private_api():
+    seen = []
+
+    async def body(client):
+        book = client.book('btc_cad')
+        order = await book.buy_limit_order(10, 5)
+        trades = await book.get_user_trades(limit=2)
+        cancelled = await client.cancel_order('abc')
+        return order, trades, cancelled
+
+    order, trades, cancelled = run(with_client(seen, body))
+    assert order['amount'] == '10'
+    assert order['price'] == '5'
+    assert order['key'] == 'key'
+    assert len(order['signature']) == 64
+    assert trades == [{'id': 3}, {'id': 2}]
+    assert cancelled is True
+    assert [method for method, _, _ in seen] == ['POST'] * 3
+
+
+def test_async_client_request_failures():
+    seen = []
+
+    async def body(client):
+        errors = []
+        with pytest.raises(RequestError) as err:
+            await client.get_balance()
+        errors.append(err.value)
+        for endpoint in ('/bad', '/fail'):
+            with pytest.raises(RequestError) as err:
+                await client._rest_client.get(endpoint)
+            errors.append(err.value)
+        return errors
+
+    api_error, body_error, http_error = run(with_client(seen, body))
+    assert api_error.error_code == 101
+    assert str(api_error) == '[HTTP 200][ERR 101] x'
+    assert body_error.body == 'invalid'
+    assert str(body_error) == '[HTTP 200] response body: invalid'
+    assert http_error.http_code == 503
+    assert str(http_error) == '[HTTP 503] Down'
+
+
+def test_async_client_concurrent_requests():
+    seen = []
+
+    async def body(client):
+        tasks = [
+            client.book(name).get_ticker()
+            for name in sorted(client.order_books) * 30
+        ]
+        return await asyncio.gather(*tasks)
+
+    start = timeit.default_timer()
+    results = run(with_client(seen, body, delay=0.05, max_connections=300))
+    # Sequential round trips would take at least 300 * 0.05 = 15 seconds.
+    assert timeit.default_timer() - start < 5
+    assert len(results) == len(seen) == 300
+    assert results[0] == {'book': 'bch_btc', 'last': '1'}
+
+
+def test_async_client_user_session():
+    seen = []
+
+    async def body():
+        server = TestServer(stub_app(seen))
+        await server.start_server()
+        session = aiohttp.ClientSession()
+        try:
+            client = AsyncQuadrigaClient(
+                session=session,
+                url=str(server.make_url('')).rstrip('/')
+            )
+            await client.book('eth_cad').get_ticker()
+            await client.close()
+            assert not session.closed
+        finally:
+            await session.close()
+            await server.close()
+
+    run(body())
+    assert seen == [('GET', '/ticker', {'book': 'eth_cad'})]
+
+
+def test_async_client_sync_context_manager():
+    client = AsyncQuadrigaClient()
+    with pytest.raises(TypeError) as err:
+        with client:
+            pass  # pragma: no cover
+    assert 'async with' in str(err.value)
+
+
+def test_async_client_fan_out():
+    seen = []
+
+    async def body(client):
+        tickers = await client.get_tickers()
+        books = await client.get_public_orders_many(['btc_cad'], group=True)
+        trades = await client.get_public_trades_many(['eth_cad', 'eth_cad'])
+        return tickers, books, trades
+
+    tickers, books, trades = run(with_client(seen, body, max_connections=3))
+    assert set(tickers) == AsyncQuadrigaClient.order_books
+    assert tickers['btc_cad'] == {'book': 'btc_cad', 'last': '1'}
+    assert books == {'btc_cad': {'book': 'btc_cad', 'group': '1'}}
+    assert trades == {'eth_cad': {'book': 'eth_cad', 'time': 'hour'}}
+
+
+def test_async_iter_user_trades():
+    seen = []
+
+    async def body(client):
+        book = client.book('btc_cad')
+        trades = [row async for row in book.iter_user_trades(page_size=2)]
+        typed = book.iter_user_trades(page_size=1, typed=True)
+        first = await typed.__anext__()
+        await typed.aclose()
+        return trades, first
+
+    trades, first = run(with_client(seen, body))
+    assert trades == [{'id': 3}, {'id': 2}, {'id': 1}]
+    assert first.id == 3
+    offsets = [payload['offset'] for _, _, payload in seen]
+    assert offsets[:2] == [0, 2]
+
+
+def test_async_replica():
+    seen = []
+
+    async def body(client):
+        replica = client.replica('eth_cad')
+        assert isinstance(replica, AsyncOrderBookReplica)
+        assert client.replica('eth_cad') is replica
+        refreshed = await asyncio.gather(
+            replica.refresh(max_age=60),
+            replica.refresh(max_age=60)
+        )
+        # Without max_age, concurrent callers also share one request.
+        refreshed += await asyncio.gather(
+            replica.refresh(),
+            replica.refresh()
+        )
+        return replica, refreshed
+
+    replica, refreshed = run(with_client(seen, body))
+    assert sorted(refreshed[:2]) == [False, True]
+    assert sorted(refreshed[2:]) == [False, True]
+    assert len(seen) == 2
+    assert replica.best_bid() == (2, 1)
+    assert replica.best_ask() is None
+
+
+def test_async_bulk_orders():
+    seen = []
+
+    async def body(client):
+        placed = await client.place_orders([
+            {'book': 'btc_cad', 'side': 'buy', 'amount': 1, 'price': 10},
+            {'book': 'eth_cad', 'side': 'sell', 'amount': 2},
+        ])
+        cancelled = await client.cancel_orders(['x', 'y'])
+        cancelled_all = await client.cancel_all()
+        orders = await client.lookup_orders(['a', 'b', 'a'], chunk_size=1)
+        return placed, cancelled, cancelled_all, orders
+
+    placed, cancelled, cancelled_all, orders = run(
+        with_client(seen, body, max_connections=2)
+    )
+    assert placed[0]['price'] == '10'
+    assert placed[1]['book'] == 'eth_cad'
+    assert cancelled == [True, True]
+    assert cancelled_all['btc_cad'] == {'a': True, 'b': True}
+    assert cancelled_all['eth_cad'] == {}
+    assert orders == {'a': {'id': 'a'}, 'b': None}
+    nonces = [payload['nonce'] for method, _, payload in seen]
+    assert len(set(nonces)) == len(seen)
+
+
+def test_async_client_instrumentation(tmpdir):
+    seen = []
+    metrics = RequestMetrics()
+    path = str(tmpdir.join('trace.jsonl'))
+    logger = logging.getLogger('quadriga.test_async')
+    logger.setLevel(logging.DEBUG)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+
+    async def body(client):
+        assert AsyncQuadrigaClient.url == 'https://api.quadrigacx.com/v2'
+        with Tracer(path, format='jsonl').install(client):
+            await client.book('btc_cad').get_ticker()
+            with pytest.raises(RequestError):
+                await client.get_balance()
+
+    try:
+        run(with_client(
+            seen,
+            body,
+            metrics=metrics,
+            rate_limiter=RateLimiter(rate=100),
+            logger=logger
+        ))
+    finally:
+        logger.removeHandler(handler)
+
+    with open(path) as fp:
+        spans = [json.loads(line) for line in fp]
+    assert [span['endpoint'] for span in spans] == ['/ticker', '/balance']
+    assert set(spans[0]['phases']) == {'rate_limit', 'send', 'decode'}
+    assert set(spans[1]['phases']) == {'rate_limit', 'sign', 'send', 'decode'}
+    assert spans[1]['error'].startswith('RequestError')
+
+    stats = {record['endpoint']: record for record in metrics.snapshot()}
+    assert stats['/ticker']['requests'] == 1
+    assert stats['/balance']['error_codes'] == {101: 1}
+
+    messages = [record.getMessage() for record in records]
+    assert messages[0] == 'btc_cad: get ticker'
+    assert messages[1].startswith('GET /ticker: status 200')
@@ -0,0 +1,78 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from quadriga.analytics import BookArrays  # noqa: E402
+
+snapshot = {
+    'timestamp': '1514851200',
+    'bids': [['100', '1'], ['99', '2'], ['98', '3']],
+    'asks': [['102', '2'], ['101', '1'], ['103', '3']],
+}
+
+
+def test_book_arrays():
+    book = BookArrays.from_snapshot(snapshot)
+    assert repr(book) == '<BookArrays bids=3 asks=3>'
+    assert book.timestamp == '1514851200'
+    assert book.best_bid == 100
+    assert book.best_ask == 101
+    assert book.spread == 1
+    assert book.mid_price == 100.5
+
+    prices, depths = book.depth_curve('asks')
+    assert prices.tolist() == [101, 102, 103]
+    assert depths.tolist() == [1, 3, 6]
+    assert prices.flags['C_CONTIGUOUS']
+    prices, depths = book.depth_curve('bids')
+    assert prices.tolist() == [100, 99, 98]
+    assert depths.tolist() == [1, 3, 6]
+
+    with pytest.raises(ValueError):
+        book.depth_curve('buy_side')
+
+
+def test_fill_price_and_slippage():
+    book = BookArrays.from_snapshot(snapshot)
+    prices = book.fill_price('buy', [0, 0.5, 1, 2, 6, 7])
+    np.testing.assert_allclose(
+        prices, [101, 101, 101, 101.5, 614 / 6, np.nan]
+    )
+    assert book.fill_price('sell', 3) == pytest.approx(298 / 3)
+
+    slippage = book.slippage('buy', [1, 2])
+    np.testing.assert_allclose(slippage, [0, 0.5 / 101 * 10000])
+    assert book.slippage('sell', 3) == pytest.approx((100 - 298 / 3) * 100)
+
+
+def test_size_within_and_imbalance():
+    book = BookArrays.from_snapshot(snapshot)
+    assert book.size_within('asks', [0, 99, 100, 1000]).tolist() == [
+        1, 1, 3, 6
+    ]
+    assert book.size_within('bids', 100) == 3
+
+    assert book.imbalance() == 0
+    assert book.imbalance(levels=[1, 2]).tolist() == [0, 0]
+
+    book = BookArrays([[100, 4]], [[101, 1], [110, 3]])
+    assert book.imbalance() == 0
+    assert book.imbalance(levels=1) == pytest.approx(0.6)
+    assert book.imbalance(bps=[100, 1000]) == pytest.approx([0.6, 0])
+
+
+def test_empty_book(client, session, response):
+    response.json.return_value = {'bids': [['100', '1']], 'asks': []}
+    replica = client.replica('btc_cad')
+    replica.refresh()
+    book = BookArrays.from_replica(replica)
+    assert repr(book) == '<BookArrays bids=1 asks=0>'
+    assert math.isnan(book.best_ask)
+    assert math.isnan(book.fill_price('buy', 1))
+    assert book.fill_price('sell', 1) == 100
+    assert book.size_within('asks', [10, 20]).tolist() == [0, 0]
+    assert book.imbalance() == 1
@@ -0,0 +1,81 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import random
+
+import pytest
+
+from quadriga.bars import BarAggregator, Bars
+from quadriga.models import Trade
+
+
+def recorded_trades(count=1000, seed=0):
+    rng = random.Random(seed)
+    timestamp = 1500000000.0
+    trades = []
+    for _ in range(count):
+        timestamp += rng.uniform(0, 5)
+        trades.append((timestamp, rng.uniform(90, 110), rng.uniform(0, 2)))
+    return trades
+
+
+def test_bar_aggregator():
+    aggregator = BarAggregator(resolutions=(1, 60))
+    assert repr(aggregator) == '<BarAggregator resolutions=[1, 60]>'
+    aggregator.add_trades([
+        {'date': '0', 'price': '10', 'amount': '1'},
+        {'date': '0.5', 'price': '12', 'amount': '1'},
+        Trade('1', '1', '11', '2', 'buy'),
+        {'date': '61', 'price': '9', 'amount': '1'},
+    ])
+    minutes = aggregator.bars(60)
+    assert repr(minutes) == '<Bars resolution=60 bars=2>'
+    assert minutes[0] == {
+        'start': 0, 'open': 10, 'high': 12, 'low': 10, 'close': 11,
+        'volume': 4, 'vwap': 11, 'trades': 3,
+    }
+    assert minutes[-1]['open'] == 9
+    assert list(aggregator.bars(1).start) == [0, 1, 61]
+    with pytest.raises(KeyError):
+        aggregator.bars(300)
+
+    # Late trades update the bars covering them, or create them.
+    aggregator.add(30, 20, 1)
+    aggregator.add(59, 5, 1)
+    assert minutes[0]['high'] == 20
+    assert minutes[0]['low'] == 5
+    assert minutes[0]['close'] == 11
+    assert minutes[0]['trades'] == 5
+    assert list(aggregator.bars(1).start) == [0, 1, 30, 59, 61]
+
+
+def test_bars_maxlen():
+    bars = Bars(1, maxlen=3)
+    for timestamp in range(5):
+        bars.add(timestamp, 10, 1)
+    assert list(bars.start) == [2, 3, 4]
+    bars.add(0, 10, 1)
+    assert list(bars.start) == [2, 3, 4]
+    assert bars.vwap(0) == 10
+
+
+def test_bars_batch_mode():
+    np = pytest.importorskip('numpy')
+    trades = recorded_trades()
+    aggregator = BarAggregator(resolutions=(1, 60, 300))
+    for trade in trades:
+        aggregator.add(*trade)
+
+    shuffled = list(trades)
+    random.Random(1).shuffle(shuffled)
+    timestamps, prices, amounts = np.array(shuffled).T
+    for resolution in (1, 60, 300):
+        batch = Bars.from_arrays(resolution, timestamps, prices, amounts)
+        incremental = aggregator.bars(resolution)
+        assert len(batch) == len(incremental)
+        for field in ('start', 'open', 'high', 'low', 'close', 'trades'):
+            assert list(getattr(batch, field)) == \
+                list(getattr(incremental, field))
+        np.testing.assert_allclose(batch.volume, incremental.volume)
+        np.testing.assert_allclose(batch.notional, incremental.notional)
+
+    assert len(Bars.from_arrays(60, [], [], [])) == 0
@@ -1,5 +1,10 @@
 from __future__ import absolute_import, unicode_literals, division
 
+import time
+
+import mock
+import pytest
+
 
 def test_get_ticker(client, session, logger):
     client.book('btc_cad').get_ticker()
@@ -139,3 +144,103 @@ def test_sell_limit_order(client, session, logger):
         }
     )
     logger.debug_called_with("btc_cad: sell 10 btc at limit price of 5 cad")
+
+
+def paged_history(session, history, on_request=None):
+    """Serve the given trade history page by page from the mock session."""
+    requests = []
+
+    def post(url, json, timeout):
+        requests.append(json['offset'])
+        if on_request is not None:
+            on_request(json['offset'])
+        offset = json['offset']
+        response = mock.MagicMock(status_code=200)
+        # The limit param is ignored, like by the QuadrigaCX API.
+        response.json.return_value = [dict(row) for row in history[offset:]]
+        return response
+
+    session.post.side_effect = post
+    return requests
+
+
+def test_iter_user_trades(client, session):
+    history = [{'id': i, 'btc': '1'} for i in range(250, 0, -1)]
+    requests = paged_history(session, history)
+    book = client.book('btc_cad')
+    assert list(book.iter_user_trades()) == history
+    assert requests == [0, 100, 200]
+
+    requests[:] = []
+    trades = list(book.iter_user_trades(page_size=50, typed=True))
+    assert [trade.id for trade in trades] == [row['id'] for row in history]
+    assert trades[0].major == 1
+    assert requests == [0, 50, 100, 150, 200, 250]
+
+    history[:] = []
+    assert list(book.iter_user_trades()) == []
+
+
+def test_iter_user_trades_deduplicates_shifted_rows(client, session):
+    history = [{'id': i} for i in range(20, 0, -1)]
+
+    def on_request(offset):
+        # Two new trades arrive after the first page is fetched.
+        if offset == 5:
+            history[:0] = [{'id': 22}, {'id': 21}]
+
+    paged_history(session, history, on_request)
+    trades = list(client.book('btc_cad').iter_user_trades(page_size=5))
+    assert [row['id'] for row in trades] == list(range(20, 0, -1))
+
+
+@pytest.mark.parametrize('new_trades', [7, 12])
+def test_iter_user_trades_deduplicates_large_shifts(client, session,
+                                                    new_trades):
+    history = [{'id': i} for i in range(20, 0, -1)]
+
+    def on_request(offset):
+        # More new trades than fit on a page arrive mid-scan.
+        if offset == 5:
+            history[:0] = [{'id': 20 + i} for i in range(new_trades, 0, -1)]
+
+    paged_history(session, history, on_request)
+    trades = list(client.book('btc_cad').iter_user_trades(page_size=5))
+    ids = [row['id'] for row in trades]
+    # Every trade is yielded once, along with some of the new ones.
+    assert len(ids) == len(set(ids))
+    assert [i for i in ids if i <= 20] == list(range(20, 0, -1))
+
+
+def test_iter_user_trades_unordered_ids(client, session):
+    # Trades with the same timestamp may come in any ID order.
+    history = [{'id': i} for i in [10, 12, 11, 9, 7, 8, 5, 6, 4, 3]]
+    paged_history(session, history)
+    trades = list(client.book('btc_cad').iter_user_trades(page_size=3))
+    assert trades == history
+
+
+def test_iter_user_trades_window(client, session):
+    history = [{'id': i} for i in range(10, 0, -1)]
+
+    def on_request(offset):
+        if offset == 2:
+            history[:0] = [{'id': 12}, {'id': 11}]
+
+    paged_history(session, history, on_request)
+    trades = client.book('btc_cad').iter_user_trades(page_size=2, window=1)
+    # Rows shifted past the window are yielded again, but none are dropped.
+    assert [row['id'] for row in trades] == [10, 9, 10, 9, 8, 7, 6, 5, 4, 3,
+                                             2, 1]
+
+
+def test_iter_user_trades_prefetches(client, session):
+    history = [{'id': i} for i in range(30, 0, -1)]
+    requests = paged_history(session, history)
+    trades = client.book('btc_cad').iter_user_trades(page_size=10)
+    next(trades)
+    # The second page is requested before the first one is consumed.
+    while len(requests) < 2:
+        time.sleep(0.001)
+    assert requests == [0, 10]
+    trades.close()
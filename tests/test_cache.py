@@ -0,0 +1,149 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+
+import mock
+import pytest
+
+from quadriga import QuadrigaClient
+from quadriga.cache import ResponseCache
+from quadriga.exceptions import RequestError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = mock.MagicMock(return_value=100)
+    monkeypatch.setattr('quadriga.cache.monotonic', clock)
+    return clock
+
+
+def test_cache_ttl(clock):
+    cache = ResponseCache(ttl=1, endpoint_ttl={'/ticker': 0.5, '/foo': 0})
+    fetch = mock.MagicMock(side_effect=lambda endpoint, params: [endpoint])
+    params = {'book': 'btc_cad'}
+
+    assert cache.get('/ticker', params, fetch) == ['/ticker']
+    assert cache.get('/ticker', {'book': 'btc_cad'}, fetch) == ['/ticker']
+    assert fetch.call_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    clock.return_value = 100.6
+    cache.get('/ticker', params, fetch)
+    assert fetch.call_count == 2
+
+    cache.get('/order_book', params, fetch)
+    clock.return_value = 101.2
+    cache.get('/order_book', params, fetch)
+    assert fetch.call_count == 3
+    clock.return_value = 101.7
+    cache.get('/order_book', params, fetch)
+    assert fetch.call_count == 4
+
+    # Caching is disabled for endpoints with TTL of 0.
+    cache.get('/foo', None, fetch)
+    cache.get('/foo', None, fetch)
+    assert fetch.call_count == 6
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert repr(cache) == '<ResponseCache size=2 hits=2 misses=4>'
+
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_lru_eviction(clock):
+    cache = ResponseCache(maxsize=2)
+    fetch = mock.MagicMock(return_value={})
+    for book in ('a', 'b', 'a', 'c'):
+        cache.get('/ticker', {'book': book}, fetch)
+    assert len(cache) == 2
+    assert fetch.call_count == 3
+
+    # Book "b" was least recently used and has been evicted.
+    cache.get('/ticker', {'book': 'a'}, fetch)
+    cache.get('/ticker', {'book': 'c'}, fetch)
+    assert fetch.call_count == 3
+    cache.get('/ticker', {'book': 'b'}, fetch)
+    assert fetch.call_count == 4
+
+
+def test_cache_failures_not_cached(clock):
+    cache = ResponseCache()
+    fetch = mock.MagicMock(side_effect=[ValueError, {}])
+    with pytest.raises(ValueError):
+        cache.get('/ticker', None, fetch)
+    assert cache.get('/ticker', None, fetch) == {}
+    assert len(cache) == 1
+
+
+def test_cache_single_flight():
+    cache = ResponseCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(endpoint, params):
+        calls.append(endpoint)
+        started.set()
+        release.wait()
+        if endpoint == '/fail':
+            raise ValueError(endpoint)
+        return {'calls': len(calls)}
+
+    for endpoint in ('/ticker', '/fail'):
+        results = []
+
+        def worker():
+            try:
+                results.append(cache.get(endpoint, None, fetch))
+            except ValueError as err:
+                results.append(err)
+
+        started.clear()
+        release.clear()
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        while cache.hits + cache.misses < len(calls) * 20:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 20
+        assert all(result is results[0] for result in results)
+
+    assert calls == ['/ticker', '/fail']
+    assert (cache.hits, cache.misses) == (38, 2)
+
+
+def test_client_with_cache(session, response):
+    cache = ResponseCache(endpoint_ttl={'/transactions': 0})
+    client = QuadrigaClient(session=session, cache=cache)
+    response.json.return_value = {'last': '1'}
+
+    book = client.book('btc_cad')
+    assert book.get_ticker() == {'last': '1'}
+    assert book.get_ticker() == {'last': '1'}
+    assert client.book('eth_cad').get_ticker() == {'last': '1'}
+    assert session.get.call_count == 2
+
+    book.get_public_trades()
+    book.get_public_trades()
+    assert session.get.call_count == 4
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    # Depth-limited order books are cached apart from full ones.
+    response.content = b'{"bids": [["1", "1"], ["2", "1"]], "asks": []}'
+    response.json.return_value = {'bids': [['1', '1'], ['2', '1']]}
+    assert len(book.get_public_orders()['bids']) == 2
+    assert len(book.get_public_orders(depth=1)['bids']) == 1
+    assert len(book.get_public_orders(depth=1)['bids']) == 1
+    assert len(book.get_public_orders()['bids']) == 2
+    assert session.get.call_count == 6
+
+    response.status_code = 500
+    with pytest.raises(RequestError):
+        book.get_public_orders(group=True)
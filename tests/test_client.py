@@ -1,10 +1,16 @@
 from __future__ import absolute_import, unicode_literals, division
 
+import logging
+import threading
+import time
+
+import mock
 import pytest
 
 from quadriga.exceptions import (
     InvalidCurrencyError,
     InvalidOrderBookError,
+    InvalidOrderError,
     RequestError
 )
 from quadriga.book import OrderBook
@@ -20,6 +26,15 @@ def test_quadriga_client(client):
     assert client.major_currencies['btc'] == 'bitcoin'
 
 
+def test_client_url(session, response):
+    response.json.return_value = {}
+    client = QuadrigaClient(session=session, url='http://127.0.0.1:8000')
+    client.book('btc_cad').get_ticker()
+    assert session.get.call_args[1]['url'] == 'http://127.0.0.1:8000/ticker'
+    assert QuadrigaClient.url == 'https://api.quadrigacx.com/v2'
+    client.close()
+
+
 def test_get_order_book(client):
     book = client.book('btc_cad')
     assert repr(book) == "<OrderBook 'btc_cad'>"
@@ -116,3 +131,278 @@ def test_request_failure_bad_body(response, client):
     assert err.value.http_code == 200
     assert err.value.error_code is None
     assert str(err.value) == '[HTTP 200] response body: invalid'
+
+
+def test_get_tickers(client, session, response):
+    response.json.return_value = {'last': '1'}
+    tickers = client.get_tickers()
+    assert set(tickers) == client.order_books
+    assert all(ticker == {'last': '1'} for ticker in tickers.values())
+    assert session.get.call_count == len(client.order_books)
+
+    tickers = client.get_tickers(books=['btc_cad', 'eth_cad', 'btc_cad'])
+    assert set(tickers) == {'btc_cad', 'eth_cad'}
+
+    with pytest.raises(InvalidOrderBookError):
+        client.get_tickers(books=['btc_cad', 'invalid'])
+
+
+def test_get_public_orders_and_trades_many(client, session, response):
+    response.json.return_value = {}
+    assert client.get_public_orders_many(['btc_cad'], group=True) == {
+        'btc_cad': {}
+    }
+    session.get_called_with(
+        endpoint='/order_book',
+        params={'book': 'btc_cad', 'group': 1}
+    )
+    assert client.get_public_trades_many(['eth_cad'], 'minute') == {
+        'eth_cad': {}
+    }
+    session.get_called_with(
+        endpoint='/transactions',
+        params={'book': 'eth_cad', 'time': 'minute'}
+    )
+
+
+def test_fan_out_partial_failure(client, session, response):
+    failure = mock.MagicMock(status_code=503, reason='down')
+
+    def get(url, params, timeout):
+        if params['book'] == 'btc_usd':
+            return failure
+        if params['book'] == 'eth_btc':
+            raise IOError('connection reset')
+        return response
+
+    response.json.return_value = {'last': '1'}
+    session.get.side_effect = get
+    tickers = client.get_tickers()
+    assert isinstance(tickers.pop('btc_usd'), RequestError)
+    assert isinstance(tickers.pop('eth_btc'), IOError)
+    assert all(ticker == {'last': '1'} for ticker in tickers.values())
+
+
+def test_fan_out_reuses_workers(client, session, response):
+    threads = set()
+
+    def get(url, params, timeout):
+        threads.add(threading.current_thread())
+        return response
+
+    session.get.side_effect = get
+    for _ in range(20):
+        client.get_tickers()
+    assert len(threads) <= 10
+
+    # Bulk calls made from worker threads run in the calling thread.
+    nested = client._run_concurrently(
+        lambda book: len(client.get_tickers([book, 'eth_cad'])),
+        ['btc_cad', 'btc_usd']
+    )
+    assert nested == [2, 2]
+
+    client.close()
+    assert all(not thread.is_alive() for thread in threads)
+    assert len(client.get_tickers(['btc_cad', 'eth_cad'])) == 2
+    client.close()
+
+
+def test_place_orders(client, session):
+    nonces = []
+
+    def post(url, json, timeout):
+        nonces.append(json['nonce'])
+        if json.get('amount') == '3':
+            return mock.MagicMock(status_code=503, reason='down')
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {
+            'endpoint': url.rsplit('/', 1)[1],
+            'amount': json['amount'],
+            'price': json.get('price'),
+        }
+        return response
+
+    session.post.side_effect = post
+    results = client.place_orders([
+        {'book': 'btc_cad', 'side': 'buy', 'amount': 1, 'price': 10},
+        {'book': 'eth_cad', 'side': 'sell', 'amount': 2},
+        {'book': 'btc_cad', 'side': 'sell', 'amount': 3, 'price': 12},
+    ])
+    assert results[0] == {'endpoint': 'buy', 'amount': '1', 'price': '10'}
+    assert results[1] == {'endpoint': 'sell', 'amount': '2', 'price': None}
+    assert isinstance(results[2], RequestError)
+    assert len(set(nonces)) == 3
+
+    for order in [{'book': 'btc_cad', 'side': 'bid', 'amount': 1},
+                  {'book': 'btc_cad', 'side': 'buy'}]:
+        with pytest.raises(InvalidOrderError):
+            client.place_orders([order])
+    with pytest.raises(InvalidOrderBookError):
+        client.place_orders([
+            {'book': 'btc_cad', 'side': 'buy', 'amount': 1},
+            {'book': 'invalid', 'side': 'buy', 'amount': 1},
+        ])
+    assert session.post.call_count == 3
+
+
+def test_place_orders_serialize_signed(session):
+    client = QuadrigaClient(session=session, serialize_signed=True)
+    lock = threading.Lock()
+    in_flight = [0]
+    overlaps = []
+    nonces = []
+
+    def post(url, json, timeout):
+        with lock:
+            overlaps.append(in_flight[0])
+            in_flight[0] += 1
+            nonces.append(json['nonce'])
+        time.sleep(0.005)
+        with lock:
+            in_flight[0] -= 1
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = {'amount': json['amount']}
+        return response
+
+    session.post.side_effect = post
+    results = client.place_orders([
+        {'book': 'btc_cad', 'side': 'buy', 'amount': i, 'price': 10}
+        for i in range(8)
+    ])
+    assert [result['amount'] for result in results] == [
+        str(i) for i in range(8)
+    ]
+    # Signed requests never overlap, so they arrive in nonce order.
+    assert overlaps == [0] * 8
+    assert nonces == sorted(set(nonces))
+    client.close()
+
+
+def test_cancel_orders_and_cancel_all(client, session):
+    def post(url, json, timeout):
+        response = mock.MagicMock(status_code=200)
+        if url.endswith('/open_orders'):
+            if json['book'] == 'eth_btc':
+                raise IOError('connection reset')
+            response.json.return_value = (
+                [{'id': 'a'}, {'id': 'b'}] if json['book'] == 'btc_cad'
+                else [{'id': 'c'}] if json['book'] == 'eth_cad' else []
+            )
+        elif json['id'] == 'b':
+            response.status_code = 500
+        else:
+            response.json.return_value = 'true'
+        return response
+
+    session.post.side_effect = post
+    results = client.cancel_orders(['a', 'b', 'c'])
+    assert results[0] is True
+    assert isinstance(results[1], RequestError)
+    assert results[2] is True
+
+    results = client.cancel_all('btc_cad')
+    assert list(results) == ['btc_cad']
+    assert results['btc_cad']['a'] is True
+    assert isinstance(results['btc_cad']['b'], RequestError)
+
+    results = client.cancel_all()
+    assert set(results) == client.order_books
+    assert results['eth_cad'] == {'c': True}
+    assert results['ltc_cad'] == {}
+    assert isinstance(results['eth_btc'], IOError)
+
+    with pytest.raises(InvalidOrderBookError):
+        client.cancel_all('invalid')
+
+
+def test_lookup_orders(client, session, logger):
+    requested = []
+
+    def post(url, json, timeout):
+        requested.append(json['id'])
+        if 'e' in json['id']:
+            raise IOError('connection reset')
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = [
+            {'id': order_id, 'status': '2'}
+            for order_id in json['id'] if order_id != 'c'
+        ]
+        return response
+
+    session.post.side_effect = post
+    orders = client.lookup_orders(
+        ['a', 'b', 'a', 'c', 'd', 'e', 'f', 'b'], chunk_size=2
+    )
+    assert 'look up orders in 3 chunks' in logger.debug_messages()
+    assert sorted(requested) == [['a', 'b'], ['c', 'd'], ['e', 'f']]
+    assert set(orders) == {'a', 'b', 'c', 'd', 'e', 'f'}
+    assert orders['a'] == {'id': 'a', 'status': '2'}
+    assert orders['c'] is None
+    assert isinstance(orders['e'], IOError)
+    assert orders['e'] is orders['f']
+
+    assert client.lookup_orders([]) == {}
+
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError) as err:
+            client.lookup_orders(['a'], chunk_size=chunk_size)
+        assert 'Invalid chunk size {}'.format(chunk_size) in str(err.value)
+
+
+def test_lazy_logging(session, response):
+    class Amount(object):
+        formatted = 0
+
+        def __str__(self):
+            Amount.formatted += 1
+            return '10'
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('quadriga.test_lazy_logging')
+    logger.addHandler(handler)
+    client = QuadrigaClient(session=session, logger=logger)
+    response.json.return_value = {'id': 'a'}
+
+    # Nothing is formatted while debug logging is disabled.
+    logger.setLevel(logging.INFO)
+    client.lookup_order(Amount())
+    assert Amount.formatted == 0
+    assert records == []
+
+    # Records carry structured fields, and requests are logged with latency.
+    logger.setLevel(logging.DEBUG)
+    client.book('btc_cad').get_ticker()
+    book_record, request_record = records
+    assert book_record.getMessage() == 'btc_cad: get ticker'
+    assert book_record.book == 'btc_cad'
+    assert request_record.name == 'quadriga.test_lazy_logging.rest'
+    assert request_record.getMessage().startswith('GET /ticker: status 200')
+    assert request_record.endpoint == '/ticker'
+    assert request_record.book == 'btc_cad'
+    assert request_record.status == 200
+    assert request_record.latency >= 0
+
+    client.lookup_order(Amount())
+    assert records[2].getMessage() == 'look up order(s) 10'
+    logger.removeHandler(handler)
+
+
+def test_logger_adapter(session, response):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('quadriga.test_logger_adapter')
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    adapter = logging.LoggerAdapter(logger, {'account': 'main'})
+    client = QuadrigaClient(session=session, logger=adapter)
+
+    client.book('btc_cad').get_ticker()
+    assert records[0].getMessage() == 'btc_cad: get ticker'
+    assert records[1].name == 'quadriga.test_logger_adapter'
+    assert records[1].getMessage().startswith('GET /ticker: status 200')
+    assert all(record.account == 'main' for record in records)
+    logger.removeHandler(handler)
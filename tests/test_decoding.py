@@ -0,0 +1,165 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import sys
+from decimal import Decimal
+
+import mock
+import pytest
+
+from quadriga import QuadrigaClient
+from quadriga.decoding import JSONDecoder, OrderBookParser, fastest_loads
+from quadriga.exceptions import RequestError
+
+
+def test_fastest_loads(monkeypatch):
+    loads = fastest_loads()
+    assert loads(b'{"a": "1"}') == {'a': '1'}
+
+    # Importing a module set to None in sys.modules raises ImportError.
+    for module_name in ('orjson', 'ujson', 'simplejson'):
+        monkeypatch.setitem(sys.modules, module_name, None)
+    assert fastest_loads() is json.loads
+
+
+def test_decoder_without_number_type():
+    decoder = JSONDecoder(loads=json.loads)
+    assert repr(decoder) == '<JSONDecoder loads=json.loads>'
+    assert decoder.decode(b'{"price": "1.5"}') == {'price': '1.5'}
+    with pytest.raises(ValueError):
+        decoder.decode(b'invalid')
+
+
+def test_decoder_converts_numeric_fields():
+    decoder = JSONDecoder(loads=json.loads, number_type=Decimal)
+    ticker = decoder.decode(json.dumps({
+        'high': '10.5', 'last': '10.1', 'timestamp': '1512345678',
+        'volume': '100.0', 'vwap': '10.2', 'low': '9.9', 'ask': '10.2',
+        'bid': '10.0'
+    }).encode('utf-8'))
+    assert ticker['last'] == Decimal('10.1')
+    assert ticker['timestamp'] == '1512345678'
+
+    book = decoder.decode(json.dumps({
+        'timestamp': '1512345678',
+        'bids': [['10.0', '1.5'], ['9.9', '2']],
+        'asks': [['10.2', '0.1']]
+    }).encode('utf-8'))
+    assert book['bids'] == [
+        [Decimal('10.0'), Decimal('1.5')],
+        [Decimal('9.9'), Decimal('2')]
+    ]
+    assert book['asks'] == [[Decimal('10.2'), Decimal('0.1')]]
+
+    trades = decoder.decode(json.dumps([
+        {'id': 1, 'datetime': '2017-01-01', 'type': 2, 'btc': '-0.5',
+         'cad': '5000.00', 'rate': '10000.00', 'fee': '', 'order_id': 'x'},
+        {'tid': 2, 'price': 1.1, 'amount': 3, 'side': 'buy'},
+    ]).encode('utf-8'))
+    assert trades[0]['btc'] == Decimal('-0.5')
+    assert trades[0]['rate'] == Decimal('10000.00')
+    assert trades[0]['fee'] == ''
+    assert trades[0]['order_id'] == 'x'
+    assert trades[1] == {
+        'tid': 2, 'price': Decimal('1.1'), 'amount': 3, 'side': 'buy'
+    }
+
+    balance = decoder.decode(json.dumps({
+        'btc_balance': '1.0', 'cad_available': '2.0', 'eth_reserved': '0',
+        'fees': {'btc_cad': '0.5'}, 'fee': '0.5'
+    }).encode('utf-8'))
+    assert balance['btc_balance'] == Decimal('1.0')
+    assert balance['cad_available'] == Decimal('2.0')
+    assert balance['eth_reserved'] == Decimal('0')
+    assert balance['fees'] == {'btc_cad': '0.5'}
+    assert decoder.decode(b'"true"') == 'true'
+
+
+def test_client_with_decoder(session, response):
+    decoder = JSONDecoder(number_type=Decimal)
+    client = QuadrigaClient(session=session, decoder=decoder)
+    response.content = b'{"last": "10.5"}'
+    assert client.book('btc_cad').get_ticker() == {'last': Decimal('10.5')}
+    assert not response.json.called
+
+    response.content = b'invalid'
+    response.text = 'invalid'
+    with pytest.raises(RequestError) as err:
+        client.book('btc_cad').get_ticker()
+    assert str(err.value) == '[HTTP 200] response body: invalid'
+
+    response.content = b'{"error": {"code": 5, "message": "fail"}}'
+    with pytest.raises(RequestError) as err:
+        client.get_balance()
+    assert err.value.error_code == 5
+
+    loads = mock.MagicMock(return_value={})
+    client = QuadrigaClient(session=session, decoder=JSONDecoder(loads))
+    client.book('btc_cad').get_ticker()
+    loads.assert_called_once_with(response.content)
+
+
+def test_order_book_parser():
+    book = {
+        'timestamp': '1514851200',
+        'bids': [['100.5', '1'], ['99', '2'], ['98', '3']],
+        'asks': [],
+    }
+    content = json.dumps(book).encode('utf-8')
+    assert OrderBookParser(10)(content) == book
+    assert OrderBookParser(2)(content) == {
+        'timestamp': '1514851200',
+        'bids': [['100.5', '1'], ['99', '2']],
+        'asks': [],
+    }
+    assert OrderBookParser(0)(content)['bids'] == []
+
+    # JSON numbers and whitespace, with the timestamp after the levels.
+    content = b'{"bids" : [ [1.5, 2] , [1, 3] ], "asks": [["2" ,"1"]],' \
+              b' "timestamp": 5}'
+    assert OrderBookParser(1)(content) == {
+        'timestamp': '5',
+        'bids': [['1.5', '2']],
+        'asks': [['2', '1']],
+    }
+
+    # Other bodies (e.g. errors) are decoded in full.
+    content = b'{"error": {"code": 5, "message": "fail"}}'
+    assert OrderBookParser(1)(content) == json.loads(content.decode('utf-8'))
+    with pytest.raises(ValueError):
+        OrderBookParser(1)(b'{"bids": [["1", "2"], ["3", "4"')
+    with pytest.raises(ValueError):
+        OrderBookParser(1)(b'invalid')
+
+    assert OrderBookParser(5) == OrderBookParser(5)
+    assert OrderBookParser(5) != OrderBookParser(6)
+    assert len({OrderBookParser(5), OrderBookParser(5)}) == 1
+    assert repr(OrderBookParser(5)) == '<OrderBookParser depth=5>'
+
+
+def test_get_public_orders_with_depth(client, session, response):
+    response.content = json.dumps({
+        'timestamp': '1514851200',
+        'bids': [['100', '1'], ['99', '2']],
+        'asks': [['101', '1'], ['102', '2']],
+    }).encode('utf-8')
+    book = client.book('btc_cad').get_public_orders(depth=1)
+    assert book == {
+        'timestamp': '1514851200',
+        'bids': [['100', '1']],
+        'asks': [['101', '1']],
+    }
+    assert not response.json.called
+    session.get_called_with('/order_book', {'book': 'btc_cad', 'group': 0})
+
+    book = client.book('btc_cad').get_public_orders(depth=1, typed=True)
+    assert book['asks'][0].price == Decimal('101')
+
+    client = QuadrigaClient(session=session, decoder=JSONDecoder(
+        number_type=Decimal
+    ))
+    books = client.get_public_orders_many(['btc_cad'], group=True, depth=2)
+    assert books['btc_cad']['bids'] == [
+        [Decimal('100'), Decimal('1')],
+        [Decimal('99'), Decimal('2')],
+    ]
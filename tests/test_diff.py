@@ -0,0 +1,107 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from quadriga.diff import BookDiffer  # noqa: E402
+
+
+def test_book_differ():
+    differ = BookDiffer(name='btc_cad')
+    deltas = []
+    assert differ.subscribe(deltas.append) == deltas.append
+    assert repr(differ) == "<BookDiffer 'btc_cad' subscribers=1>"
+
+    delta = differ.update({
+        'timestamp': '1',
+        'bids': [['100', '1'], ['99', '2']],
+        'asks': [],
+    })
+    assert repr(delta) == "<BookDelta 'btc_cad' bids=2 asks=0>"
+    assert delta.timestamp == '1'
+    assert delta.events() == [
+        ('bids', 99, 0, 2),
+        ('bids', 100, 0, 1),
+    ]
+
+    # Orders at the same price are aggregated, so ungrouped books work too.
+    delta = differ.update({
+        'timestamp': '2',
+        'bids': [['100', '1.5'], ['98', '2']],
+        'asks': [['101', '1'], ['101', '0.5']],
+    })
+    assert delta.bids.shape == (3, 3)
+    assert delta.events() == [
+        ('bids', 98, 0, 2),
+        ('bids', 99, 2, 0),
+        ('bids', 100, 1, 1.5),
+        ('asks', 101, 0, 1.5),
+    ]
+    assert len(deltas) == 2
+
+    # Empty deltas are not passed to subscribers.
+    delta = differ.update({
+        'bids': [['98', '2'], ['100', '1.5']],
+        'asks': [['101', '1.5']],
+    })
+    assert len(delta) == 0
+    assert delta.events() == []
+    assert len(deltas) == 2
+
+    differ.unsubscribe(deltas.append)
+    differ.update({'bids': [], 'asks': []})
+    assert len(deltas) == 2
+
+
+def test_book_differ_tolerance():
+    differ = BookDiffer(name='btc_cad')
+    differ.update({'bids': [['100', '0.3']], 'asks': []})
+
+    # 0.1 + 0.2 != 0.3 as floats, but the level did not change.
+    delta = differ.update({'bids': [['100', '0.1'], ['100', '0.2']],
+                           'asks': []})
+    assert len(delta) == 0
+
+    delta = differ.update({'bids': [['100', '0.30000001']], 'asks': []})
+    assert len(delta.bids) == 1
+
+
+def test_book_differ_delivers_in_order():
+    differ = BookDiffer(name='btc_cad')
+    deltas = []
+    differ.subscribe(deltas.append)
+
+    def update(amount):
+        differ.update({'bids': [['100', amount]], 'asks': []})
+
+    threads = [
+        threading.Thread(target=update, args=(i,)) for i in range(1, 51)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each delta starts from the amount the previous one ended with.
+    amounts = [0]
+    for delta in deltas:
+        (_, old, new), = delta.bids.tolist()
+        assert old == amounts[-1]
+        amounts.append(new)
+    assert sorted(amounts[1:]) == list(range(1, 51))
+
+
+def test_book_differ_poll(client, session, response):
+    response.json.return_value = {
+        'timestamp': '1',
+        'bids': [['100', '1']],
+        'asks': [['101', '1']],
+    }
+    differ = BookDiffer(client.book('eth_cad'))
+    assert differ.name == 'eth_cad'
+    assert len(differ.poll()) == 2
+    session.get_called_with('/order_book', {'book': 'eth_cad', 'group': 1})
+    assert len(differ.poll()) == 0
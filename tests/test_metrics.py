@@ -0,0 +1,166 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import io
+import json
+import threading
+
+import mock
+import pytest
+
+from quadriga import QuadrigaClient
+from quadriga import rest as rest_module
+from quadriga import tracing as tracing_module
+from quadriga.exceptions import RequestError
+from quadriga.metrics import LatencyHistogram, RequestMetrics, request_size
+from tests.conftest import api_key, api_secret, client_id, timeout
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+    assert repr(histogram) == '<LatencyHistogram count=1000>'
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.05)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.05)
+    assert histogram.percentile(100) == 1
+    assert histogram.max == 1
+    assert len(histogram.buckets) < 200
+
+    other = LatencyHistogram()
+    other.record(0)
+    other.record(2)
+    histogram.merge(other)
+    assert histogram.count == 1002
+    assert histogram.percentile(0) == pytest.approx(1e-6, rel=0.05)
+    assert histogram.percentile(100) == 2
+
+
+def test_request_size():
+    assert request_size('GET', None) == 0
+    assert request_size('GET', {'book': 'btc_cad'}) == len('book=btc_cad')
+    assert request_size('POST', {'id': 'a'}) == len('{"id": "a"}')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+
+    def monotonic():
+        now[0] += 0.25
+        return now[0]
+
+    monkeypatch.setattr(tracing_module, 'monotonic', monotonic)
+    return now
+
+
+def test_request_metrics(session, response, clock):
+    metrics = RequestMetrics()
+    client = QuadrigaClient(
+        api_key=api_key,
+        api_secret=api_secret,
+        client_id=client_id,
+        timeout=timeout,
+        session=session,
+        metrics=metrics
+    )
+    response.content = b'{"last": "1"}'
+    response.json.return_value = {'last': '1'}
+    client.book('btc_cad').get_ticker()
+    client.book('btc_cad').get_ticker()
+
+    response.json.return_value = {'error': {'code': 101, 'message': 'x'}}
+    with pytest.raises(RequestError):
+        client.get_balance()
+
+    session.get.side_effect = IOError('connection reset')
+    with pytest.raises(IOError):
+        client.book('eth_cad').get_ticker()
+
+    records = metrics.snapshot()
+    assert [(r['endpoint'], r['book']) for r in records] == [
+        ('/balance', None), ('/ticker', 'btc_cad'), ('/ticker', 'eth_cad')
+    ]
+    balance, btc_ticker, eth_ticker = records
+    assert btc_ticker['requests'] == 2
+    assert btc_ticker['in_flight'] == 0
+    assert btc_ticker['latency']['p50'] == pytest.approx(0.25, rel=0.05)
+    assert btc_ticker['latency']['mean'] == 0.25
+    assert btc_ticker['decode_time'] == 0.5
+    assert btc_ticker['bytes_in'] == 26
+    assert btc_ticker['bytes_out'] == 2 * len('book=btc_cad')
+    assert btc_ticker['statuses'] == {200: 2}
+    assert btc_ticker['error_codes'] == {}
+    assert balance['error_codes'] == {101: 1}
+    assert balance['bytes_out'] > 0
+    assert eth_ticker['statuses'] == {None: 1}
+    assert eth_ticker['bytes_in'] == 0
+
+    fp = io.StringIO()
+    metrics.export(fp)
+    exported = json.loads(fp.getvalue())
+    assert exported[0]['error_codes'] == {'101': 1}
+    assert exported[2]['statuses'] == {'None': 1}
+
+    # Nothing is recorded while metrics are disabled.
+    metrics.reset()
+    metrics.enabled = False
+    session.get.side_effect = None
+    response.json.return_value = {'last': '1'}
+    client.book('btc_cad').get_ticker()
+    assert metrics.snapshot() == []
+    assert repr(metrics) == '<RequestMetrics enabled=False>'
+
+
+def test_request_metrics_threads():
+    metrics = RequestMetrics()
+    metrics.start('/ticker', 'btc_cad')
+    assert metrics.in_flight() == {'/ticker': 1}
+
+    def record():
+        for _ in range(100):
+            metrics.start('/ticker', 'btc_cad')
+            metrics.finish('/ticker', 'btc_cad', 0.01, status=200)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.finish('/ticker', 'btc_cad', 0.01, status=200)
+
+    record, = metrics.snapshot()
+    assert record['requests'] == 401
+    assert record['statuses'] == {200: 401}
+    assert record['in_flight'] == 0
+    # Counters of the exited threads are folded together.
+    assert len(metrics._shards) == 1
+    assert metrics.in_flight() == {'/ticker': 0}
+
+
+def test_request_metrics_thread_churn():
+    metrics = RequestMetrics()
+
+    def record():
+        metrics.finish('/ticker', 'btc_cad', 0.01, status=200)
+
+    for _ in range(200):
+        thread = threading.Thread(target=record)
+        thread.start()
+        thread.join()
+    assert len(metrics._shards) <= 2
+
+    record, = metrics.snapshot()
+    assert record['requests'] == 200
+    assert record['latency']['max'] == 0.01
+    assert len(metrics._shards) == 0
+
+    metrics.reset()
+    assert metrics.snapshot() == []
+
+
+def test_metrics_disabled_by_default(client):
+    assert client._rest_client._metrics is None
+    with mock.patch.object(rest_module, 'request_size') as size:
+        client.book('btc_cad').get_ticker()
+    assert not size.called
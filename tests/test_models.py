@@ -0,0 +1,151 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import gc
+import json
+import sys
+from decimal import Decimal
+
+import pytest
+
+from quadriga.models import (
+    BookLevel, Order, Ticker, Trade, UserTrade, _LazyDecimal
+)
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    # Python 2 has no tracemalloc.
+    tracemalloc = None
+
+
+def retained_memory(func):
+    """Return the number of bytes allocated by func and still in use."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def test_ticker():
+    ticker = Ticker.from_dict({
+        'high': '10.5', 'last': '10.1', 'timestamp': '1512345678',
+        'volume': '100.0', 'vwap': '10.2', 'low': '9.9', 'ask': '10.2',
+        'bid': '10.0'
+    })
+    assert not hasattr(ticker, '__dict__')
+    assert ticker._last == '10.1'
+    assert ticker.last == Decimal('10.1')
+    assert ticker._last == Decimal('10.1')
+    assert ticker.timestamp == '1512345678'
+    assert ticker.as_dict()['vwap'] == Decimal('10.2')
+    assert repr(ticker).startswith('<Ticker last=10.1 bid=10.0 ask=10.2')
+    with pytest.raises(AttributeError):
+        ticker.foo = 1
+
+
+def test_lazy_decimal_conversion():
+    assert Trade(1, 'date', 1.1, None, 'buy').price == Decimal('1.1')
+    assert Trade(1, 'date', 3, None, 'buy').price == Decimal(3)
+    assert Trade(1, 'date', '', None, 'buy').price == ''
+    assert Trade(1, 'date', Decimal(2), None, 'buy').amount is None
+    # Accessed on the class, the descriptor itself is returned.
+    assert isinstance(Trade.price, _LazyDecimal)
+    assert Trade.price.slot == '_price'
+
+    # The converted value replaces the raw one, so conversion happens once.
+    trade = Trade(1, 'date', '1.5', None, 'buy')
+    assert trade._price == '1.5'
+    assert trade.price is trade.price
+    assert trade._price == Decimal('1.5')
+
+
+def test_book_level():
+    book = BookLevel.from_book({
+        'timestamp': '1',
+        'bids': [['10.0', '1.5'], ['9.9', '2']],
+        'asks': [['10.2', '0.1']]
+    })
+    assert book['timestamp'] == '1'
+    assert book['bids'] == [BookLevel('10.0', '1.5'), BookLevel('9.9', '2')]
+    assert book['bids'][0] != BookLevel('10.0', '1')
+    assert book['asks'][0].as_tuple() == (Decimal('10.2'), Decimal('0.1'))
+    assert BookLevel('1', '1') != Trade(None, None, '1', '1', None)
+
+
+def test_user_trade_and_order():
+    trade = UserTrade.from_dict({
+        'id': 1, 'datetime': '2017-01-01', 'type': 2, 'method': 'btc_cad',
+        'btc': '-0.5', 'cad': '5000.00', 'rate': '10000.00', 'fee': '25',
+        'order_id': 'x'
+    }, 'btc', 'cad')
+    assert trade.major == Decimal('-0.5')
+    assert trade.minor == Decimal('5000.00')
+    assert trade.order_id == 'x'
+
+    order = Order.from_dict({
+        'id': 'x', 'datetime': '2017-01-01', 'type': 0, 'price': '10',
+        'amount': '1', 'status': 0
+    })
+    assert order.as_dict() == {
+        'id': 'x', 'datetime': '2017-01-01', 'type': 0,
+        'price': Decimal('10'), 'amount': Decimal('1'), 'status': 0
+    }
+
+
+def test_typed_book_methods(client, response):
+    book = client.book('btc_cad')
+    response.json.return_value = {'last': '1', 'bid': '0.9'}
+    assert book.get_ticker(typed=True).bid == Decimal('0.9')
+
+    response.json.return_value = {'bids': [['1', '2']], 'asks': []}
+    assert book.get_public_orders(typed=True)['bids'] == [BookLevel('1', '2')]
+
+    response.json.return_value = [{'tid': 1, 'price': '1', 'amount': '2'}]
+    assert book.get_public_trades(typed=True)[0].tid == 1
+    assert book.get_public_trades()[0] == {
+        'tid': 1, 'price': '1', 'amount': '2'
+    }
+
+    response.json.return_value = [{'id': 'a', 'price': '1'}]
+    assert book.get_user_orders(typed=True)[0].price == Decimal('1')
+
+    response.json.return_value = [{'id': 1, 'btc': '1'}, {'id': 2}]
+    trades = book.get_user_trades(limit=1, typed=True)
+    assert len(trades) == 1
+    assert trades[0].major == Decimal('1')
+    assert trades[0].minor is None
+
+
+@pytest.mark.skipif(tracemalloc is None, reason='tracemalloc not available')
+def test_memory_usage():
+    payload = json.dumps([{
+        'tid': i,
+        'date': '1512345678',
+        'price': '10000.{:02d}'.format(i % 100),
+        'amount': '0.{:08d}'.format(i),
+        'side': 'buy' if i % 2 else 'sell'
+    } for i in range(20000)])
+    as_dicts = retained_memory(lambda: json.loads(payload))
+    as_objects = retained_memory(
+        lambda: [Trade.from_dict(row) for row in json.loads(payload)]
+    )
+    # Objects keep the same field values, but drop the per-dict overhead.
+    assert as_objects < as_dicts * 0.8
+    row = json.loads(payload)[0]
+    assert sys.getsizeof(Trade.from_dict(row)) < sys.getsizeof(row) / 2
+
+    levels = json.dumps({
+        'bids': [['{}.00'.format(i), '1.5'] for i in range(20000)],
+        'asks': []
+    })
+    as_lists = retained_memory(lambda: json.loads(levels))
+    as_objects = retained_memory(
+        lambda: BookLevel.from_book(json.loads(levels))
+    )
+    assert as_objects < as_lists
@@ -0,0 +1,65 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+
+from quadriga import QuadrigaClient
+from quadriga.nonce import NonceGenerator
+from tests.conftest import nonce, sign, signature
+
+
+def test_nonce_generator_follows_clock(monkeypatch):
+    generator = NonceGenerator()
+    assert generator.last == 0
+    assert generator() == nonce
+    assert generator() == nonce + 1
+
+    monkeypatch.setattr(time, 'time', lambda: nonce / 10000 + 1)
+    assert generator() == nonce + 10000
+
+    # The clock steps backwards.
+    monkeypatch.setattr(time, 'time', lambda: nonce / 10000 - 60)
+    assert generator() == nonce + 10001
+    assert repr(generator) == '<NonceGenerator last={}>'.format(nonce + 10001)
+
+
+def test_nonce_generator_threads():
+    generator = NonceGenerator()
+    nonces = []
+
+    def worker():
+        nonces.extend(generator() for _ in range(1000))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(nonces) == list(range(nonce, nonce + 8000))
+
+
+def test_nonce_generator_persistence(tmpdir):
+    path = str(tmpdir.join('nonce'))
+    generator = NonceGenerator(path=path, reserve=10)
+    assert [generator() for _ in range(12)] == list(range(nonce, nonce + 12))
+    assert open(path).read() == str(nonce + 21)
+
+    # After a restart, nonces resume past the reserved ones.
+    generator = NonceGenerator(path=path, reserve=10)
+    assert generator.last == nonce + 21
+    assert generator() == nonce + 22
+
+
+def test_client_nonce_generator(session):
+    generator = NonceGenerator()
+    generator()
+    client = QuadrigaClient(
+        api_key='test_api_key',
+        client_id='test_client_id',
+        session=session,
+        nonce_generator=generator
+    )
+    client.get_balance()
+    assert sign(nonce) == signature
+    payload = session.post.call_args[1]['json']
+    assert payload['nonce'] == generator.last == nonce + 1
@@ -0,0 +1,74 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import mock
+import pytest
+
+from quadriga import polling as polling_module
+from quadriga.exceptions import InvalidOrderBookError
+from quadriga.polling import PollingScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(polling_module, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_polling_scheduler(client, session, clock):
+    tickers = {
+        'btc_cad': {'last': '10', 'volume': '5', 'bid': '9', 'ask': '11'},
+        'btg_btc': {'last': '1', 'volume': '2', 'bid': '1', 'ask': '2'},
+    }
+
+    def get(url, params, timeout):
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = dict(tickers[params['book']])
+        return response
+
+    session.get.side_effect = get
+    scheduler = PollingScheduler(
+        client, ['btc_cad', 'btg_btc'], budget=1, max_interval=20
+    )
+    assert repr(scheduler) == '<PollingScheduler books=2 budget=1>'
+    assert scheduler.rates() == {'btc_cad': 0.5, 'btg_btc': 0.5}
+    polled = []
+    scheduler.subscribe(lambda book, ticker: polled.append(book))
+
+    # All order books are due at first.
+    assert scheduler.delay() == 0
+    assert sorted(scheduler.run_pending()) == ['btc_cad', 'btg_btc']
+    assert sorted(polled) == ['btc_cad', 'btg_btc']
+    assert scheduler.delay() == 2
+    clock[0] += 1
+    assert scheduler.run_pending() == {}
+
+    # The active book gets a larger share of the budget.
+    clock[0] += 1
+    tickers['btc_cad'] = {
+        'last': '12', 'volume': '6', 'bid': '11', 'ask': '13'
+    }
+    scheduler.run_pending()
+    activity = scheduler.activity()
+    assert activity['btc_cad'] == pytest.approx(1.6)
+    assert activity['btg_btc'] == pytest.approx(0.7)
+    rates = scheduler.rates()
+    assert rates['btc_cad'] == pytest.approx(0.05 + 0.9 * 1.6 / 2.3)
+    assert rates['btg_btc'] == pytest.approx(0.05 + 0.9 * 0.7 / 2.3)
+    assert sum(rates.values()) == pytest.approx(1)
+    assert scheduler.delay() == pytest.approx(1 / rates['btc_cad'])
+
+    # Activity can be reported from other sources.
+    scheduler.observe('btg_btc', 10)
+    assert scheduler.rates()['btg_btc'] > scheduler.rates()['btc_cad']
+    with pytest.raises(KeyError):
+        scheduler.observe('eth_cad', 1)
+
+    # Rates are capped by min_interval, and floored by max_interval.
+    scheduler = PollingScheduler(client, ['btc_cad'], budget=5)
+    assert scheduler.rates() == {'btc_cad': 1}
+    scheduler = PollingScheduler(client, budget=0.01)
+    assert set(scheduler.rates().values()) == {0.01 / len(client.order_books)}
+
+    with pytest.raises(InvalidOrderBookError):
+        PollingScheduler(client, ['invalid'])
@@ -0,0 +1,114 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from decimal import Decimal
+
+import mock
+import pytest
+
+from quadriga.exceptions import InvalidOrderBookError
+from quadriga.pool import ClientPool
+from quadriga.ratelimit import RateLimiter
+
+
+def account_session(balance):
+    session = mock.MagicMock()
+    if isinstance(balance, Exception):
+        session.post.side_effect = balance
+    else:
+        session.post.return_value.status_code = 200
+        session.post.return_value.json.return_value = balance
+    return session
+
+
+def make_pool(balances, **kwargs):
+    return ClientPool({
+        name: {
+            'api_key': name + '_key',
+            'api_secret': name + '_secret',
+            'client_id': name + '_id',
+            'session': account_session(balance),
+        }
+        for name, balance in balances.items()
+    }, **kwargs)
+
+
+def test_client_pool(logger):
+    pool = make_pool({
+        'main': {'btc_available': '1.5', 'btc_balance': '2', 'fee': '0.5'},
+        'sub': {'btc_available': '0.25', 'btc_balance': '0.25', 'fee': '1'},
+    }, rate=5, logger=logger)
+    assert repr(pool) == '<ClientPool accounts=2>'
+    assert pool.accounts == ['main', 'sub']
+    assert len(pool) == 2
+
+    # Each account has its own REST client, session, nonces and rate budget.
+    main, sub = pool.client('main'), pool.client('sub')
+    assert main._rest_client is not sub._rest_client
+    assert main._rest_client._nonce is not sub._rest_client._nonce
+    assert main._rest_client._transport is not sub._rest_client._transport
+    assert isinstance(main._rest_client._rate_limiter, RateLimiter)
+    assert (main._rest_client._rate_limiter is not
+            sub._rest_client._rate_limiter)
+    assert main._logger is logger
+
+    balances = pool.get_balances()
+    assert balances['main']['fee'] == '0.5'
+    assert balances['sub']['btc_balance'] == '0.25'
+    assert pool.get_pooled_balance() == {
+        'btc_available': Decimal('1.75'),
+        'btc_balance': Decimal('2.25'),
+    }
+    assert pool.get_pooled_balance(['sub'])['btc_available'] == Decimal('0.25')
+    with pytest.raises(KeyError):
+        pool.get_balances(['invalid'])
+    with pytest.raises(KeyError):
+        pool.client('invalid')
+
+    with mock.patch.object(main, 'close') as close:
+        pool.close()
+    assert close.called
+    assert pool._workers._executor is None
+
+
+def test_client_pool_routing():
+    pool = make_pool({'a': {}, 'b': {}, 'c': {}})
+
+    # Pinned calls go to their account.
+    assert pool.run(lambda client: client, account='b') is pool.client('b')
+
+    # Other calls go to the account with the fewest calls in flight, then
+    # with the fewest calls so far.
+    assert pool.run(lambda client: client) is pool.client('a')
+    assert pool.run(lambda client: client) is pool.client('c')
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold(client):
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=pool.run, args=(hold, 'a'))
+    thread.start()
+    started.wait()
+    assert pool.loads() == {'a': 1, 'b': 0, 'c': 0}
+    assert pool.run(lambda client: client) is pool.client('b')
+    release.set()
+    thread.join()
+    assert pool.loads() == {'a': 0, 'b': 0, 'c': 0}
+
+    with pytest.raises(InvalidOrderBookError):
+        pool.run(lambda client: client.book('invalid'))
+    assert pool.loads() == {'a': 0, 'b': 0, 'c': 0}
+
+
+def test_client_pool_errors():
+    pool = make_pool({'a': {'btc_balance': '1'}, 'b': IOError('reset')})
+    balances = pool.get_balances()
+    assert balances['a'] == {'btc_balance': '1'}
+    assert isinstance(balances['b'], IOError)
+    with pytest.raises(IOError):
+        pool.get_pooled_balance()
+    with pytest.raises(ValueError):
+        ClientPool({})
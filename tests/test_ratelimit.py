@@ -0,0 +1,122 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+
+import mock
+import pytest
+
+from quadriga import QuadrigaClient
+from quadriga.ratelimit import (
+    PRIORITY_CANCEL,
+    PRIORITY_ORDER,
+    PRIORITY_PRIVATE,
+    PRIORITY_PUBLIC,
+    RateLimiter,
+    TokenBucket
+)
+
+
+def test_token_bucket(monkeypatch):
+    clock = mock.MagicMock(return_value=10.0)
+    monkeypatch.setattr('quadriga.ratelimit.monotonic', clock)
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert repr(bucket) == '<TokenBucket rate=2 capacity=3>'
+    for _ in range(3):
+        assert bucket.delay(10.0) == 0
+        bucket.consume()
+    assert bucket.delay(10.0) == pytest.approx(0.5)
+    assert bucket.delay(10.25) == pytest.approx(0.25)
+    assert bucket.delay(20.0) == 0
+    bucket.consume()
+    bucket.consume()
+    bucket.consume()
+    assert bucket.delay(20.0) == pytest.approx(0.5)
+
+
+def test_rate_limiter_priority():
+    limiter = RateLimiter()
+    assert limiter.priority('GET', '/ticker') == PRIORITY_PUBLIC
+    assert limiter.priority('POST', '/balance') == PRIORITY_PRIVATE
+    assert limiter.priority('POST', '/buy') == PRIORITY_ORDER
+    assert limiter.priority('POST', '/sell') == PRIORITY_ORDER
+    assert limiter.priority('POST', '/cancel_order') == PRIORITY_CANCEL
+    assert repr(limiter) == '<RateLimiter rate=10 queued=0>'
+
+
+def test_rate_limiter_budget():
+    limiter = RateLimiter(rate=50, burst=5)
+    waits = [limiter.acquire('GET', '/ticker') for _ in range(10)]
+    assert all(wait < 0.01 for wait in waits[:5])
+    # The remaining 5 requests are spaced out at 50 requests per second.
+    assert sum(waits[5:]) == pytest.approx(0.1, abs=0.05)
+
+    stats = limiter.stats()
+    assert stats['queued'] == 0
+    assert stats['public']['requests'] == 10
+    assert stats['public']['max_wait'] >= 0.015
+    assert stats['public']['avg_wait'] > 0
+    assert stats['cancel'] == {
+        'requests': 0,
+        'total_wait': 0.0,
+        'max_wait': 0.0,
+        'avg_wait': 0.0
+    }
+
+
+def test_rate_limiter_endpoint_budget():
+    limiter = RateLimiter(rate=1000, endpoint_limits={'/order_book': (20, 1)})
+    assert limiter.acquire('GET', '/order_book') < 0.01
+    order = []
+
+    def worker(endpoint):
+        limiter.acquire('GET', endpoint)
+        order.append(endpoint)
+
+    slow = threading.Thread(target=worker, args=('/order_book',))
+    slow.start()
+    while not limiter.stats()['queued']:
+        time.sleep(0.001)
+    # Requests to other endpoints are not held up by the exhausted endpoint.
+    fast = threading.Thread(target=worker, args=('/ticker',))
+    fast.start()
+    fast.join()
+    slow.join()
+    assert order == ['/ticker', '/order_book']
+
+
+def test_rate_limiter_admits_by_priority():
+    limiter = RateLimiter(rate=20, burst=1)
+    limiter.acquire('GET', '/ticker')
+    order = []
+
+    def worker(method, endpoint):
+        limiter.acquire(method, endpoint)
+        order.append(endpoint)
+
+    requests = [
+        ('GET', '/ticker'),
+        ('POST', '/balance'),
+        ('POST', '/buy'),
+        ('POST', '/cancel_order'),
+    ]
+    threads = []
+    for request in requests:
+        threads.append(threading.Thread(target=worker, args=request))
+        threads[-1].start()
+        while limiter.stats()['queued'] < len(threads):
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+    assert order == ['/cancel_order', '/buy', '/balance', '/ticker']
+    assert limiter.stats()['cancel']['requests'] == 1
+
+
+def test_client_with_rate_limiter(session):
+    limiter = RateLimiter(rate=1000)
+    client = QuadrigaClient(session=session, rate_limiter=limiter)
+    client.book('btc_cad').get_ticker()
+    client.cancel_order('abc')
+    stats = limiter.stats()
+    assert stats['public']['requests'] == 1
+    assert stats['cancel']['requests'] == 1
@@ -0,0 +1,107 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from quadriga import replica as replica_module
+from quadriga.exceptions import InvalidOrderBookError
+from quadriga.replica import OrderBookReplica
+
+snapshot = {
+    'timestamp': '1514851200',
+    'bids': [['100', '1'], ['99.5', '2'], ['101', '0.5'], ['90', '10']],
+    'asks': [['102', '1'], ['103', '1.5'], ['102', '0.5'], ['110', '4']],
+}
+
+
+def test_replica_queries(client, session, response):
+    response.json.return_value = snapshot
+    replica = client.replica('btc_cad')
+    assert repr(replica) == "<OrderBookReplica 'btc_cad' bids=0 asks=0>"
+    assert replica.best_bid() is None
+    assert replica.spread() is None
+    assert replica.depth_within('asks', 1) == 0
+    assert replica.age is None
+
+    assert replica.refresh() is True
+    session.get_called_with('/order_book', {'book': 'btc_cad', 'group': 1})
+    assert repr(replica) == "<OrderBookReplica 'btc_cad' bids=4 asks=3>"
+    assert replica.timestamp == '1514851200'
+
+    assert replica.best_bid() == (Decimal('101'), Decimal('0.5'))
+    assert replica.best_ask() == (Decimal('102'), Decimal('1.5'))
+    assert replica.spread() == Decimal('1')
+    assert replica.mid_price() == Decimal('101.5')
+    assert replica.levels('bids', 2) == [
+        (Decimal('101'), Decimal('0.5')),
+        (Decimal('100'), Decimal('1')),
+    ]
+    assert len(replica.levels('asks')) == 3
+
+    assert replica.amount_at('bids', '99.5') == Decimal('2')
+    assert replica.amount_at('bids', 99.6) == 0
+    assert replica.amount_at('asks', Decimal('102')) == Decimal('1.5')
+
+    assert replica.depth('bids', 100) == Decimal('1.5')
+    assert replica.depth('bids', '99') == Decimal('3.5')
+    assert replica.depth('bids', 200) == 0
+    assert replica.depth('asks', 103) == Decimal('3')
+    assert replica.depth('asks', 101) == 0
+    assert replica.depth_within('bids', 1) == Decimal('1.5')
+    assert replica.depth_within('asks', 10) == Decimal('7')
+
+    with pytest.raises(ValueError):
+        replica.depth('buy', 100)
+
+
+def test_replica_shared(client, session, response, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(replica_module, 'monotonic', lambda: clock[0])
+    response.json.return_value = snapshot
+
+    replica = client.replica('btc_cad')
+    assert isinstance(replica, OrderBookReplica)
+    assert client.replica('btc_cad') is replica
+    assert client.replica('eth_cad') is not replica
+    with pytest.raises(InvalidOrderBookError):
+        client.replica('btc_xyz')
+
+    assert replica.refresh(max_age=5) is True
+    clock[0] += 5
+    assert replica.age == 5
+    assert replica.refresh(max_age=5) is False
+    clock[0] += 1
+    assert replica.refresh(max_age=5) is True
+    assert session.get.call_count == 2
+
+
+@pytest.mark.parametrize('max_age', [60, None])
+def test_replica_concurrent_refresh(client, session, response, max_age):
+    def get(url, params, timeout):
+        time.sleep(0.05)
+        return response
+
+    session.get.side_effect = get
+    response.json.return_value = snapshot
+    replica = client.replica('btc_cad')
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            replica.refresh(max_age=max_age)
+        ))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert session.get.call_count == 1
+    assert sorted(results) == [False] * 4 + [True]
+
+    # Later calls without max_age fetch a new snapshot.
+    if max_age is None:
+        assert replica.refresh() is True
+        assert session.get.call_count == 2
@@ -0,0 +1,114 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+from decimal import Decimal
+
+import pytest
+import requests
+
+from quadriga.decoding import JSONDecoder
+from quadriga.store import TradeStore, TradeSync
+from tests.conftest import client_id
+from tests.test_book import paged_history
+
+
+def user_trades(ids):
+    return [
+        {
+            'id': i,
+            'datetime': '2017-12-{:02d} {:02d}:00:00'.format(
+                i // 24 + 1, i % 24
+            ),
+            'type': 2,
+            'btc': '0.1',
+            'cad': '-100',
+        }
+        for i in sorted(ids, reverse=True)
+    ]
+
+
+def test_trade_store(tmpdir):
+    path = str(tmpdir.join('trades.db'))
+    store = TradeStore(path)
+    assert repr(store) == '<TradeStore {}>'.format(path)
+    assert store.high_watermark('acct', 'btc_cad') is None
+
+    trades = user_trades([1, 2, 3])
+    assert store.insert('acct', 'btc_cad', trades) == 3
+    assert store.insert('acct', 'btc_cad', trades) == 0
+    assert store.insert('acct', 'eth_cad', trades[:1]) == 1
+    assert store.insert('other', 'btc_cad', trades[:1]) == 1
+    store.close()
+
+    store = TradeStore(path)
+    assert store.high_watermark('acct', 'btc_cad') == 3
+    assert store.count('acct', 'btc_cad') == 3
+    assert store.count('acct', 'eth_cad') == 1
+    assert store.trades('acct', 'btc_cad') == trades[::-1]
+    assert store.trades('acct', 'btc_cad', sort='desc') == trades
+    assert store.trades(
+        'acct', 'btc_cad',
+        start='2017-12-01 02:00:00',
+        end='2017-12-01 03:00:00'
+    ) == [trades[1]]
+    store.close()
+
+
+def test_trade_store_decimal_values():
+    decoder = JSONDecoder(loads=json.loads, number_type=Decimal)
+    trades = decoder.decode(json.dumps(user_trades([1])).encode('utf-8'))
+    assert trades[0]['btc'] == Decimal('0.1')
+
+    store = TradeStore()
+    assert store.insert('acct', 'btc_cad', trades) == 1
+    assert store.trades('acct', 'btc_cad')[0]['btc'] == '0.1'
+    store.close()
+
+
+def test_trade_sync(client, session):
+    history = user_trades(range(1, 251))
+    requests = paged_history(session, history)
+    store = TradeStore()
+    with pytest.raises(ValueError):
+        TradeSync(client, store, None)
+    sync = TradeSync(client, store, client_id)
+    assert sync.account == client_id
+    assert repr(sync) == '<TradeSync account={}>'.format(client_id)
+
+    assert sync.sync(['btc_cad']) == {'btc_cad': 250}
+    assert requests == [0, 100, 200]
+    assert sync.trades('btc_cad', sort='desc') == history
+
+    # Re-running with no new trades only fetches the first page (and the one
+    # prefetched behind it).
+    requests[:] = []
+    assert sync.sync(['btc_cad']) == {'btc_cad': 0}
+    assert requests == [0, 100]
+    assert store.count(client_id, 'btc_cad') == 250
+
+    # Only trades newer than the high-watermark are stored.
+    history[:0] = user_trades(range(251, 261))
+    requests[:] = []
+    assert sync.sync_book('btc_cad') == 10
+    assert requests == [0, 100]
+    assert store.high_watermark(client_id, 'btc_cad') == 260
+    assert sync.trades('btc_cad', sort='desc') == history
+
+
+def test_trade_sync_failure(client, session):
+    history = user_trades(range(1, 251))
+
+    def fail(offset):
+        if offset == 200:
+            raise requests.ConnectionError('connection reset')
+
+    paged_history(session, history, on_request=fail)
+    store = TradeStore()
+    sync = TradeSync(client, store, account='acct', page_size=100)
+    with pytest.raises(requests.ConnectionError):
+        sync.sync_book('btc_cad')
+
+    # Nothing is stored, so the next sync starts over rather than skipping
+    # the trades which were not fetched.
+    assert store.count('acct', 'btc_cad') == 0
+    assert store.high_watermark('acct', 'btc_cad') is None
@@ -0,0 +1,92 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import itertools
+
+import pytest
+
+from quadriga import tape as tape_module
+from quadriga.tape import TradeTape
+
+
+def trades(tids):
+    return [
+        {'tid': tid, 'date': str(1500000000 + tid), 'price': '10',
+         'amount': '1', 'side': 'buy'}
+        for tid in sorted(tids, reverse=True)
+    ]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tape_module, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_trade_tape(client, session, response, clock):
+    tape = TradeTape(
+        client.book('btc_cad'), maxlen=5, min_interval=1, max_interval=4
+    )
+    batches = []
+    tape.subscribe(batches.append)
+    assert tape.last_tid is None
+
+    response.json.return_value = trades([1, 2, 3])
+    assert [t['tid'] for t in tape.poll()] == [1, 2, 3]
+    session.get_called_with(
+        '/transactions', {'book': 'btc_cad', 'time': 'hour'}
+    )
+    assert tape.last_tid == 3
+
+    # Overlapping trades are skipped, and recent polls use the minute window.
+    clock[0] += 10
+    response.json.return_value = trades([2, 3, 4, 5])
+    assert [t['tid'] for t in tape.poll()] == [4, 5]
+    session.get_called_with(
+        '/transactions', {'book': 'btc_cad', 'time': 'minute'}
+    )
+    assert [len(batch) for batch in batches] == [3, 2]
+
+    # The window is bounded.
+    clock[0] += 10
+    response.json.return_value = trades([5, 6, 7])
+    tape.poll()
+    assert [t['tid'] for t in tape.window()] == [3, 4, 5, 6, 7]
+    assert len(tape) == 5
+    assert repr(tape) == "<TradeTape 'btc_cad' trades=5 interval=1>"
+
+    # The interval grows while there are no new trades.
+    assert tape.poll() == []
+    assert tape.interval == 1.5
+    assert tape.poll() == []
+    assert tape.poll() == []
+    assert tape.interval == 3.375
+    tape.poll()
+    assert tape.interval == 4
+    assert len(batches) == 3
+
+    # After a long pause, the hour window is used to not miss trades.
+    clock[0] += 60
+    response.json.return_value = trades([7, 8])
+    assert [t['tid'] for t in tape.poll()] == [8]
+    session.get_called_with(
+        '/transactions', {'book': 'btc_cad', 'time': 'hour'}
+    )
+    assert tape.interval == 2
+
+    tape.unsubscribe(batches.append)
+    response.json.return_value = trades([9])
+    tape.poll()
+    assert len(batches) == 4
+
+
+def test_trade_tape_stream(client, session, response):
+    responses = iter([trades([1, 2]), trades([2]), trades([2, 3])])
+    session.get.side_effect = lambda **kwargs: response
+    response.json.side_effect = lambda: next(responses)
+    sleeps = []
+    tape = TradeTape(client.book('eth_cad'), typed=True)
+    stream = tape.stream(sleep=sleeps.append)
+    assert [t.tid for t in itertools.islice(stream, 3)] == [1, 2, 3]
+    assert sleeps == [1, 1.5]
+    assert tape.window()[0].price == 10
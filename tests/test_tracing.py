@@ -0,0 +1,132 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+
+import pytest
+
+from quadriga.exceptions import RequestError
+from quadriga.metrics import RequestMetrics
+from quadriga.ratelimit import RateLimiter
+from quadriga.tracing import Hooks, Tracer
+
+
+def test_hooks(client, session, response):
+    calls = []
+    hooks = client.hooks
+    assert not hooks
+    for event in Hooks.events:
+        hooks.register(event, lambda span, event=event: calls.append(
+            (event, span.endpoint, span.status, span.body, span.phases[:])
+        ))
+    assert len(hooks) == 3
+    assert repr(hooks) == '<Hooks 3>'
+
+    response.json.return_value = {'last': '1'}
+    assert client.book('btc_cad').get_ticker() == {'last': '1'}
+    session.get_called_with('/ticker', {'book': 'btc_cad'})
+    assert [(event, endpoint) for event, endpoint, _, _, _ in calls] == [
+        ('pre_send', '/ticker'),
+        ('post_receive', '/ticker'),
+        ('post_decode', '/ticker'),
+    ]
+    assert calls[0][2] is None
+    assert calls[1][2] == 200
+    assert calls[1][3] is None
+    assert calls[2][3] == {'last': '1'}
+    assert [phase for phase, _ in calls[2][4]] == ['send', 'decode']
+
+    # Signed requests are timed from signing onwards.
+    del calls[:]
+    client._rest_client._rate_limiter = RateLimiter(rate=100)
+    spans = []
+    hooks.register('post_decode', spans.append)
+    client.get_balance()
+    session.post_called_with('/balance')
+    span = spans[-1]
+    assert repr(span) == '<RequestSpan POST /balance>'
+    assert [phase for phase, _ in span.phases] == [
+        'rate_limit', 'sign', 'send', 'decode'
+    ]
+    assert span.data['signature']
+    assert span.duration == pytest.approx(sum(d for _, d in span.phases))
+    assert span.phase('missing') == 0
+
+    # Failed requests reach the last hook with the error set.
+    response.json.return_value = {'error': {'code': 101, 'message': 'x'}}
+    with pytest.raises(RequestError):
+        client.get_balance()
+    assert spans[-1].error.error_code == 101
+    session.post.side_effect = IOError('connection reset')
+    with pytest.raises(IOError):
+        client.get_balance()
+    assert isinstance(spans[-1].error, IOError)
+    assert spans[-1].status is None
+    assert [phase for phase, _ in spans[-1].phases][-1] == 'send'
+
+    hooks.unregister('post_decode', spans.append)
+    with pytest.raises(ValueError):
+        hooks.register('invalid', spans.append)
+
+
+def test_failing_hooks(client, session, response):
+    client._rest_client._metrics = RequestMetrics()
+
+    def fail(span):
+        raise ValueError('hook failed')
+
+    # Errors of the request are not replaced by errors of post_decode hooks.
+    client.hooks.register('post_decode', fail)
+    response.json.return_value = {'error': {'code': 101, 'message': 'x'}}
+    with pytest.raises(RequestError):
+        client.get_balance()
+    assert client._rest_client._logger.exception.called
+    stats, = client._rest_client._metrics.snapshot()
+    assert stats['requests'] == 1
+    assert stats['error_codes'] == {101: 1}
+
+    # Errors of hooks are raised if the request succeeded.
+    response.json.return_value = {'btc_available': '1'}
+    with pytest.raises(ValueError):
+        client.get_balance()
+    client.hooks.unregister('post_decode', fail)
+
+    # Requests whose pre_send hooks fail are not left in flight.
+    client.hooks.register('pre_send', fail)
+    with pytest.raises(ValueError):
+        client.get_balance()
+    assert client._rest_client._metrics.in_flight() == {'/balance': 0}
+
+
+@pytest.mark.parametrize('trace_format', ['chrome', 'jsonl'])
+def test_tracer(client, response, tmpdir, trace_format):
+    path = str(tmpdir.join('trace'))
+    response.json.return_value = {'last': '1'}
+    with Tracer(path, trace_format).install(client) as tracer:
+        assert repr(tracer) == '<Tracer {} \'{}\'>'.format(trace_format, path)
+        client.book('btc_cad').get_ticker()
+        client.book('eth_cad').get_ticker()
+    assert not client.hooks
+
+    # Requests after closing are not traced.
+    client.book('btc_cad').get_ticker()
+    with open(path) as fp:
+        content = fp.read()
+    if trace_format == 'chrome':
+        events = json.loads(content)
+        assert [event['name'] for event in events] == [
+            'GET /ticker', 'send', 'decode'
+        ] * 2
+        assert events[0]['args'] == {'book': 'btc_cad', 'status': 200}
+        assert events[1]['ts'] == events[0]['ts']
+        assert events[0]['ph'] == 'X'
+    else:
+        records = [json.loads(line) for line in content.splitlines()]
+        assert [record['book'] for record in records] == [
+            'btc_cad', 'eth_cad'
+        ]
+        assert set(records[0]['phases']) == {'send', 'decode'}
+        assert records[0]['status'] == 200
+        assert records[0]['error'] is None
+
+    with pytest.raises(ValueError):
+        Tracer(path, 'invalid')
@@ -0,0 +1,135 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import threading
+from decimal import Decimal
+
+import mock
+
+from quadriga.tracker import OrderTracker
+
+
+def test_order_tracker(client, session):
+    open_orders = {
+        'btc_cad': [{'id': 'a', 'amount': '1'}, {'id': 'b', 'amount': '2'}],
+        'eth_cad': [{'id': 'c', 'amount': '5'}],
+    }
+    lookups = {
+        'b': {'id': 'b', 'status': '2'},
+        'c': {'id': 'c', 'status': '-1'},
+    }
+    requests = []
+
+    def post(url, json, timeout):
+        endpoint = url.rsplit('/', 1)[-1]
+        requests.append(endpoint)
+        response = mock.MagicMock(status_code=200)
+        if endpoint == 'open_orders':
+            if json['book'] not in open_orders:
+                raise IOError('connection reset')
+            response.json.return_value = open_orders[json['book']]
+        else:
+            response.json.return_value = [
+                lookups[order_id] for order_id in json['id']
+                if order_id in lookups
+            ]
+        return response
+
+    session.post.side_effect = post
+    tracker = OrderTracker(client)
+    events = []
+    tracker.subscribe(events.append)
+    assert tracker.reconcile() == []
+    assert requests == []
+
+    tracker.track('btc_cad', {'id': 'a', 'amount': '1', 'price': '10'})
+    tracker.track('btc_cad', {'id': 'b', 'amount': '2', 'price': '10'})
+    tracker.track('eth_cad', {'id': 'c', 'amount': '5', 'price': '20'})
+    tracker.track('eth_btc', {'id': 'd', 'amount': '1', 'price': '0.1'})
+    assert len(tracker) == 4
+    assert repr(tracker) == '<OrderTracker orders=4>'
+
+    # Nothing changed: one request per order book, no lookups.
+    assert tracker.reconcile() == []
+    assert sorted(requests) == ['open_orders'] * 3
+    del requests[:]
+
+    # Order "a" is partially filled, "b" is filled and "c" is cancelled.
+    open_orders['btc_cad'] = [{'id': 'a', 'amount': '0.25'}]
+    open_orders['eth_cad'] = []
+    result = tracker.reconcile()
+    assert result == events
+    assert [(e['event'], e['order']['id'], e['amount']) for e in events] == [
+        ('fill', 'a', Decimal('0.75')),
+        ('filled', 'b', Decimal('2')),
+        ('cancelled', 'c', Decimal('5')),
+    ]
+    assert sorted(requests) == ['lookup_order'] + ['open_orders'] * 3
+    assert session.post.call_args_list[-1][1]['json']['id'] == ['b', 'c']
+    assert [o['id'] for o in tracker.orders()] == ['a', 'd']
+    assert tracker.orders('btc_cad')[0]['remaining'] == Decimal('0.25')
+    assert 'b' not in tracker
+
+    # Vanished orders which cannot be looked up are kept.
+    del events[:]
+    open_orders['btc_cad'] = []
+    assert tracker.reconcile() == []
+    assert 'a' in tracker
+
+    tracker.untrack('a')
+    tracker.untrack('d')
+    assert len(tracker) == 0
+
+
+def test_order_tracker_fill_then_cancel(client, session):
+    def post(url, json, timeout):
+        response = mock.MagicMock(status_code=200)
+        if url.endswith('open_orders'):
+            response.json.return_value = []
+        else:
+            response.json.return_value = [
+                {'id': 'a', 'status': '-1', 'amount': '0.4'}
+            ]
+        return response
+
+    session.post.side_effect = post
+    tracker = OrderTracker(client)
+    tracker.track('btc_cad', {'id': 'a', 'amount': '1'})
+    events = tracker.reconcile()
+    assert [(e['event'], e['amount']) for e in events] == [
+        ('fill', Decimal('0.6')),
+        ('cancelled', Decimal('0.4')),
+    ]
+    assert events[-1]['order']['remaining'] == Decimal('0.4')
+    assert len(tracker) == 0
+
+
+def test_order_tracker_reconcile_without_lock(client, session):
+    sent = threading.Event()
+    release = threading.Event()
+
+    def post(url, json, timeout):
+        sent.set()
+        assert release.wait(5)
+        response = mock.MagicMock(status_code=200)
+        response.json.return_value = [{'id': 'a', 'amount': '0.5'}]
+        return response
+
+    session.post.side_effect = post
+    tracker = OrderTracker(client)
+    tracker.track('btc_cad', {'id': 'a', 'amount': '1'})
+    results = []
+    thread = threading.Thread(target=lambda: results.append(
+        tracker.reconcile()
+    ))
+    thread.start()
+    assert sent.wait(5)
+
+    # The tracker is usable while the request is in flight.
+    tracker.track('eth_cad', {'id': 'b', 'amount': '2'})
+    assert [o['id'] for o in tracker.orders()] == ['a', 'b']
+    release.set()
+    thread.join(5)
+
+    events = results[0]
+    assert [(e['event'], e['order']['id']) for e in events] == [('fill', 'a')]
+    assert tracker.orders('eth_cad')[0]['remaining'] == Decimal('2')
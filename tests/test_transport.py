@@ -0,0 +1,152 @@
+from __future__ import absolute_import, unicode_literals, division
+
+import json
+import threading
+
+import pytest
+
+from quadriga import QuadrigaClient
+from quadriga.exceptions import RequestError
+from quadriga.transport import (
+    RequestsTransport,
+    Response,
+    Urllib3Transport
+)
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:  # pragma: no cover
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send headers and body in one segment to avoid delayed ACK stalls.
+    wbufsize = -1
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.headers.get('Connection', '').lower() == 'close':
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith('/fail'):
+            return self.reply(503, 'down')
+        self.reply(200, json.dumps({'path': self.path}))
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        payload = json.loads(self.rfile.read(length).decode('utf-8'))
+        self.reply(200, json.dumps({
+            'path': self.path,
+            'payload': payload,
+            'content_type': self.headers['Content-Type']
+        }))
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    connections = 0
+
+
+@pytest.fixture
+def server():
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(
+        target=server.serve_forever,
+        kwargs={'poll_interval': 0.01}
+    )
+    thread.daemon = True
+    thread.start()
+    server.url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=[RequestsTransport, Urllib3Transport])
+def transport(request):
+    transport = request.param(pool_maxsize=4)
+    yield transport
+    transport.close()
+
+
+def test_response():
+    response = Response('url', 200, 'OK', {}, b'{"a": "\\u00e9"}')
+    assert repr(response) == '<Response [200]>'
+    assert response.text == '{"a": "\\u00e9"}'
+    assert response.json() == {'a': 'é'}
+
+
+def test_transport_requests(server, transport):
+    resp = transport.get(server.url + '/ticker', {'book': 'btc_cad'}, 5)
+    assert resp.status_code == 200
+    assert resp.json() == {'path': '/ticker?book=btc_cad'}
+
+    resp = transport.post(server.url + '/buy', {'amount': '1'}, 5)
+    assert resp.json() == {
+        'path': '/buy',
+        'payload': {'amount': '1'},
+        'content_type': 'application/json'
+    }
+
+    resp = transport.get(server.url + '/fail', None, 5)
+    assert resp.status_code == 503
+    assert resp.text == 'down'
+
+    # All requests went through a single kept-alive connection.
+    assert server.connections == 1
+
+
+@pytest.mark.parametrize('transport_class', [
+    RequestsTransport,
+    Urllib3Transport
+])
+def test_transport_no_keep_alive(server, transport_class):
+    transport = transport_class(keep_alive=False)
+    for _ in range(3):
+        transport.get(server.url + '/ticker', None, 5)
+    assert server.connections == 3
+    assert 'Transport' in repr(transport)
+
+
+def test_client_with_transport(server, transport, monkeypatch):
+    monkeypatch.setattr(QuadrigaClient, 'url', server.url)
+    client = QuadrigaClient(transport=transport, max_workers=4)
+    assert client.book('btc_cad').get_ticker() == {
+        'path': '/ticker?book=btc_cad'
+    }
+    with pytest.raises(RequestError) as err:
+        client._rest_client.get('/fail')
+    assert str(err.value) == '[HTTP 503] Service Unavailable'
+    assert err.value.body == 'down'
+
+    # Requests from many threads reuse the pooled connections.
+    tickers = client.get_tickers()
+    assert len(tickers) == len(client.order_books)
+    assert server.connections <= 4
+
+
+def test_default_transport_pool_size(session):
+    client = QuadrigaClient(max_workers=32)
+    transport = client._rest_client._transport
+    assert isinstance(transport, RequestsTransport)
+    adapter = transport.session.get_adapter('https://')
+    assert adapter._pool_maxsize == 32
+
+    client = QuadrigaClient(session=session)
+    assert client._rest_client._transport.session is session